@@ -10,6 +10,8 @@ from authlib.integrations.flask_client import OAuth
 from config import config
 from db import db
 from utils import middleware
+from commands import register_commands
+from scheduler import start_scheduler
 
 from routes.auth import auth_bp
 from routes.profile import profile_bp
@@ -56,6 +58,12 @@ def create_app():
     app.register_blueprint(jobs_bp)
     app.register_blueprint(coverletter_bp)
 
+    # Register CLI commands
+    register_commands(app)
+
+    # Start background jobs, e.g. recommendation feed refreshes
+    start_scheduler()
+
     @app.route("/")
     @cross_origin()
     # pylint: disable=unused-variable
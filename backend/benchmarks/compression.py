@@ -0,0 +1,74 @@
+"""
+Benchmarks storage saved versus CPU added by zstandard compression.
+
+Run from the backend directory:
+
+    python -m benchmarks.compression
+"""
+
+import time
+from io import BytesIO
+
+from blob_compression import compress_stream, decompress_bytes, pack_text, unpack_text
+
+SAMPLE_PDFS = ["data/sample-resume.pdf", "data/sample-resume-2.pdf"]
+
+SAMPLE_FEEDBACK = "\n".join(
+    ["# Resume Feedback", ""] + [
+        f"- **Experience {i}:** Quantify the impact of this role, e.g. reduced latency by 30% or "
+        "grew revenue by $1M. Lead with strong action verbs and keep bullets to one line."
+        for i in range(40)
+    ]
+)
+
+
+def _time(fn, repeat):
+    """Returns the mean wall time of fn in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def bench_text(text, repeat=200):
+    """Measures pack_text/unpack_text on a markdown document"""
+    packed = pack_text(text)
+    original = len(text.encode("utf-8"))
+    stored = len(packed) if isinstance(packed, bytes) else original
+    return {
+        "original_bytes": original,
+        "stored_bytes": stored,
+        "saved_pct": 100 * (1 - stored / original),
+        "compress_ms": _time(lambda: pack_text(text), repeat),
+        "decompress_ms": _time(lambda: unpack_text(packed), repeat),
+    }
+
+
+def bench_pdf(path, repeat=50):
+    """Measures streaming compression of a PDF as done on ingest"""
+    with open(path, "rb") as f:
+        data = f.read()
+    compressed = compress_stream(BytesIO(data), len(data)).read()
+    return {
+        "original_bytes": len(data),
+        "stored_bytes": len(compressed),
+        "saved_pct": 100 * (1 - len(compressed) / len(data)),
+        "compress_ms": _time(lambda: compress_stream(BytesIO(data), len(data)).read(), repeat),
+        "decompress_ms": _time(lambda: decompress_bytes(compressed), repeat),
+    }
+
+
+def main():
+    """Prints the benchmark results"""
+    rows = [("feedback markdown", bench_text(SAMPLE_FEEDBACK))]
+    rows += [(path, bench_pdf(path)) for path in SAMPLE_PDFS]
+    print(f"{'sample':<28}{'original':>10}{'stored':>10}{'saved':>8}{'compress':>12}{'decompress':>12}")
+    for name, result in rows:
+        print(
+            f"{name:<28}{result['original_bytes']:>10}{result['stored_bytes']:>10}"
+            f"{result['saved_pct']:>7.1f}%{result['compress_ms']:>10.3f}ms{result['decompress_ms']:>10.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
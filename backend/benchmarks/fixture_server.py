@@ -0,0 +1,104 @@
+"""
+Serves recorded job search result pages locally, so scrapers can be tested
+and benchmarked without network access.
+
+Recordings live in data/<source>/: results.html is page 1 and
+results-page-<n>.html, if present, is page n. Any page without a recording
+is answered with an empty results page, which scrapers read as the end of
+the results.
+"""
+
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+EMPTY_PAGE = "<html><body><main class=\"jobs-page\"><div>0 Jobs Found</div></main></body></html>"
+
+PAGE_FILE_RE = re.compile(r"^results(?:-page-(\d+))?\.html$")
+
+
+def load_recordings(source="careerbuilder", directory=RECORDINGS_DIR):
+    """
+    Loads the recorded result pages of a source
+
+    :param source: name of the recordings subdirectory
+    :param directory: directory holding the recordings of all sources
+    :return: dict of page number to page HTML
+    """
+    pages = {}
+    source_dir = os.path.join(directory, source)
+    for filename in os.listdir(source_dir):
+        match = PAGE_FILE_RE.match(filename)
+        if match:
+            with open(os.path.join(source_dir, filename), encoding="utf-8") as f:
+                pages[int(match.group(1) or 1)] = f.read()
+    return pages
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    """Answers every GET with the recorded page named by its page_number parameter"""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Replays a recorded page"""
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            page = int(query.get("page_number", ["1"])[0])
+        except ValueError:
+            page = 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        body = self.server.pages.get(page, EMPTY_PAGE).encode("utf-8")
+        with self.server.lock:
+            self.server.requests.append(self.path)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keeps request logs out of benchmark and test output"""
+
+
+class RecordedPageServer:
+    """
+    Local HTTP server replaying recorded result pages, used as a context manager
+
+    :param pages: dict of page number to page HTML
+    :param latency: seconds added to every response, to model a remote site
+    :param host: address to listen on and put in URLs; must be reachable by the Selenium hub if one is used
+    """
+
+    def __init__(self, pages, latency=0.0, host="127.0.0.1"):
+        self._server = ThreadingHTTPServer((host, 0), _ReplayHandler)
+        self._server.daemon_threads = True
+        self._server.pages = pages
+        self._server.latency = latency
+        self._server.requests = []
+        self._server.lock = threading.Lock()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        """Base URL of the server"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self):
+        """Paths requested so far"""
+        with self._server.lock:
+            return list(self._server.requests)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,88 @@
+"""
+Benchmarks hashed TF-IDF scoring of many postings against many profiles.
+
+Run from the backend directory:
+
+    python -m benchmarks.scoring [--postings 100000] [--profiles 1000]
+"""
+
+import argparse
+import random
+import time
+
+from scoring import fit_idf, hashed_counts, score_matrix, tfidf, top_k
+
+SKILLS = [
+    "python", "java", "javascript", "typescript", "go", "rust", "c++", "c#", "sql", "react",
+    "node.js", "django", "flask", "spring", "kubernetes", "docker", "aws", "azure", "gcp",
+    "terraform", "spark", "hadoop", "pandas", "pytorch", "tensorflow", "machine learning",
+    "data engineering", "devops", "security", "networking", "linux", "excel", "salesforce",
+    "marketing", "accounting", "nursing", "sales", "project management", "product management",
+]
+TITLES = ["engineer", "developer", "analyst", "scientist", "manager", "architect", "specialist", "consultant"]
+LEVELS = ["junior", "senior", "lead", "principal", "staff", "intern", "entry level"]
+LOCATIONS = ["Raleigh, NC", "Durham, NC", "New York, NY", "Austin, TX", "Seattle, WA", "Remote", "Chicago, IL"]
+COMPANIES = [f"Company {i}" for i in range(500)]
+
+
+def make_postings(count, rng):
+    """Generates synthetic posting texts"""
+    texts = []
+    for _ in range(count):
+        title = " ".join(
+            [rng.choice(LEVELS)] + rng.sample(SKILLS, rng.randint(1, 3)) + [rng.choice(TITLES)]
+        )
+        texts.append("\n".join([title, title, rng.choice(COMPANIES), rng.choice(LOCATIONS)]))
+    return texts
+
+
+def make_profiles(count, rng):
+    """Generates synthetic profile texts"""
+    return [
+        "\n".join(rng.sample(SKILLS, rng.randint(2, 6)) + [rng.choice(LEVELS), rng.choice(LOCATIONS)])
+        for _ in range(count)
+    ]
+
+
+def _timed(fn, *args):
+    """Runs fn(*args) and returns (result, seconds)"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _multiply(posting_vectors, profile_vectors):
+    """Scores every posting against every profile"""
+    return (posting_vectors @ profile_vectors.T).tocsr()
+
+
+def main():
+    """Prints the benchmark results"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--postings", type=int, default=100_000)
+    parser.add_argument("--profiles", type=int, default=1_000)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    postings, profiles = make_postings(args.postings, rng), make_profiles(args.profiles, rng)
+
+    posting_counts, count_s = _timed(hashed_counts, postings)
+    idf = fit_idf(posting_counts)
+    posting_vectors, weight_s = _timed(tfidf, posting_counts, idf)
+    profile_vectors, profile_s = _timed(lambda: tfidf(hashed_counts(profiles), idf))
+    scores, multiply_s = _timed(_multiply, posting_vectors, profile_vectors)
+    _, top_s = _timed(top_k, scores, args.top)
+    _, total_s = _timed(lambda: top_k(score_matrix(postings, profiles), args.top))
+
+    pairs = args.postings * args.profiles
+    print(f"{args.postings} postings x {args.profiles} profiles ({pairs:,} pairs)")
+    print(f"{'vectorize postings':<24}{count_s + weight_s:>10.3f}s")
+    print(f"{'vectorize profiles':<24}{profile_s:>10.3f}s")
+    print(f"{'matrix multiply':<24}{multiply_s:>10.3f}s  ({scores.nnz:,} non-zero scores)")
+    print(f"{f'top {args.top} per profile':<24}{top_s:>10.3f}s")
+    print(f"{'end to end':<24}{total_s:>10.3f}s  ({pairs / total_s / 1e6:.1f}M pairs/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Benchmarks job scraping offline against recorded result pages.
+
+Measures parse time per listing, end to end search latency of the
+lightweight HTTP path and the Selenium path, and Python heap used per search
+and per browser session. Pages are served by a local fixture server and, unless
+--selenium-url is given, browser sessions are replaced by a driver that loads
+pages over HTTP, so no network or Selenium hub is needed.
+
+Run from the backend directory:
+
+    python -m benchmarks.scrapers [--listings 25] [--pages 3] [--repeat 20] [--latency 0.05]
+"""
+
+import argparse
+import copy
+import statistics
+import time
+import tracemalloc
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from urllib.request import urlopen
+
+from bs4 import BeautifulSoup
+
+from benchmarks.fixture_server import RecordedPageServer, load_recordings
+from config import config
+from scraping.drivers import close_driver_pool, get_driver_pool, get_driver_timings
+from scraping.parsers import HTML_FEATURES, get_parser
+from scraping.pipeline import CareerBuilderSource, ScrapePipeline
+
+
+class ReplayDriver:
+    """Stands in for webdriver.Remote, loading pages over HTTP like a browser session would"""
+
+    def __init__(self, *_args, **_kwargs):
+        self.current_url = "about:blank"
+        self.page_source = ""
+
+    def get(self, url):
+        """Loads a page"""
+        with urlopen(url) as response:
+            self.page_source = response.read().decode("utf-8")
+        self.current_url = url
+
+    def find_element(self, *_locator):
+        """Replayed pages are complete as soon as they are loaded"""
+        return self
+
+    def set_page_load_timeout(self, seconds):
+        """Replayed pages load at once"""
+
+    def delete_all_cookies(self):
+        """Nothing to clear"""
+
+    def quit(self):
+        """Nothing to shut down"""
+
+
+def expand_page(html, listings, page):
+    """
+    Builds a results page with the given number of listings from a recorded one
+
+    :param html: recorded results page
+    :param listings: number of listings on the new page
+    :param page: page number, used to give every listing a unique id
+    :return: page HTML
+    """
+    soup = BeautifulSoup(html, HTML_FEATURES)
+    recorded = soup.select(get_parser("careerbuilder").listing_selector)
+    parent = recorded[0].parent
+    for element in recorded:
+        element.extract()
+    for i in range(listings):
+        element = copy.copy(recorded[i % len(recorded)])
+        element.select_one("a.data-results-content")["href"] = f"/job/BENCH{page:03d}{i:05d}"
+        parent.append(element)
+    return str(soup)
+
+
+def _percentile(values, pct):
+    """Returns the pct percentile of values (nearest rank)"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def bench_parse(html, listings, repeat):
+    """Measures parsing one results page"""
+    parser = get_parser("careerbuilder")
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parsed = parser.parse(html)
+    elapsed = (time.perf_counter() - start) / repeat
+    assert len(parsed) == listings
+    return {"page_ms": elapsed * 1000, "listing_us": elapsed / listings * 1e6}
+
+
+def bench_search(pipeline, expected, repeat):
+    """Measures a cold search (new sessions) followed by warm searches"""
+    def run():
+        start = time.perf_counter()
+        postings = list(pipeline.iter_postings("engineer", "", "New York"))
+        assert len(postings) == expected, f"expected {expected} postings, got {len(postings)}"
+        return time.perf_counter() - start
+
+    cold = run()
+    warm = [run() for _ in range(repeat)]
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "cold_ms": cold * 1000,
+        "p50_ms": statistics.median(warm) * 1000,
+        "p95_ms": _percentile(warm, 95) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def bench_session():
+    """Measures the Python heap held by one new pooled browser session"""
+    close_driver_pool()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    pool = get_driver_pool()
+    with pool.session():
+        current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (current - before) / 1024
+
+
+def main():
+    """Prints the benchmark results"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--listings", type=int, default=25, help="listings per results page")
+    parser.add_argument("--pages", type=int, default=3, help="results pages per search")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every page response")
+    parser.add_argument("--selenium-url", help="benchmark a real Selenium hub instead of the replay driver")
+    parser.add_argument("--host", default="127.0.0.1", help="fixture server address, must be reachable by the hub")
+    args = parser.parse_args()
+
+    recorded = load_recordings()[1]
+    pages = {page: expand_page(recorded, args.listings, page) for page in range(1, args.pages + 1)}
+    expected = args.listings * args.pages
+
+    # Measure the scrapers, not the politeness settings
+    config.update({"SCRAPER_RATE_PER_SECOND": 1e6, "SCRAPER_RATE_BURST": 1_000_000, "SCRAPER_RETRIES": 0})
+    if args.selenium_url:
+        config["SELENIUM_URL"] = args.selenium_url
+        driver_patch = nullcontext()
+    else:
+        driver_patch = mock.patch("selenium.webdriver.Remote", ReplayDriver)
+
+    print(f"Parser ({HTML_FEATURES}), {args.listings} listings per page")
+    parse = bench_parse(pages[1], args.listings, args.repeat * 5)
+    print(f"{'parse page':<24}{parse['page_ms']:>10.2f}ms  ({parse['listing_us']:.0f}us per listing)")
+
+    driver = "Selenium hub" if args.selenium_url else "replay driver"
+    print(f"\nSearch of {args.pages} pages ({expected} postings), {args.latency * 1000:.0f}ms page latency, {driver}")
+    print(f"{'path':<12}{'cold':>10}{'p50':>10}{'p95':>10}{'peak heap':>14}")
+    executor = ThreadPoolExecutor(max_workers=1)
+    with driver_patch:
+        with RecordedPageServer(pages, latency=args.latency, host=args.host) as server:
+            source = CareerBuilderSource()
+            source.base_url = server.url
+            pipeline = ScrapePipeline([source], executor, args.pages)
+            for path, http_first in (("http", True), ("selenium", False)):
+                config["SCRAPER_HTTP_FIRST"] = http_first
+                close_driver_pool()
+                result = bench_search(pipeline, expected, args.repeat)
+                print(
+                    f"{path:<12}{result['cold_ms']:>8.1f}ms{result['p50_ms']:>8.1f}ms{result['p95_ms']:>8.1f}ms"
+                    f"{result['peak_kib']:>10.0f} KiB"
+                )
+            print(f"\n{'per browser session':<24}{bench_session():>10.0f} KiB Python heap")
+            print(f"{'pages served':<24}{len(server.requests):>10}")
+
+    timings = get_driver_timings()
+    if timings["sessions"]:
+        print(f"{'user agent pool load':<24}{timings['user_agent_pool_seconds'] * 1000:>10.2f}ms  (once per process)")
+        print(f"{'setup per session':<24}{timings['setup_seconds'] / timings['sessions'] * 1000:>10.3f}ms"
+              f"  ({timings['sessions']} sessions)")
+        print(f"{'start per session':<24}{timings['start_seconds'] / timings['sessions'] * 1000:>10.2f}ms")
+    close_driver_pool()
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
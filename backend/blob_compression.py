@@ -0,0 +1,79 @@
+"""
+This module provides transparent zstandard compression for stored text and files.
+
+Long strings are stored as zstd frames (BSON binary) and short ones are left
+as plain strings, so documents written before compression was enabled read
+back unchanged.
+"""
+
+import threading
+import zstandard
+from config import config
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Compressor/decompressor objects are not safe to share between threads
+_local = threading.local()
+
+
+def _compressor():
+    """Returns this thread's compressor"""
+    if not hasattr(_local, "compressor"):
+        _local.compressor = zstandard.ZstdCompressor(level=config["ZSTD_LEVEL"])
+    return _local.compressor
+
+
+def _decompressor():
+    """Returns this thread's decompressor"""
+    if not hasattr(_local, "decompressor"):
+        _local.decompressor = zstandard.ZstdDecompressor()
+    return _local.decompressor
+
+
+def pack_text(text):
+    """
+    Compresses a string for storage if it is long enough to be worth it
+
+    :param text: string to store
+    :return: zstd compressed bytes, or the original string
+    """
+    if not isinstance(text, str) or not config["COMPRESS_STORED_TEXT"]:
+        return text
+    data = text.encode("utf-8")
+    if len(data) < config["COMPRESSION_MIN_BYTES"]:
+        return text
+    compressed = _compressor().compress(data)
+    return compressed if len(compressed) < len(data) else text
+
+
+def unpack_text(value):
+    """
+    Restores a string stored with pack_text
+
+    :param value: stored value, either a plain string or zstd compressed bytes
+    :return: the original string
+    """
+    if isinstance(value, bytes) and value[:4] == ZSTD_MAGIC:
+        return _decompressor().decompress(value).decode("utf-8")
+    return value
+
+
+def compress_stream(file, size=-1):
+    """
+    Wraps a readable file so it yields zstd compressed bytes
+
+    :param file: readable file-like object
+    :param size: uncompressed size, recorded in the frame header when known
+    :return: readable file-like object of the compressed stream
+    """
+    return _compressor().stream_reader(file, size=size)
+
+
+def decompress_bytes(data):
+    """
+    Decompresses a complete zstd frame
+
+    :param data: compressed bytes
+    :return: decompressed bytes
+    """
+    return _decompressor().decompressobj().decompress(data)
@@ -0,0 +1,308 @@
+"""
+This module contains the offline maintenance commands for the application.
+
+Commands are registered on the Flask CLI, e.g. ``flask regenerate-feedback``.
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from io import BytesIO
+
+import click
+import gridfs
+from bson import ObjectId
+from pymongo import UpdateOne
+from blob_compression import pack_text
+from db import get_collection, get_fs
+from mongoengine.connection import get_db
+from models import JobPosting, Users, VocabularyTerm
+from profiles import record_posting_terms, record_terms, seed_aliases
+from recommendations import refresh_feeds
+from resume_store import open_blob
+from routes.jobs import search_jobs_first_page
+from routes.resume import build_feedback_prompt, extract_pdf_text, get_model
+
+
+def _extract_text(data):
+    """Extracts resume text from raw PDF bytes; runs inside the process pool"""
+    return extract_pdf_text(BytesIO(data))
+
+
+def _load_checkpoint(path):
+    """Reads the checkpoint file, returning an empty checkpoint if there is none"""
+    if not os.path.exists(path):
+        return {"last_user_id": None, "processed": 0}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_checkpoint(path, checkpoint):
+    """Atomically writes the checkpoint file"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def _iter_batches(iterable, batch_size):
+    """Groups an iterable into lists of at most batch_size items"""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _iter_user_batches(collection, last_user_id, batch_size):
+    """Streams users with at least one resume in id order, batch_size at a time"""
+    query = {"resumes.0": {"$exists": True}}
+    if last_user_id is not None:
+        query["_id"] = {"$gt": last_user_id}
+    cursor = collection.find(query, {"resumes": 1}).sort("_id", 1).batch_size(batch_size)
+    return _iter_batches(cursor, batch_size)
+
+
+def _generate_feedback(text, model):
+    """Builds the feedback prompt, summarizing oversized resumes, and generates feedback; runs in the LLM pool"""
+    return model.invoke(build_feedback_prompt(text, model))
+
+
+def regenerate_batch(batch, fs, extract_pool, llm_pool, model):
+    """
+    Regenerates feedback for every resume of a batch of users
+
+    Text extraction runs in the process pool and each extracted resume is
+    handed to the LLM pool as soon as it is ready, so the two stages overlap.
+    All model calls, including summarizing oversized resumes, run in the LLM pool.
+
+    :param batch: raw user documents with their resume file ids
+    :param fs: GridFS instance holding the resumes
+    :param extract_pool: executor used for text extraction
+    :param llm_pool: executor used for LLM requests
+    :param model: LLM used to generate feedback
+    :return: tuple of (dict of user id to feedback fields to set, resumes failed)
+    """
+    extractions = {}
+    for doc in batch:
+        for idx, file_id in enumerate(doc["resumes"]):
+            try:
+                data = open_blob(fs.get(file_id)).read()
+            except gridfs.errors.NoFile:
+                continue
+            extractions[extract_pool.submit(_extract_text, data)] = (doc, idx)
+
+    generations = {}
+    failed = 0
+    for future in as_completed(extractions):
+        doc, idx = extractions[future]
+        try:
+            text = future.result()
+        except Exception as err:
+            print(f"Extraction failed for user {doc['_id']} resume {idx}: {err}")
+            failed += 1
+            continue
+        generations[llm_pool.submit(_generate_feedback, text, model)] = (doc, idx)
+
+    updates = {}
+    for future in as_completed(generations):
+        doc, idx = generations[future]
+        try:
+            feedback = future.result()
+        except Exception as err:
+            print(f"Generation failed for user {doc['_id']} resume {idx}: {err}")
+            failed += 1
+            continue
+        updates.setdefault(doc["_id"], {})[f"resumeFeedbacks.{idx}"] = pack_text(feedback)
+    return updates, failed
+
+
+def write_feedback(collection, batch, updates):
+    """
+    Writes regenerated feedback, skipping users whose resumes changed since they were read
+
+    Each write only matches if the user's resumes are unchanged, so uploads
+    and deletes made during the run are never clobbered.
+
+    :param collection: users collection
+    :param batch: raw user documents the feedback was generated from
+    :param updates: dict of user id to feedback fields to set
+    :return: tuple of (resumes written, ids of the users that were skipped)
+    """
+    written = [doc for doc in batch if doc["_id"] in updates]
+    if not written:
+        return 0, []
+    result = collection.bulk_write([
+        UpdateOne({"_id": doc["_id"], "resumes": doc["resumes"]}, {"$set": updates[doc["_id"]]})
+        for doc in written
+    ], ordered=False)
+    skipped = []
+    if result.matched_count < len(written):
+        current = {
+            user["_id"]: user["resumes"]
+            for user in collection.find({"_id": {"$in": [doc["_id"] for doc in written]}}, {"resumes": 1})
+        }
+        skipped = [doc["_id"] for doc in written if current.get(doc["_id"]) != doc["resumes"]]
+    return sum(len(updates[doc["_id"]]) for doc in written if doc["_id"] not in skipped), skipped
+
+
+@click.command("regenerate-feedback")
+@click.option("--batch-size", default=25, show_default=True, help="Users per bulk write and checkpoint.")
+@click.option("--workers", default=os.cpu_count() or 1, show_default=True,
+              help="Processes used for PDF text extraction; 0 extracts in-process.")
+@click.option("--concurrency", default=4, show_default=True, help="Maximum concurrent LLM requests.")
+@click.option("--checkpoint", "checkpoint_path", default="regenerate-feedback.checkpoint.json",
+              show_default=True, help="File used to resume an interrupted run.")
+@click.option("--restart", is_flag=True, help="Ignore an existing checkpoint and start from the first user.")
+def regenerate_feedback_command(batch_size, workers, concurrency, checkpoint_path, restart):
+    """Regenerates resume feedback for all users from their stored resumes."""
+    checkpoint = {"last_user_id": None, "processed": 0} if restart else _load_checkpoint(checkpoint_path)
+    if checkpoint["last_user_id"] is not None:
+        click.echo(f"Resuming after user {checkpoint['last_user_id']}")
+
+    collection = get_collection(Users)
+    fs = get_fs()
+    model = get_model()
+
+    extract_pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else ThreadPoolExecutor(max_workers=1)
+    llm_pool = ThreadPoolExecutor(max_workers=concurrency)
+    start = time.perf_counter()
+    regenerated_total = 0
+    failed_total = 0
+    skipped_total = 0
+    try:
+        for batch in _iter_user_batches(collection, checkpoint["last_user_id"], batch_size):
+            updates, failed = regenerate_batch(batch, fs, extract_pool, llm_pool, model)
+            regenerated, skipped = write_feedback(collection, batch, updates)
+            if skipped:
+                # Their resumes changed mid-run: regenerate once more from the current resumes
+                retry = list(collection.find(
+                    {"_id": {"$in": skipped}, "resumes.0": {"$exists": True}}, {"resumes": 1}
+                ))
+                updates, retry_failed = regenerate_batch(retry, fs, extract_pool, llm_pool, model)
+                retried, skipped = write_feedback(collection, retry, updates)
+                regenerated += retried
+                failed += retry_failed
+            if skipped:
+                click.echo(f"Skipped users whose resumes changed during the run: {', '.join(map(str, skipped))}")
+            skipped_total += len(skipped)
+
+            regenerated_total += regenerated
+            failed_total += failed
+            checkpoint["last_user_id"] = batch[-1]["_id"]
+            checkpoint["processed"] += regenerated
+            _save_checkpoint(checkpoint_path, checkpoint)
+
+            elapsed = time.perf_counter() - start
+            rate = regenerated_total / elapsed * 60 if elapsed else 0.0
+            click.echo(
+                f"Up to user {checkpoint['last_user_id']}: {regenerated_total} regenerated, "
+                f"{failed_total} failed, {skipped_total} users skipped, {rate:.1f} resumes/minute"
+            )
+    finally:
+        extract_pool.shutdown()
+        llm_pool.shutdown()
+
+    elapsed = time.perf_counter() - start
+    rate = regenerated_total / elapsed * 60 if elapsed else 0.0
+    click.echo(f"Done: {regenerated_total} resumes in {elapsed:.1f}s ({rate:.1f} resumes/minute)")
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+
+def _referenced_file_ids(collection):
+    """Collects the GridFS file ids referenced by any user's resumes"""
+    referenced = set()
+    for doc in collection.find({"resumes.0": {"$exists": True}}, {"resumes": 1}):
+        referenced.update(doc["resumes"])
+    return referenced
+
+
+@click.command("gc-resumes")
+@click.option("--batch-size", default=500, show_default=True, help="Files checked and deleted per batch.")
+@click.option("--grace-minutes", default=60, show_default=True,
+              help="Only collect files older than this, so uploads in flight are never touched.")
+@click.option("--dry-run", is_flag=True, help="Report orphans without deleting them.")
+def gc_resumes_command(batch_size, grace_minutes, dry_run):
+    """Deletes GridFS files and chunks that no user's resumes reference."""
+    database = get_db()
+    files, chunks = database["fs.files"], database["fs.chunks"]
+    referenced = _referenced_file_ids(get_collection(Users))
+    cutoff = datetime.utcnow() - timedelta(minutes=grace_minutes)
+
+    orphan_files = 0
+    candidates = files.find({"uploadDate": {"$lt": cutoff}}, {"_id": 1}).sort("_id", 1).batch_size(batch_size)
+    for batch in _iter_batches((doc["_id"] for doc in candidates), batch_size):
+        orphans = [file_id for file_id in batch if file_id not in referenced]
+        orphan_files += len(orphans)
+        if orphans and not dry_run:
+            chunks.delete_many({"files_id": {"$in": orphans}})
+            files.delete_many({"_id": {"$in": orphans}})
+
+    # Chunks left behind by interrupted uploads or partial deletes have no fs.files entry at all
+    orphan_chunks = 0
+    # GridFS writes chunks before the files document, so in-flight uploads are excluded by age
+    chunk_owners = chunks.aggregate([
+        {"$match": {"files_id": {"$lt": ObjectId.from_datetime(cutoff)}}},
+        {"$group": {"_id": "$files_id"}},
+    ], allowDiskUse=True)
+    for batch in _iter_batches((doc["_id"] for doc in chunk_owners), batch_size):
+        existing = {doc["_id"] for doc in files.find({"_id": {"$in": batch}}, {"_id": 1})}
+        missing = [file_id for file_id in batch if file_id not in existing]
+        if not missing:
+            continue
+        if dry_run:
+            orphan_chunks += chunks.count_documents({"files_id": {"$in": missing}})
+        else:
+            orphan_chunks += chunks.delete_many({"files_id": {"$in": missing}}).deleted_count
+
+    action = "Found" if dry_run else "Removed"
+    click.echo(f"{action} {orphan_files} orphaned files and {orphan_chunks} orphaned chunks")
+
+
+@click.command("refresh-recommendations")
+@click.option("--max-age", default=None, type=float,
+              help="Recompute unchanged feeds older than this many seconds [default: RECOMMENDATION_FEED_MAX_AGE].")
+@click.option("--budget", default=None, type=float,
+              help="Time budget per profile in seconds [default: RECOMMENDATION_TIME_BUDGET].")
+def refresh_recommendations_command(max_age, budget):
+    """Precomputes recommendation feeds for profiles that changed since the last run."""
+    start = time.perf_counter()
+    refreshed, skipped = refresh_feeds(search_jobs_first_page, max_age, budget)
+    click.echo(f"Refreshed {refreshed} feeds, {skipped} unchanged, in {time.perf_counter() - start:.1f}s")
+
+
+@click.command("build-vocabulary")
+@click.option("--batch-size", default=1000, show_default=True, help="Postings read per batch.")
+def build_vocabulary_command(batch_size):
+    """Stores the default aliases and adds the terms of every existing profile and posting to the vocabulary."""
+    seed_aliases()
+    profiles = 0
+    for user in Users.objects(__raw__={"profiles.0": {"$exists": True}}).only("profiles"):
+        record_terms(user.profiles)
+        profiles += len(user.profiles)
+    postings, batch = 0, []
+    for posting in JobPosting.objects(location__ne=None).only("location").as_pymongo():
+        batch.append(posting)
+        if len(batch) >= batch_size:
+            record_posting_terms(batch)
+            postings, batch = postings + len(batch), []
+    record_posting_terms(batch)
+    postings += len(batch)
+    click.echo(
+        f"Recorded the terms of {profiles} profiles and {postings} postings, "
+        f"{VocabularyTerm.objects.count()} terms in total"
+    )
+
+
+def register_commands(app):
+    """Registers the maintenance commands on the app's CLI"""
+    app.cli.add_command(regenerate_feedback_command)
+    app.cli.add_command(gc_resumes_command)
+    app.cli.add_command(refresh_recommendations_command)
+    app.cli.add_command(build_vocabulary_command)
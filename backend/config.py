@@ -13,3 +13,78 @@ load_dotenv(find_dotenv())
 
 config["OLLAMA_URL"] = os.getenv("OLLAMA_URL", "http://localhost:11434")
 config["SELENIUM_URL"] = os.getenv("SELENIUM_URL", "http://localhost:4444")
+
+# Token budget for prompts sent to the local model; qwen2.5:1.5b runs with a 2048 token context in Ollama
+config["PROMPT_TOKEN_BUDGET"] = int(os.getenv("PROMPT_TOKEN_BUDGET", "1536"))
+config["PROMPT_CHUNK_TOKENS"] = int(os.getenv("PROMPT_CHUNK_TOKENS", "1024"))
+# "truncate" drops low priority resume sections, "summarize" map-reduces oversized resumes through the model
+config["PROMPT_STRATEGY"] = os.getenv("PROMPT_STRATEGY", "truncate")
+
+# Let identical resume uploads from different users share one GridFS blob and its feedback
+config["SHARE_RESUME_BLOBS"] = os.getenv("SHARE_RESUME_BLOBS", "false").lower() == "true"
+
+# zstandard compression for long feedback/cover letter text and, optionally, resume PDFs in GridFS
+config["COMPRESS_STORED_TEXT"] = os.getenv("COMPRESS_STORED_TEXT", "true").lower() == "true"
+config["COMPRESS_RESUME_BLOBS"] = os.getenv("COMPRESS_RESUME_BLOBS", "false").lower() == "true"
+config["COMPRESSION_MIN_BYTES"] = int(os.getenv("COMPRESSION_MIN_BYTES", "512"))
+config["ZSTD_LEVEL"] = int(os.getenv("ZSTD_LEVEL", "3"))
+
+# Warm remote WebDriver sessions shared by job searches
+config["SELENIUM_POOL_SIZE"] = int(os.getenv("SELENIUM_POOL_SIZE", "2"))
+config["SELENIUM_MAX_USES"] = int(os.getenv("SELENIUM_MAX_USES", "25"))
+config["SELENIUM_CHECKOUT_TIMEOUT"] = float(os.getenv("SELENIUM_CHECKOUT_TIMEOUT", "30"))
+config["SELENIUM_USER_AGENT_POOL_SIZE"] = int(os.getenv("SELENIUM_USER_AGENT_POOL_SIZE", "20"))
+# "normal" waits for every image, font and ad; "eager" returns once the DOM is ready, "none" right away
+config["SELENIUM_PAGE_LOAD_STRATEGY"] = os.getenv("SELENIUM_PAGE_LOAD_STRATEGY", "eager")
+config["SELENIUM_BLOCK_RESOURCES"] = os.getenv("SELENIUM_BLOCK_RESOURCES", "images,fonts,notifications,popups")
+config["SELENIUM_PAGE_LOAD_TIMEOUT"] = float(os.getenv("SELENIUM_PAGE_LOAD_TIMEOUT", "20"))
+config["SELENIUM_WAIT_TIMEOUT"] = float(os.getenv("SELENIUM_WAIT_TIMEOUT", "10"))
+
+# Lightweight HTTP scraping, tried before falling back to Selenium
+config["SCRAPER_HTTP_FIRST"] = os.getenv("SCRAPER_HTTP_FIRST", "true").lower() == "true"
+config["SCRAPER_HTTP_TIMEOUT"] = float(os.getenv("SCRAPER_HTTP_TIMEOUT", "10"))
+config["SCRAPER_HTTP_POOL_SIZE"] = int(os.getenv("SCRAPER_HTTP_POOL_SIZE", "10"))
+
+# Scraping pipeline: comma separated job sources, result pages per source, per-host rate limits and retries.
+# Result pages read per source by /search; recommendation fan-outs read only the first page of each query
+config["SCRAPER_SOURCES"] = os.getenv("SCRAPER_SOURCES", "careerbuilder")
+config["SCRAPER_MAX_PAGES"] = int(os.getenv("SCRAPER_MAX_PAGES", "3"))
+config["SCRAPER_WORKERS"] = int(os.getenv("SCRAPER_WORKERS", "4"))
+config["SCRAPER_RATE_PER_SECOND"] = float(os.getenv("SCRAPER_RATE_PER_SECOND", "1"))
+config["SCRAPER_RATE_BURST"] = int(os.getenv("SCRAPER_RATE_BURST", "3"))
+config["SCRAPER_RETRIES"] = int(os.getenv("SCRAPER_RETRIES", "2"))
+config["SCRAPER_BACKOFF_BASE"] = float(os.getenv("SCRAPER_BACKOFF_BASE", "0.5"))
+config["SCRAPER_BACKOFF_CAP"] = float(os.getenv("SCRAPER_BACKOFF_CAP", "8"))
+
+# Shared job search result cache
+config["SEARCH_CACHE_SIZE"] = int(os.getenv("SEARCH_CACHE_SIZE", "512"))
+config["SEARCH_CACHE_TTL"] = float(os.getenv("SEARCH_CACHE_TTL", "600"))
+config["SEARCH_CACHE_STALE_TTL"] = float(os.getenv("SEARCH_CACHE_STALE_TTL", "3600"))
+config["SEARCH_CACHE_MONGO"] = os.getenv("SEARCH_CACHE_MONGO", "false").lower() == "true"
+
+# Fan-out job recommendations across profile skills and locations
+config["RECOMMENDATION_MODE"] = os.getenv("RECOMMENDATION_MODE", "random")
+config["RECOMMENDATION_WORKERS"] = int(os.getenv("RECOMMENDATION_WORKERS", "4"))
+config["RECOMMENDATION_MAX_QUERIES"] = int(os.getenv("RECOMMENDATION_MAX_QUERIES", "8"))
+config["RECOMMENDATION_TIME_BUDGET"] = float(os.getenv("RECOMMENDATION_TIME_BUDGET", "20"))
+
+# Precomputed recommendation feeds; an interval of 0 disables the in-process scheduler
+config["RECOMMENDATION_FEED_INTERVAL"] = float(os.getenv("RECOMMENDATION_FEED_INTERVAL", "0"))
+config["RECOMMENDATION_FEED_MAX_AGE"] = float(os.getenv("RECOMMENDATION_FEED_MAX_AGE", "86400"))
+
+# Local job postings store, searched before scraping
+config["POSTINGS_LOCAL_FIRST"] = os.getenv("POSTINGS_LOCAL_FIRST", "true").lower() == "true"
+config["POSTINGS_MAX_AGE"] = float(os.getenv("POSTINGS_MAX_AGE", "21600"))
+config["POSTINGS_MIN_LOCAL_RESULTS"] = int(os.getenv("POSTINGS_MIN_LOCAL_RESULTS", "10"))
+config["POSTINGS_LOCAL_LIMIT"] = int(os.getenv("POSTINGS_LOCAL_LIMIT", "50"))
+
+# Embeddings used to match resumes against saved applications
+config["OLLAMA_EMBED_MODEL"] = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+config["OLLAMA_EMBED_BATCH_SIZE"] = int(os.getenv("OLLAMA_EMBED_BATCH_SIZE", "64"))
+config["EMBED_TOKEN_BUDGET"] = int(os.getenv("EMBED_TOKEN_BUDGET", "1536"))
+
+# Per-user cache of profiles in vocabulary terms, invalidated when a profile changes
+config["PROFILE_CACHE_SIZE"] = int(os.getenv("PROFILE_CACHE_SIZE", "1024"))
+config["PROFILE_CACHE_TTL"] = float(os.getenv("PROFILE_CACHE_TTL", "300"))
+# Seconds a process keeps its copy of the vocabulary before reading new aliases
+config["VOCABULARY_CACHE_TTL"] = float(os.getenv("VOCABULARY_CACHE_TTL", "300"))
@@ -2,6 +2,28 @@
 This module initializes the shared MongoEngine instance for the application.
 """
 
+import gridfs
 from flask_mongoengine import MongoEngine
+from mongoengine.connection import get_db
 
 db = MongoEngine()
+
+
+def get_fs():
+    """Returns the GridFS bucket used by FileFields (the default "fs" collection)"""
+    return gridfs.GridFS(get_db(), collection="fs")
+
+
+def get_collection(document):
+    """
+    Returns the pymongo collection behind a MongoEngine document class
+
+    For the writes the QuerySet API cannot express: pipeline updates,
+    filtered updates returning raw documents, bulk upserts and pushes of raw
+    GridFS ids to FileField lists.
+
+    :param document: Document subclass
+    :return: pymongo Collection
+    """
+    # MongoEngine only exposes the collection through this underscored classmethod
+    return document._get_collection()  # pylint: disable=protected-access
@@ -0,0 +1,119 @@
+"""
+This module computes text embeddings with the local Ollama server and caches
+them in the embeddings collection.
+
+Vectors are keyed by model and content hash, so each distinct text (or
+resume file) is only embedded once; everything else is a batched lookup.
+"""
+
+import hashlib
+import numpy as np
+from pymongo.errors import BulkWriteError
+from mongoengine.connection import get_db
+from langchain_ollama import OllamaEmbeddings
+from config import config
+
+EMBEDDINGS_COLLECTION = "embeddings"
+
+
+def get_embedder():
+    """Returns the embedding model"""
+    return OllamaEmbeddings(base_url=config["OLLAMA_URL"], model=config["OLLAMA_EMBED_MODEL"])
+
+
+def text_key(text):
+    """
+    Returns the cache key of a text
+
+    :param text: text to embed
+    :return: key string
+    """
+    return "text:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _doc_id(key):
+    """Namespaces a key by the embedding model, so switching models never mixes vectors"""
+    return f"{config['OLLAMA_EMBED_MODEL']}:{key}"
+
+
+def lookup_embeddings(keys):
+    """
+    Loads cached vectors in one query
+
+    :param keys: cache keys
+    :return: dict of key to float32 vector for the keys that are cached
+    """
+    ids = {_doc_id(key): key for key in keys}
+    if not ids:
+        return {}
+    cursor = get_db()[EMBEDDINGS_COLLECTION].find({"_id": {"$in": list(ids)}}, {"vector": 1})
+    return {ids[doc["_id"]]: np.frombuffer(doc["vector"], dtype=np.float32) for doc in cursor}
+
+
+def store_embeddings(vectors):
+    """
+    Caches vectors
+
+    :param vectors: dict of key to vector
+    """
+    docs = [
+        {"_id": _doc_id(key), "vector": np.asarray(vector, dtype=np.float32).tobytes(), "dim": len(vector)}
+        for key, vector in vectors.items()
+    ]
+    if not docs:
+        return
+    try:
+        get_db()[EMBEDDINGS_COLLECTION].insert_many(docs, ordered=False)
+    except BulkWriteError:
+        # Another request cached some of the same texts first
+        pass
+
+
+def embed_texts(texts, keys=None, embedder=None):
+    """
+    Embeds texts, only sending the ones not cached yet to the model
+
+    Missing texts are deduplicated and embedded in batches of
+    OLLAMA_EMBED_BATCH_SIZE.
+
+    :param texts: list of texts
+    :param keys: cache keys aligned with texts, defaults to text_key of each text
+    :param embedder: embedding model, defaults to get_embedder()
+    :return: float32 array of shape (len(texts), dimensions)
+    """
+    keys = keys or [text_key(text) for text in texts]
+    vectors = lookup_embeddings(keys)
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in vectors:
+            missing.setdefault(key, text)
+    if missing:
+        embedder = embedder or get_embedder()
+        batch_size = config["OLLAMA_EMBED_BATCH_SIZE"]
+        new_keys, new_texts = list(missing), list(missing.values())
+        computed = {}
+        for start in range(0, len(new_texts), batch_size):
+            batch = embedder.embed_documents(new_texts[start:start + batch_size])
+            computed.update(zip(new_keys[start:start + batch_size], batch))
+        store_embeddings(computed)
+        vectors.update({key: np.asarray(vector, dtype=np.float32) for key, vector in computed.items()})
+
+    if not keys:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.vstack([vectors[key] for key in keys])
+
+
+def cosine_scores(query, matrix):
+    """
+    Scores every row of a matrix against a query vector by cosine similarity
+
+    :param query: vector of shape (dimensions,)
+    :param matrix: array of shape (rows, dimensions)
+    :return: array of shape (rows,)
+    """
+    if matrix.size == 0:
+        return np.zeros(len(matrix), dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    norms[norms == 0] = 1
+    return (matrix @ query) / norms
@@ -16,6 +16,28 @@ class Profile(db.EmbeddedDocument):
     phone_number = db.StringField()
     address = db.StringField()
 
+# Metadata kept next to each stored resume so listings never have to open GridFS
+class ResumeMeta(db.EmbeddedDocument):
+    """Resume Metadata Class"""
+    resume_id = db.StringField()
+    file_id = db.ObjectIdField()
+    filename = db.StringField()
+    size = db.IntField()
+    uploaded_at = db.DateTimeField()
+    page_count = db.IntField()
+    sha256 = db.StringField()
+
+    def to_json(self):
+        """Convert the metadata to JSON format"""
+        return {
+            "id": self.resume_id,
+            "filename": self.filename,
+            "size": self.size,
+            "uploaded_at": self.uploaded_at.isoformat() if self.uploaded_at else None,
+            "page_count": self.page_count,
+            "sha256": self.sha256,
+        }
+
 # Updated Users class
 class Users(db.Document):
     """Users Class"""
@@ -27,8 +49,13 @@ class Users(db.Document):
     email = db.StringField()
     applications = db.ListField()
     resumes = db.ListField(db.FileField())
-    coverletters = db.ListField()
-    resumeFeedbacks = db.ListField()
+    # DynamicField keeps compressed (bytes) entries intact; a bare ListField
+    # would turn them into lists of ints
+    coverletters = db.ListField(db.DynamicField())
+    resumeFeedbacks = db.ListField(db.DynamicField())
+
+    # Metadata for each entry in resumes, aligned by index
+    resumeMeta = db.EmbeddedDocumentListField(ResumeMeta)
 
     # Add a list of profiles
     profiles = db.EmbeddedDocumentListField(Profile)
@@ -36,11 +63,88 @@ class Users(db.Document):
     # Add a pointer to the default profile
     default_profile = db.IntField(default=0)
 
+    meta = {"indexes": ["resumeMeta.sha256"]}
+
     def to_json(self):
         """Convert the document to JSON format"""
         return {"id": self.id, "fullName": self.fullName, "username": self.username}
 
 
+# Precomputed recommendations for one of a user's profiles
+class RecommendationFeed(db.Document):
+    """Recommendation Feed Class"""
+    user_id = db.IntField(required=True)
+    profile_idx = db.IntField(required=True)
+    # Fingerprint of the profile fields the feed was computed from
+    profile_hash = db.StringField()
+    postings = db.ListField(db.DictField())
+    partial = db.BooleanField(default=False)
+    updated_at = db.DateTimeField()
+
+    meta = {
+        "collection": "recommendation_feeds",
+        "indexes": [{"fields": ["user_id", "profile_idx"], "unique": True}],
+    }
+
+
+# A job posting seen in search results, kept so later searches can be answered locally
+class JobPosting(db.Document):
+    """Job Posting Class"""
+    externalId = db.StringField(required=True, unique=True)
+    title = db.StringField()
+    company = db.StringField()
+    location = db.StringField()
+    type = db.StringField()
+    link = db.StringField()
+    # Case-folded copies used for prefix matching
+    company_key = db.StringField()
+    location_key = db.StringField()
+    first_seen = db.DateTimeField()
+    last_seen = db.DateTimeField()
+
+    meta = {
+        "collection": "job_postings",
+        "indexes": [
+            {
+                "fields": ["$title", "$company", "$location"],
+                "default_language": "english",
+                "weights": {"title": 10, "company": 3, "location": 1},
+            },
+            ("company_key", "-last_seen"),
+            ("location_key", "-last_seen"),
+            "-last_seen",
+        ],
+    }
+
+    # Replaces mongoengine's serializer with the search result shape, as Users.to_json does
+    def to_json(self):  # pylint: disable=arguments-differ
+        """Convert the posting to the shape returned by job searches"""
+        return {
+            "title": self.title,
+            "company": self.company,
+            "location": self.location,
+            "type": self.type,
+            "link": self.link,
+            "externalId": self.externalId,
+        }
+
+
+# A canonical skill, job level or location shared by every profile that uses it
+class VocabularyTerm(db.Document):
+    """Vocabulary Term Class"""
+    # "<kind>:<key>", e.g. "skill:python"
+    id = db.StringField(primary_key=True)
+    kind = db.StringField(required=True)
+    key = db.StringField(required=True)
+    # Spelling the term was first entered with
+    label = db.StringField()
+    # Other spellings (keys) that resolve to this term, e.g. "golang" for "skill:go"
+    aliases = db.ListField(db.StringField())
+    first_seen = db.DateTimeField()
+
+    meta = {"collection": "vocabulary", "indexes": [("kind", "key")]}
+
+
 def get_new_user_id():
     """Get the new user ID by checking the existing users in the database."""
     user_objects = Users.objects()
@@ -0,0 +1,76 @@
+"""
+This module keeps a local store of scraped job postings.
+
+Postings are deduplicated by externalId and indexed for full-text search, so
+searches overlapping ones already scraped can be answered without going to
+the live site.
+"""
+
+import re
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from db import get_collection
+from models import JobPosting
+from profiles import record_posting_terms
+
+POSTING_FIELDS = ("title", "company", "location", "type", "link")
+
+
+def _key(value):
+    """Normalizes a company or location for prefix matching"""
+    return " ".join((value or "").split()).casefold()
+
+
+def record_postings(postings, seen_at=None):
+    """
+    Upserts scraped postings into the store and adds their locations to the vocabulary
+
+    :param postings: posting dicts as returned by the scrapers
+    :param seen_at: time the postings were seen, defaults to now
+    :return: number of postings written
+    """
+    seen_at = seen_at or datetime.utcnow()
+    operations = []
+    for posting in postings:
+        external_id = posting.get("externalId")
+        if not external_id:
+            continue
+        fields = {field: posting.get(field) for field in POSTING_FIELDS}
+        fields["company_key"] = _key(posting.get("company"))
+        fields["location_key"] = _key(posting.get("location"))
+        fields["last_seen"] = seen_at
+        operations.append(UpdateOne(
+            {"externalId": external_id},
+            {"$set": fields, "$setOnInsert": {"first_seen": seen_at}},
+            upsert=True
+        ))
+    if operations:
+        get_collection(JobPosting).bulk_write(operations, ordered=False)
+        record_posting_terms(postings)
+    return len(operations)
+
+
+def find_postings(keywords, company, location, max_age, limit):
+    """
+    Searches the store for fresh postings matching a query
+
+    Every keyword must appear in the posting (full-text, stemmed); company and
+    location match case-insensitively by prefix. Newest postings come first.
+
+    :param keywords: search keywords
+    :param company: company filter
+    :param location: location filter
+    :param max_age: only postings seen within this many seconds are returned
+    :param limit: maximum number of postings
+    :return: list of posting dicts
+    """
+    query = JobPosting.objects(last_seen__gte=datetime.utcnow() - timedelta(seconds=max_age))
+    if _key(company):
+        query = query.filter(company_key=re.compile("^" + re.escape(_key(company))))
+    if _key(location):
+        query = query.filter(location_key=re.compile("^" + re.escape(_key(location))))
+    terms = keywords.replace('"', " ").split()
+    if terms:
+        # Quoting each term makes MongoDB require all of them instead of any
+        query = query.filter(__raw__={"$text": {"$search": " ".join(f'"{term}"' for term in terms)}})
+    return [posting.to_json() for posting in query.order_by("-last_seen").limit(limit)]
@@ -0,0 +1,330 @@
+"""
+This module keeps a shared vocabulary of the skills, job levels and locations
+used in profiles and job postings, and a per-user cache of profiles expressed
+in it.
+
+Terms are normalized to canonical keys (case-folded, whitespace collapsed,
+aliases resolved) with IDs such as "skill:python", so profiles can be
+compared with set operations and equivalent searches share cache keys. The
+vocabulary collection holds every term seen with the spelling it was first
+entered with and the aliases that resolve to it; DEFAULT_ALIASES seeds it.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+from config import config
+from db import get_collection
+from models import Users, VocabularyTerm
+
+# Profile field to vocabulary kind
+KINDS = {"skills": "skill", "job_levels": "job_level", "locations": "location"}
+
+# Aliases resolved even before the vocabulary is built; build-vocabulary stores them
+DEFAULT_ALIASES = {
+    "skill": {
+        "golang": "go", "js": "javascript", "ts": "typescript", "py": "python", "python3": "python",
+        "nodejs": "node.js", "node": "node.js", "reactjs": "react", "react.js": "react",
+        "k8s": "kubernetes", "ml": "machine learning",
+    },
+    "job_level": {"sr": "senior", "sr.": "senior", "jr": "junior", "jr.": "junior", "entry-level": "entry level"},
+    "location": {"nyc": "new york, ny", "sf": "san francisco, ca", "remote only": "remote"},
+}
+
+COMMA_RE = re.compile(r"\s*,\s*")
+# Work arrangement notes scraped with posting locations, e.g. "Raleigh, NC (Onsite)"
+LOCATION_NOTE_RE = re.compile(r"\s*\([^)]*\)\s*$")
+
+
+def term_key(text):
+    """Case-folds a term and collapses its whitespace, without resolving aliases"""
+    return " ".join(COMMA_RE.sub(", ", text or "").split()).casefold().strip(", ")
+
+
+def term_id(kind, key):
+    """Returns the vocabulary ID of a canonical key, e.g. skill:python"""
+    return f"{kind}:{key}"
+
+
+class Vocabulary:
+    """
+    Snapshot of the vocabulary collection
+
+    :param aliases: dict of (kind, alias key) to canonical key
+    :param known: set of term IDs already stored
+    :param expires_at: monotonic time after which the snapshot is reloaded
+    """
+
+    __slots__ = ("aliases", "known", "expires_at")
+
+    def __init__(self, aliases, known, expires_at):
+        self.aliases = aliases
+        self.known = known
+        self.expires_at = expires_at
+
+    def canonical(self, kind, key):
+        """Resolves an alias key to its canonical key"""
+        return self.aliases.get((kind, key), key)
+
+
+def load_vocabulary():
+    """
+    Reads the vocabulary collection, on top of DEFAULT_ALIASES
+
+    :return: Vocabulary
+    """
+    aliases = {(kind, alias): key for kind, table in DEFAULT_ALIASES.items() for alias, key in table.items()}
+    known = set()
+    try:
+        for term in VocabularyTerm.objects.only("kind", "key", "aliases").as_pymongo():
+            known.add(term["_id"])
+            for alias in term.get("aliases", []):
+                aliases[(term["kind"], alias)] = term["key"]
+    except PyMongoError as err:
+        print(f"Vocabulary could not be loaded, using the default aliases: {err}")
+    return Vocabulary(aliases, known, time.monotonic() + config["VOCABULARY_CACHE_TTL"])
+
+
+class VocabularyCache:
+    """Holds the process-wide vocabulary snapshot, reloading it every VOCABULARY_CACHE_TTL seconds"""
+
+    def __init__(self):
+        self._vocabulary = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Returns the current snapshot"""
+        with self._lock:
+            vocabulary = self._vocabulary
+        if vocabulary is None or vocabulary.expires_at <= time.monotonic():
+            vocabulary = load_vocabulary()
+            with self._lock:
+                self._vocabulary = vocabulary
+        return vocabulary
+
+    def invalidate(self):
+        """Drops the snapshot, so the next lookup reads the collection"""
+        with self._lock:
+            self._vocabulary = None
+
+
+_vocabulary_cache = VocabularyCache()
+
+
+def get_vocabulary():
+    """Returns the process-wide vocabulary snapshot"""
+    return _vocabulary_cache.get()
+
+
+def invalidate_vocabulary():
+    """Makes the next lookup read the vocabulary collection again, e.g. after aliases were added"""
+    _vocabulary_cache.invalidate()
+
+
+def normalize_term(kind, text):
+    """
+    Returns the canonical key of a term
+
+    :param kind: "skill", "job_level" or "location"
+    :param text: term as entered
+    :return: key string, empty if the term is blank
+    """
+    return get_vocabulary().canonical(kind, term_key(text))
+
+
+def profile_terms(profile):
+    """
+    Returns the canonical keys of a profile's terms
+
+    :param profile: Profile (or ProfileView)
+    :return: dict of profile field to tuple of keys, deduplicated in entered order
+    """
+    terms = {}
+    for field, kind in KINDS.items():
+        keys = (normalize_term(kind, text) for text in getattr(profile, field) or [])
+        terms[field] = tuple(dict.fromkeys(key for key in keys if key))
+    return terms
+
+
+def profile_term_ids(profile):
+    """
+    Returns the vocabulary IDs of a profile's terms
+
+    :param profile: Profile (or ProfileView)
+    :return: dict of kind to tuple of term IDs, in entered order
+    """
+    return {KINDS[field]: tuple(term_id(KINDS[field], key) for key in keys)
+            for field, keys in profile_terms(profile).items()}
+
+
+def _record(entries):
+    """
+    Adds terms missing from the vocabulary
+
+    Only terms the current snapshot does not know are written, so saving a
+    profile or postings made of known terms costs no database write.
+
+    :param entries: iterable of (kind, text as entered)
+    :return: number of terms written
+    """
+    vocabulary = get_vocabulary()
+    now = datetime.utcnow()
+    operations = {}
+    for kind, text in entries:
+        key = normalize_term(kind, text)
+        tid = term_id(kind, key)
+        if key and tid not in vocabulary.known and tid not in operations:
+            label = " ".join(text.split())
+            operations[tid] = UpdateOne(
+                {"_id": tid},
+                {"$setOnInsert": {"kind": kind, "key": key, "label": label, "aliases": [], "first_seen": now}},
+                upsert=True
+            )
+    if operations:
+        get_collection(VocabularyTerm).bulk_write(list(operations.values()), ordered=False)
+        vocabulary.known.update(operations)
+    return len(operations)
+
+
+def record_terms(profiles):
+    """
+    Adds the terms of profiles to the vocabulary
+
+    :param profiles: Profiles whose terms to record
+    :return: number of terms written
+    """
+    return _record(
+        (kind, text) for profile in profiles for field, kind in KINDS.items() for text in getattr(profile, field) or []
+    )
+
+
+def record_posting_terms(postings):
+    """
+    Adds the locations of job postings to the vocabulary
+
+    :param postings: posting dicts
+    :return: number of terms written
+    """
+    return _record(
+        ("location", LOCATION_NOTE_RE.sub("", posting["location"]))
+        for posting in postings if posting.get("location")
+    )
+
+
+def seed_aliases(aliases=None):
+    """
+    Stores aliases on the canonical terms they resolve to
+
+    :param aliases: dict of kind to dict of alias to canonical term, defaults to DEFAULT_ALIASES
+    :return: number of canonical terms written
+    """
+    now = datetime.utcnow()
+    by_term = {}
+    for kind, table in (DEFAULT_ALIASES if aliases is None else aliases).items():
+        for alias, canonical in table.items():
+            key = term_key(canonical)
+            by_term.setdefault((kind, key, canonical), []).append(term_key(alias))
+    operations = [
+        UpdateOne(
+            {"_id": term_id(kind, key)},
+            {"$setOnInsert": {"kind": kind, "key": key, "label": label, "first_seen": now},
+             "$addToSet": {"aliases": {"$each": keys}}},
+            upsert=True
+        )
+        for (kind, key, label), keys in by_term.items()
+    ]
+    if operations:
+        get_collection(VocabularyTerm).bulk_write(operations, ordered=False)
+    invalidate_vocabulary()
+    return len(operations)
+
+
+class ProfileView:
+    """
+    Read-only view of a profile in vocabulary terms
+
+    skills, job_levels and locations hold canonical keys, so a view can be
+    used wherever recommendations take a Profile; the *_ids attributes are
+    frozensets of term IDs.
+    """
+
+    __slots__ = (
+        "profile_idx", "profileName", "skills", "job_levels", "locations",
+        "skill_ids", "job_level_ids", "location_ids", "term_ids"
+    )
+
+    def __init__(self, profile_idx, profile):
+        self.profile_idx = profile_idx
+        self.profileName = profile.profileName
+        for field, keys in profile_terms(profile).items():
+            kind = KINDS[field]
+            setattr(self, field, keys)
+            setattr(self, f"{kind}_ids", frozenset(term_id(kind, key) for key in keys))
+        self.term_ids = self.skill_ids | self.job_level_ids | self.location_ids
+
+
+class UserProfiles:
+    """A user's profile views and default profile index"""
+
+    __slots__ = ("default_profile", "views", "expires_at")
+
+    def __init__(self, default_profile, views, expires_at):
+        self.default_profile = default_profile
+        self.views = views
+        self.expires_at = expires_at
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_user_profiles(user_id):
+    """
+    Returns a user's profiles as views, from the cache when possible
+
+    Only the profiles and default profile are loaded, never the rest of the
+    user. Entries are dropped by invalidate_user_profiles when a profile
+    changes and expire after PROFILE_CACHE_TTL seconds, which bounds how long
+    other processes' edits go unseen.
+
+    :param user_id: user ID
+    :return: UserProfiles, or None if there is no such user
+    """
+    user_id = int(user_id)
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(user_id)
+        if entry is not None and entry.expires_at > now:
+            _cache.move_to_end(user_id)
+            return entry
+
+    user = Users.objects(id=user_id).only("profiles", "default_profile").first()
+    if user is None:
+        return None
+    entry = UserProfiles(
+        user.default_profile,
+        tuple(ProfileView(idx, profile) for idx, profile in enumerate(user.profiles)),
+        now + config["PROFILE_CACHE_TTL"]
+    )
+    with _cache_lock:
+        _cache[user_id] = entry
+        _cache.move_to_end(user_id)
+        while len(_cache) > config["PROFILE_CACHE_SIZE"]:
+            _cache.popitem(last=False)
+    return entry
+
+
+def invalidate_user_profiles(user_id):
+    """Drops a user's cached profile views"""
+    with _cache_lock:
+        _cache.pop(int(user_id), None)
+
+
+def clear_profile_cache():
+    """Drops every cached profile view"""
+    with _cache_lock:
+        _cache.clear()
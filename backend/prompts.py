@@ -0,0 +1,314 @@
+"""
+This module builds token-budgeted LLM prompts from extracted resume text.
+"""
+
+import math
+import re
+from config import config
+
+PAGE_BREAK = "[PAGE BREAK]"
+
+# Rough average for English text on BPE tokenizers; errs on the side of over-counting
+CHARS_PER_TOKEN = 4
+
+# Lower numbers are kept first when a resume has to be truncated
+SECTION_PRIORITY = {
+    "header": 0,
+    "summary": 1,
+    "experience": 1,
+    "skills": 2,
+    "education": 2,
+    "projects": 3,
+    "certifications": 4,
+    "awards": 5,
+    "publications": 5,
+    "leadership": 5,
+    "volunteer": 6,
+    "interests": 7,
+    "references": 8,
+}
+
+SECTION_ALIASES = {
+    "summary": ("summary", "profile", "objective", "about me"),
+    "experience": ("experience", "employment", "work history", "professional experience"),
+    "skills": ("skills", "technical skills", "technologies", "competencies"),
+    "education": ("education", "academic"),
+    "projects": ("projects", "project experience"),
+    "certifications": ("certifications", "certificates", "licenses"),
+    "awards": ("awards", "honors", "achievements"),
+    "publications": ("publications", "research"),
+    "leadership": ("leadership", "activities", "extracurricular"),
+    "volunteer": ("volunteer", "volunteering", "community"),
+    "interests": ("interests", "hobbies"),
+    "references": ("references",),
+}
+
+DEFAULT_PRIORITY = 4
+
+
+def _page_boundaries(lines):
+    """Returns the first and last non-blank lines of a page"""
+    content = [line for line in lines if line]
+    return {content[0].casefold(), content[-1].casefold()} if content else set()
+
+
+def normalize_text(text):
+    """
+    Normalizes extracted PDF text before it is sent to a model
+
+    Drops page break markers, collapses runs of whitespace and squeezes blank
+    lines. A line that starts or ends more than one page (a running header or
+    footer) is kept only where it first appears; repeated lines elsewhere,
+    such as a second job with the same title, are left alone.
+
+    :param text: raw extracted text
+    :return: normalized text
+    """
+    pages = [
+        [re.sub(r"\s+", " ", line).strip() for line in page.splitlines()]
+        for page in text.split(PAGE_BREAK)
+    ]
+    boundaries = [_page_boundaries(page) for page in pages]
+    running = {key for key in set().union(*boundaries) if sum(key in keys for keys in boundaries) > 1}
+
+    lines = []
+    seen = set()
+    for page, keys in zip(pages, boundaries):
+        for line in page:
+            if not line:
+                if lines and lines[-1]:
+                    lines.append("")
+                continue
+            key = line.casefold()
+            if key in keys and key in running:
+                if key in seen:
+                    continue
+                seen.add(key)
+            lines.append(line)
+        if lines and lines[-1]:
+            lines.append("")
+    return "\n".join(lines).strip()
+
+
+def estimate_tokens(text):
+    """
+    Estimates the number of tokens the model will see for a piece of text
+
+    :param text: text to measure
+    :return: estimated token count
+    """
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / CHARS_PER_TOKEN), len(text.split()))
+
+
+def _section_name(line):
+    """Returns the canonical section name if the line looks like a heading"""
+    if len(line) > 40:
+        return None
+    heading = line.rstrip(":").strip().casefold()
+    for name, aliases in SECTION_ALIASES.items():
+        if heading in aliases:
+            return name
+    if line.isupper() and len(line.split()) <= 4:
+        for name, aliases in SECTION_ALIASES.items():
+            if any(alias in heading for alias in aliases):
+                return name
+    return None
+
+
+def split_sections(text):
+    """
+    Splits resume text into (section name, text) pairs in document order
+
+    Anything before the first recognized heading is treated as the header
+    (name and contact details).
+
+    :param text: normalized resume text
+    :return: list of (name, text) tuples
+    """
+    sections = []
+    name, current = "header", []
+    for line in text.splitlines():
+        heading = _section_name(line)
+        if heading is not None:
+            if current:
+                sections.append((name, "\n".join(current).strip()))
+            name, current = heading, [line]
+        else:
+            current.append(line)
+    if current:
+        sections.append((name, "\n".join(current).strip()))
+    return [(name, body) for name, body in sections if body]
+
+
+def truncate_to_tokens(text, budget):
+    """
+    Cuts text down to roughly the given token budget on a line boundary
+
+    :param text: text to cut
+    :param budget: maximum number of tokens
+    :return: truncated text
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    if budget <= 0:
+        return ""
+    kept = []
+    used = 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            remaining = (budget - used) * CHARS_PER_TOKEN
+            if remaining > 20 and not kept:
+                kept.append(line[:remaining])
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+def truncate_by_priority(text, budget):
+    """
+    Fits resume text into a token budget by dropping low priority sections
+
+    Sections are admitted whole in priority order while they fit, the most
+    important section that did not fit is cut on a line boundary to fill the
+    remainder, and the survivors are emitted in their original order.
+
+    :param text: normalized resume text
+    :param budget: maximum number of tokens
+    :return: text within the budget
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+
+    sections = split_sections(text)
+    order = sorted(
+        range(len(sections)),
+        key=lambda i: (SECTION_PRIORITY.get(sections[i][0], DEFAULT_PRIORITY), i)
+    )
+
+    kept = {}
+    skipped = []
+    remaining = budget
+    for idx in order:
+        body = sections[idx][1]
+        cost = estimate_tokens(body) + 1
+        if cost <= remaining:
+            kept[idx] = body
+            remaining -= cost
+        else:
+            skipped.append(idx)
+
+    # Spend what is left on the most important section that did not fit whole
+    if skipped and remaining > 1:
+        partial = truncate_to_tokens(sections[skipped[0]][1], remaining - 1)
+        if partial:
+            kept[skipped[0]] = partial
+
+    return "\n\n".join(kept[idx] for idx in sorted(kept))
+
+
+def chunk_text(text, chunk_tokens):
+    """
+    Splits text into chunks of at most chunk_tokens, preferring paragraph boundaries
+
+    :param text: text to split
+    :param chunk_tokens: maximum tokens per chunk
+    :return: list of chunks
+    """
+    chunks = []
+    current, used = [], 0
+    for paragraph in text.split("\n\n"):
+        for piece in _split_oversized(paragraph, chunk_tokens):
+            cost = estimate_tokens(piece) + 1
+            if current and used + cost > chunk_tokens:
+                chunks.append("\n\n".join(current))
+                current, used = [], 0
+            current.append(piece)
+            used += cost
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _split_oversized(paragraph, chunk_tokens):
+    """Breaks a single paragraph that is larger than a chunk into line groups"""
+    if estimate_tokens(paragraph) <= chunk_tokens:
+        return [paragraph]
+    pieces, current, used = [], [], 0
+    for line in paragraph.splitlines():
+        cost = estimate_tokens(line) + 1
+        if current and used + cost > chunk_tokens:
+            pieces.append("\n".join(current))
+            current, used = [], 0
+        current.append(truncate_to_tokens(line, chunk_tokens))
+        used += cost
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def summarize_to_budget(text, budget, summarize, max_rounds=3):
+    """
+    Map-reduce summarization of an oversized document
+
+    The text is split into chunks, each chunk is summarized independently and
+    the summaries are joined; this repeats until the result fits the budget or
+    max_rounds is reached, after which it is truncated by priority.
+
+    :param text: normalized text
+    :param budget: maximum number of tokens
+    :param summarize: callable taking a chunk of text and returning its summary
+    :param max_rounds: maximum number of map-reduce passes
+    :return: text within the budget
+    """
+    for _ in range(max_rounds):
+        if estimate_tokens(text) <= budget:
+            return text
+        chunk_tokens = max(budget, config["PROMPT_CHUNK_TOKENS"])
+        summaries = [summarize(chunk).strip() for chunk in chunk_text(text, chunk_tokens)]
+        reduced = "\n\n".join(summary for summary in summaries if summary)
+        if estimate_tokens(reduced) >= estimate_tokens(text):
+            break
+        text = reduced
+    return truncate_by_priority(text, budget)
+
+
+def fit_document(text, budget, summarize=None, strategy=None):
+    """
+    Normalizes a document and fits it into a token budget
+
+    :param text: raw document text
+    :param budget: maximum number of tokens for the document
+    :param summarize: optional summarizer used by the "summarize" strategy
+    :param strategy: "truncate" or "summarize", defaults to PROMPT_STRATEGY
+    :return: text within the budget
+    """
+    text = normalize_text(text)
+    if estimate_tokens(text) <= budget:
+        return text
+    strategy = strategy or config["PROMPT_STRATEGY"]
+    if strategy == "summarize" and summarize is not None:
+        return summarize_to_budget(text, budget, summarize)
+    return truncate_by_priority(text, budget)
+
+
+def build_prompt(head, document, tail="", budget=None, summarize=None):
+    """
+    Builds a prompt of the form head + document + tail within a token budget
+
+    The instructions in head and tail are always kept whole; the document gets
+    whatever budget is left over.
+
+    :param head: text placed before the document
+    :param document: raw document text to fit
+    :param tail: text placed after the document
+    :param budget: total token budget, defaults to PROMPT_TOKEN_BUDGET
+    :param summarize: optional summarizer for oversized documents, used with PROMPT_STRATEGY "summarize"
+    :return: prompt string
+    """
+    budget = budget if budget is not None else config["PROMPT_TOKEN_BUDGET"]
+    document_budget = max(budget - estimate_tokens(head) - estimate_tokens(tail), 0)
+    return head + fit_document(document, document_budget, summarize) + tail
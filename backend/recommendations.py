@@ -0,0 +1,237 @@
+"""
+This module builds job recommendations for a profile by fanning searches out
+across its skills, job levels and locations, and keeps precomputed feeds of
+them up to date.
+"""
+
+import hashlib
+import itertools
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from config import config
+from models import RecommendationFeed, Users
+from profiles import profile_term_ids, profile_terms
+from scoring import rank_postings
+from scraping.parsers import posting_key
+from shared import Shared
+
+_executor = Shared(lambda: ThreadPoolExecutor(
+    max_workers=config["RECOMMENDATION_WORKERS"],
+    thread_name_prefix="recommendations"
+))
+
+
+def get_executor():
+    """Returns the shared pool that runs recommendation searches"""
+    return _executor.get()
+
+
+def build_queries(profile, max_queries=None):
+    """
+    Builds the searches to run for a profile
+
+    Every skill is combined with every location (and job level, if any).
+    Combinations are ordered breadth first, so a cap keeps a spread of skills
+    and locations instead of every location for the first skill. Terms are
+    searched by their canonical vocabulary keys, so profiles spelling a term
+    differently share cached searches.
+
+    :param profile: Profile (or ProfileView) with skills, job_levels and locations
+    :param max_queries: maximum number of searches, defaults to RECOMMENDATION_MAX_QUERIES
+    :return: list of (keywords, location) tuples
+    """
+    max_queries = config["RECOMMENDATION_MAX_QUERIES"] if max_queries is None else max_queries
+    terms = profile_terms(profile)
+    skills, locations = terms["skills"], terms["locations"]
+    levels = terms["job_levels"] or ("",)
+
+    combos = sorted(
+        itertools.product(range(len(skills)), range(len(locations)), range(len(levels))),
+        key=lambda idx: (max(idx), sum(idx))
+    )
+    return [
+        (f"{skills[s]} {levels[j]}".strip(), locations[l])
+        for s, l, j in combos[:max_queries]
+    ]
+
+
+def fan_out(queries, search, budget=None):
+    """
+    Runs searches in parallel on the shared pool within a time budget
+
+    Searches still queued when the budget runs out are cancelled; ones already
+    running are left to finish in the background (their results still land in
+    the search cache).
+
+    :param queries: list of (keywords, location) tuples
+    :param search: callable taking (keywords, company, location)
+    :param budget: seconds to wait in total, defaults to RECOMMENDATION_TIME_BUDGET
+    :return: tuple of (list of result lists in query order, True if any search was cut off)
+    """
+    budget = config["RECOMMENDATION_TIME_BUDGET"] if budget is None else budget
+    deadline = time.monotonic() + budget
+    executor = get_executor()
+    futures = [executor.submit(search, keywords, "", location) for keywords, location in queries]
+
+    pending = set(futures)
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        _, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+    for future in pending:
+        future.cancel()
+
+    results = []
+    for (keywords, location), future in zip(queries, futures):
+        if future in pending:
+            continue
+        try:
+            results.append(future.result())
+        except Exception as err:
+            print(f"Recommendation search for {keywords!r} in {location!r} failed: {err}")
+    return results, bool(pending)
+
+
+def score_postings(postings, profile):
+    """
+    Ranks postings by TF-IDF relevance to a profile, adding the relevance as "score"
+
+    :param postings: list of posting dicts
+    :param profile: Profile to rank for
+    :return: ranked copies of the postings, so postings shared with the search cache are not modified
+    """
+    return [dict(posting, score=round(score, 4)) for posting, score in rank_postings(postings, profile)]
+
+
+def recommend(profile, search, budget=None):
+    """
+    Recommends postings for a profile
+
+    Results of every search are merged, deduplicated by externalId and ranked
+    by TF-IDF relevance to the profile, ties going to postings that more
+    searches returned. Each posting gets its relevance as "score".
+
+    :param profile: Profile to recommend for
+    :param search: callable taking (keywords, company, location)
+    :param budget: seconds to wait in total, defaults to RECOMMENDATION_TIME_BUDGET
+    :return: tuple of (ranked postings, True if the results are partial)
+    """
+    result_lists, partial = fan_out(build_queries(profile), search, budget)
+
+    merged = {}
+    hits = {}
+    for postings in result_lists:
+        for posting in postings:
+            key = posting_key(posting)
+            merged.setdefault(key, posting)
+            hits[key] = hits.get(key, 0) + 1
+
+    by_hits = sorted(merged, key=lambda key: hits[key], reverse=True)
+    return score_postings([merged[key] for key in by_hits], profile), partial
+
+
+def profile_fingerprint(profile):
+    """
+    Fingerprints the profile fields recommendations are computed from
+
+    Terms are fingerprinted by their vocabulary IDs, so respelling a term
+    (or using one of its aliases) does not invalidate a feed.
+
+    :param profile: Profile to fingerprint
+    :return: hex SHA-256 digest
+    """
+    ids = profile_term_ids(profile)
+    fields = [list(ids["skill"]), list(ids["job_level"]), list(ids["location"])]
+    return hashlib.sha256(json.dumps(fields).encode("utf-8")).hexdigest()
+
+
+def get_feed(user_id, profile_idx, profile):
+    """
+    Returns the precomputed feed for a profile if it matches the profile's current fields
+
+    :param user_id: id of the owning user
+    :param profile_idx: index of the profile in the user's profiles
+    :param profile: the profile itself
+    :return: RecommendationFeed, or None
+    """
+    return RecommendationFeed.objects(
+        user_id=user_id, profile_idx=profile_idx, profile_hash=profile_fingerprint(profile)
+    ).first()
+
+
+def feed_expired(feed, max_age=None):
+    """
+    Tells whether a feed is too old to be served
+
+    :param feed: RecommendationFeed
+    :param max_age: seconds a feed is served for, defaults to RECOMMENDATION_FEED_MAX_AGE
+    :return: True if the feed must be recomputed
+    """
+    max_age = config["RECOMMENDATION_FEED_MAX_AGE"] if max_age is None else max_age
+    return feed.updated_at is None or feed.updated_at <= datetime.utcnow() - timedelta(seconds=max_age)
+
+
+def store_feed(user_id, profile_idx, profile, postings, partial):
+    """
+    Saves the recommendations computed for a profile as its feed
+
+    :param user_id: id of the owning user
+    :param profile_idx: index of the profile in the user's profiles
+    :param profile: the profile the postings were recommended for
+    :param postings: ranked postings
+    :param partial: True if some searches were cut off
+    """
+    RecommendationFeed.objects(user_id=user_id, profile_idx=profile_idx).update_one(
+        upsert=True,
+        set__profile_hash=profile_fingerprint(profile),
+        set__postings=postings,
+        set__partial=partial,
+        set__updated_at=datetime.utcnow()
+    )
+
+
+def refresh_feeds(search, max_age=None, budget=None, stop=None):
+    """
+    Recomputes stored recommendation feeds
+
+    Only profiles whose skills, job levels or locations changed since their
+    feed was computed, or whose feed is partial or older than max_age, are
+    recomputed.
+    Feeds of removed or emptied profiles are deleted.
+
+    :param search: callable taking (keywords, company, location)
+    :param max_age: seconds after which an unchanged feed is recomputed anyway,
+        defaults to RECOMMENDATION_FEED_MAX_AGE
+    :param budget: per-profile time budget, defaults to RECOMMENDATION_TIME_BUDGET
+    :param stop: threading.Event; once set, the refresh ends after the profile in progress
+    :return: tuple of (feeds refreshed, feeds left as they were)
+    """
+    refreshed = skipped = 0
+
+    for user in Users.objects(__raw__={"profiles.0": {"$exists": True}}).only("id", "profiles"):
+        feeds = {feed.profile_idx: feed for feed in RecommendationFeed.objects(user_id=user.id).only(
+            "profile_idx", "profile_hash", "partial", "updated_at")}
+
+        for idx, profile in enumerate(user.profiles):
+            if stop is not None and stop.is_set():
+                return refreshed, skipped
+            if not profile.skills or not profile.locations:
+                continue
+            feed = feeds.pop(idx, None)
+            if (feed is not None and feed.profile_hash == profile_fingerprint(profile)
+                    and not feed.partial and not feed_expired(feed, max_age)):
+                skipped += 1
+                continue
+
+            postings, partial = recommend(profile, search, budget)
+            store_feed(user.id, idx, profile, postings, partial)
+            refreshed += 1
+
+        # Whatever is left belongs to profiles that were removed or emptied
+        if feeds:
+            RecommendationFeed.objects(user_id=user.id, profile_idx__in=list(feeds)).delete()
+
+    return refreshed, skipped
@@ -0,0 +1,166 @@
+"""
+This module manages the GridFS blobs behind stored resumes.
+
+Blobs are content addressed by SHA-256 and reference counted, so identical
+uploads can share one stored file.
+"""
+
+import hashlib
+from io import BytesIO
+from pymongo import ReturnDocument
+from mongoengine.connection import get_db
+from blob_compression import compress_stream, decompress_bytes
+from config import config
+from models import Users
+
+HASH_CHUNK_SIZE = 256 * 1024
+
+
+def _files():
+    """Returns the GridFS files collection"""
+    return get_db()["fs.files"]
+
+
+def _chunks():
+    """Returns the GridFS chunks collection"""
+    return get_db()["fs.chunks"]
+
+
+def hash_upload(file):
+    """
+    Hashes an uploaded file in chunks and rewinds it
+
+    :param file: uploaded file-like object
+    :return: tuple of (hex SHA-256 digest, size in bytes)
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+        sha256.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    return sha256.hexdigest(), size
+
+
+def find_duplicate(user, sha256, share_across_users=False):
+    """
+    Finds an existing resume with the same content
+
+    The uploading user's own resumes are checked first; other users' resumes
+    are only considered when blob sharing is enabled.
+
+    :param user: uploading user
+    :param sha256: digest of the upload
+    :param share_across_users: whether other users' resumes may be reused
+    :return: tuple of (owning user, resume index), or None
+    """
+    for idx, meta in enumerate(user.resumeMeta):
+        if meta.sha256 == sha256:
+            return user, idx
+
+    if share_across_users:
+        owner = Users.objects(resumeMeta__sha256=sha256, id__ne=user.id) \
+            .only("id", "resumeMeta", "resumeFeedbacks").first()
+        if owner is not None:
+            for idx, meta in enumerate(owner.resumeMeta):
+                if meta.sha256 == sha256:
+                    return owner, idx
+    return None
+
+
+def retain_blob(file_id):
+    """
+    Adds a reference to a stored blob
+
+    Blobs stored before reference counting started are counted as having
+    one reference.
+
+    :param file_id: GridFS file id
+    :return: True if the blob still exists and was retained
+    """
+    result = _files().update_one(
+        {"_id": file_id},
+        [{"$set": {"refs": {"$add": [{"$ifNull": ["$refs", 1]}, 1]}}}]
+    )
+    return result.matched_count == 1
+
+
+def release_blob(file_id):
+    """
+    Drops a reference to a stored blob, deleting it with its chunks at zero
+
+    The file document is only removed by a delete conditioned on its count
+    still being zero, so a retain_blob racing this call keeps the blob. A
+    blob without a file document is left alone.
+
+    :param file_id: GridFS file id
+    :return: True if the blob was deleted
+    """
+    doc = _files().find_one_and_update(
+        {"_id": file_id},
+        [{"$set": {"refs": {"$subtract": [{"$ifNull": ["$refs", 1]}, 1]}}}],
+        projection={"refs": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if doc is None or doc["refs"] > 0:
+        return False
+    if _files().delete_one({"_id": file_id, "refs": {"$lte": 0}}).deleted_count != 1:
+        return False
+    _chunks().delete_many({"files_id": file_id})
+    return True
+
+
+def store_blob(proxy, file, filename, sha256, size):
+    """
+    Stores an upload in GridFS through a FileField proxy
+
+    With COMPRESS_RESUME_BLOBS the bytes are zstd compressed on the way in and
+    the file is marked so open_blob can restore it.
+
+    :param proxy: empty GridFSProxy to store into
+    :param file: uploaded file-like object, positioned at the start
+    :param filename: original filename
+    :param sha256: digest of the uncompressed upload
+    :param size: size of the uncompressed upload
+    """
+    extra = {}
+    if config["COMPRESS_RESUME_BLOBS"]:
+        file = compress_stream(file, size)
+        extra = {"compression": "zstd", "uncompressedLength": size}
+    proxy.put(
+        file,
+        filename=filename,
+        content_type="application/pdf",
+        sha256=sha256,
+        refs=1,
+        **extra
+    )
+
+
+def blob_length(grid_out):
+    """
+    Returns the original size of a stored blob
+
+    :param grid_out: GridOut of the stored file
+    :return: uncompressed size in bytes
+    """
+    if getattr(grid_out, "compression", None) == "zstd":
+        return grid_out.uncompressedLength
+    return grid_out.length
+
+
+def open_blob(grid_out):
+    """
+    Opens a stored blob for reading its original bytes
+
+    Uncompressed blobs are returned as is so they can be read lazily;
+    compressed ones are decompressed into memory.
+
+    :param grid_out: GridOut of the stored file
+    :return: seekable file-like object
+    """
+    if getattr(grid_out, "compression", None) == "zstd":
+        grid_out.seek(0)
+        return BytesIO(decompress_bytes(grid_out.read()))
+    return grid_out
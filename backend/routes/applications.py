@@ -2,10 +2,10 @@
 This module contains the routes for managing applications.
 """
 
-import json
 from datetime import datetime
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify
 from models import Users, get_new_application_id
+from schemas import ApplicationRequest, ApplicationUpdateRequest, validate_body
 from utils import get_userid_from_header
 
 applications_bp = Blueprint("applications", __name__)
@@ -28,7 +28,8 @@ def get_data():
 
 
 @applications_bp.route("/applications", methods=["POST"])
-def add_application():
+@validate_body(ApplicationRequest)
+def add_application(body):
     """
     Add a new job application for the user
 
@@ -36,35 +37,30 @@ def add_application():
     """
     try:
         userid = get_userid_from_header()
-        request_data = json.loads(request.data)["application"]
-        try:
-            assert "title" in request_data
-            assert "company" in request_data
-        except:
-            return jsonify({"error": "Missing fields in input"}), 400
-
         user = Users.objects(id=userid).first()
+        new_application = body.application
         current_application = {
             "id": get_new_application_id(userid),
-            "title": request_data["title"],
-            "company": request_data["company"],
-            "link": request_data.get("link"),
-            "location": request_data.get("location"),
-            "type": request_data.get("type"),
-            "status": request_data.get("status", "1"),
+            "title": new_application.title,
+            "company": new_application.company,
+            "link": new_application.link,
+            "location": new_application.location,
+            "type": new_application.type,
+            "status": new_application.status,
             "date": datetime.now().strftime("%m/%d/%Y"),
-            "externalId": request_data.get("externalId"),
+            "externalId": new_application.externalId,
         }
         applications = user["applications"] + [current_application]
         user.update(applications=applications)
         return jsonify(current_application), 200
-    except json.JSONDecodeError as err:
+    except KeyError as err:
         print(err)
         return jsonify({"error": "Internal server error"}), 500
 
 
 @applications_bp.route("/applications/<int:application_id>", methods=["PUT"])
-def update_application(application_id):
+@validate_body(ApplicationUpdateRequest)
+def update_application(application_id, body):
     """
     Updates the existing job application for the user
 
@@ -73,7 +69,8 @@ def update_application(application_id):
     """
     try:
         userid = get_userid_from_header()
-        request_data = json.loads(request.data)["application"]
+        # Only the posted fields are changed, and never the id
+        changes = body.application.model_dump(exclude_unset=True, exclude={"id"})
         user = Users.objects(id=userid).first()
         current_applications = user["applications"]
 
@@ -87,7 +84,7 @@ def update_application(application_id):
                 if application["id"] == application_id:
                     app_to_update = application
                     application_updated_flag = True
-                    for key, value in request_data.items():
+                    for key, value in changes.items():
                         application[key] = value
                 updated_applications += [application]
             if not application_updated_flag:
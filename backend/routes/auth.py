@@ -3,12 +3,12 @@ This module contains the routes for user authentication.
 """
 import hashlib
 import uuid
-import json
 from datetime import datetime, timedelta
-from flask import Blueprint, jsonify, request, redirect, url_for, session
+from flask import Blueprint, jsonify, redirect, url_for, session
 from authlib.common.security import generate_token
 from models import Users, get_new_user_id, Profile
 from config import config
+from schemas import LoginRequest, SignupRequest, validate_body
 from utils import get_token_from_header, get_userid_from_header
 
 auth_bp = Blueprint("auth", __name__)
@@ -84,31 +84,23 @@ def authorized_google():
 
 
 @auth_bp.route("/users/signup", methods=["POST"])
-def sign_up():
+@validate_body(SignupRequest)
+def sign_up(body):
     """
     Creates a new user profile and adds the user to the database and returns the message
 
     :return: JSON object
     """
     try:
-        data = json.loads(request.data)
-        try:
-            assert "username" in data
-            assert "password" in data
-            assert "fullName" in data
-        except:
-            return jsonify({"error": "Missing fields in input"}), 400
-
-        username_exists = Users.objects(username=data["username"])
+        username_exists = Users.objects(username=body.username)
         if len(username_exists) != 0:
             return jsonify({"error": "Username already exists"}), 400
 
-        password = data["password"]
-        password_hash = hashlib.md5(password.encode())
+        password_hash = hashlib.md5(body.password.encode())
 
         # Create an empty default profile
         default_profile = Profile(
-            profileName=f"{data['fullName']}'s Default",
+            profileName=f"{body.fullName}'s Default",
             skills=[],
             job_levels=[],
             locations=[],
@@ -118,8 +110,8 @@ def sign_up():
         )
         user = Users(
             id=get_new_user_id(),
-            fullName=data["fullName"],
-            username=data["username"],
+            fullName=body.fullName,
+            username=body.username,
             password=password_hash.hexdigest(),
             authTokens=[],
             applications=[],
@@ -137,22 +129,16 @@ def sign_up():
 
 
 @auth_bp.route("/users/login", methods=["POST"])
-def login():
+@validate_body(LoginRequest)
+def login(body):
     """
     Logs in the user and creates a new authorization token and stores in the database
 
     :return: JSON object with status and message
     """
     try:
-        data = json.loads(request.data)
-        try:
-            assert "username" in data
-            assert "password" in data
-        except:
-            return jsonify({"error": "Username or password missing"}), 400
-
-        password_hash = hashlib.md5(data["password"].encode()).hexdigest()
-        user = Users.objects(username=data["username"], password=password_hash).first()
+        password_hash = hashlib.md5(body.password.encode()).hexdigest()
+        user = Users.objects(username=body.username, password=password_hash).first()
 
         if user is None:
             return jsonify({"error": "Wrong username or password"}), 400
@@ -178,7 +164,7 @@ def login():
 
         return jsonify({"profile": profileInfo, "token": token, "expiry": expiry_str})
 
-    except json.JSONDecodeError as err:
+    except KeyError as err:
         print(err)
         return jsonify({"error": "Internal server error"}), 500
 
@@ -2,26 +2,25 @@
 This module contains the routes for managing user coverletters.
 """
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify
 from models import Users
+from schemas import CoverLetterRequest, validate_body
 from utils import get_userid_from_header
+from blob_compression import pack_text, unpack_text
 
 coverletter_bp = Blueprint("coverletter", __name__)
 
 @coverletter_bp.route("/coverletters", methods=["POST"])
-def create_coverletter():
+@validate_body(CoverLetterRequest)
+def create_coverletter(body):
     """
     Creates a new cover letter for the user.
     """
     try:
         userid = get_userid_from_header()
         user = Users.objects(id=userid).first()
-        data = request.json
-
-        if not data or "content" not in data:
-            return jsonify({"error": "Cover letter content is required"}), 400
-
-        coverletter = {"content": data["content"], "title": data.get("title", "Untitled")}
+        title = body.title if "title" in body.model_fields_set else "Untitled"
+        coverletter = {"content": pack_text(body.content), "title": title}
         user.coverletters.append(coverletter)
         user.save()
 
@@ -61,30 +60,31 @@ def get_coverletter(coverletter_idx):
         if coverletter_idx >= len(user.coverletters):
             return jsonify({"error": "Cover letter not found"}), 404
 
-        return jsonify({"coverletter": user.coverletters[coverletter_idx]}), 200
+        coverletter = user.coverletters[coverletter_idx]
+        if isinstance(coverletter, dict) and "content" in coverletter:
+            coverletter = {**coverletter, "content": unpack_text(coverletter["content"])}
+        return jsonify({"coverletter": coverletter}), 200
     except KeyError as e:
         print(e)
         return jsonify({"error": "Internal server error"}), 500
 
 
 @coverletter_bp.route("/coverletters/<int:coverletter_idx>", methods=["PUT"])
-def update_coverletter(coverletter_idx):
+@validate_body(CoverLetterRequest)
+def update_coverletter(coverletter_idx, body):
     """
     Updates a specific cover letter by index.
     """
     try:
         userid = get_userid_from_header()
         user = Users.objects(id=userid).first()
-        data = request.json
 
         if coverletter_idx >= len(user.coverletters):
             return jsonify({"error": "Cover letter not found"}), 404
 
-        if not data or "content" not in data:
-            return jsonify({"error": "Cover letter content is required"}), 400
-
-        user.coverletters[coverletter_idx]["content"] = data["content"]
-        user.coverletters[coverletter_idx]["title"] = data.get("title", user.coverletters[coverletter_idx]["title"])
+        user.coverletters[coverletter_idx]["content"] = pack_text(body.content)
+        if "title" in body.model_fields_set:
+            user.coverletters[coverletter_idx]["title"] = body.title
         user.save()
 
         return jsonify({"message": "Cover letter updated successfully"}), 200
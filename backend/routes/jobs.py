@@ -2,70 +2,145 @@
 This module contains the routes for the job searching functionality.
 """
 
+import json
 import random
-from flask import Blueprint, jsonify, request
-from models import Users
+from pymongo.errors import PyMongoError
+from flask import Blueprint, Response, jsonify, request
 from utils import get_userid_from_header
 from config import config
-from fake_useragent import UserAgent
-
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
+from postings_store import find_postings, record_postings
+from profiles import get_user_profiles
+from recommendations import feed_expired, get_feed, recommend, score_postings, store_feed
+from scraping.cache import get_search_cache, search_key
+from scraping.parsers import posting_key
+from scraping.pipeline import get_scrape_pipeline
 
 jobs_bp = Blueprint("jobs", __name__)
 
 
-def scrape_careerbuilder_jobs(keywords: str, company: str, location: str):
-    """Scrapes careerbuilder.com for job postings"""
-    # Generate a random User-Agent to evade bot detection
-    ua = UserAgent()
-    user_agent = ua.random
+def iter_scraped_jobs(keywords: str, company: str, location: str, max_pages: int = None):
+    """
+    Yields job postings scraped from the configured sources as they are parsed
+
+    Up to max_pages (default SCRAPER_MAX_PAGES) result pages are read from
+    each source in SCRAPER_SOURCES; see scraping.pipeline.
+    """
+    return get_scrape_pipeline(max_pages).iter_postings(keywords, company, location)
+
+
+def scrape_jobs(keywords: str, company: str, location: str, max_pages: int = None):
+    """Scrapes the configured sources for job postings"""
+    return list(iter_scraped_jobs(keywords, company, location, max_pages))
+
+
+def find_local_jobs(keywords: str, company: str, location: str):
+    """Returns fresh matches from the local postings store, or an empty list if it is disabled or unreachable"""
+    if not config["POSTINGS_LOCAL_FIRST"]:
+        return []
+    try:
+        return find_postings(keywords, company, location, config["POSTINGS_MAX_AGE"], config["POSTINGS_LOCAL_LIMIT"])
+    except PyMongoError as err:
+        print(f"Local postings lookup failed: {err}")
+        return []
+
+
+def save_scraped_jobs(results):
+    """Adds scraped postings to the local postings store"""
+    try:
+        record_postings(results)
+    except PyMongoError as err:
+        print(f"Recording postings failed: {err}")
+
+
+def lookup_or_scrape_jobs(keywords: str, company: str, location: str, max_pages: int = None):
+    """
+    Answers a search from the local postings store, scraping when it is not enough
+
+    The store is used when it has at least POSTINGS_MIN_LOCAL_RESULTS
+    postings seen within POSTINGS_MAX_AGE seconds; scraped results are added
+    to it.
+    """
+    local = find_local_jobs(keywords, company, location)
+    if len(local) >= config["POSTINGS_MIN_LOCAL_RESULTS"]:
+        return local
+
+    results = scrape_jobs(keywords, company, location, max_pages)
+    save_scraped_jobs(results)
+    return results
+
+
+def search_jobs(keywords: str, company: str, location: str, max_pages: int = None):
+    """
+    Returns job postings for the given filters, from the search cache when possible
+
+    :param max_pages: result pages scraped per source, defaults to SCRAPER_MAX_PAGES
+    """
+    max_pages = max_pages or config["SCRAPER_MAX_PAGES"]
+    return get_search_cache().get_or_fetch(
+        search_key(keywords, company, location, max_pages),
+        lambda: lookup_or_scrape_jobs(keywords, company, location, max_pages)
+    )
+
+
+def search_jobs_first_page(keywords: str, company: str, location: str):
+    """
+    search_jobs reading only the first result page of each source
+
+    Used for recommendation fan-outs, which run many searches per profile.
+    """
+    return search_jobs(keywords, company, location, max_pages=1)
+
+
+def iter_local_or_scraped_jobs(keywords: str, company: str, location: str, max_pages: int = None):
+    """
+    Streaming form of lookup_or_scrape_jobs
+
+    Matches from the local postings store are yielded first and, if there
+    are too few of them, postings scraped from the site follow as they are
+    parsed.
 
-    # Set up Selenium with headless Chrome
-    options = Options()
-    options.add_argument("--headless")  # Run headless mode
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument(f"user-agent={user_agent}")  # Fake User-Agent
+    :return: generator of postings, returning the results lookup_or_scrape_jobs would
+    """
+    local = find_local_jobs(keywords, company, location)
+    yield from local
+    if len(local) >= config["POSTINGS_MIN_LOCAL_RESULTS"]:
+        return local
 
+    seen = {posting_key(posting) for posting in local}
     results = []
+    for posting in iter_scraped_jobs(keywords, company, location, max_pages):
+        results.append(posting)
+        if posting_key(posting) not in seen:
+            yield posting
+    save_scraped_jobs(results)
+    return results
+
+
+def stream_search_jobs(keywords: str, company: str, location: str):
+    """
+    Yields job postings for the given filters as soon as each is available
+
+    Shares the search cache and its in-flight searches with search_jobs:
+    cached results are yielded at once, a search already running is waited
+    for, and otherwise postings are streamed as they are found while other
+    identical searches wait for this one. Closing the generator (e.g. when
+    the client disconnects) stops the scrape, and only a completed scrape is
+    cached.
+    """
+    max_pages = config["SCRAPER_MAX_PAGES"]
+    return get_search_cache().stream_or_fetch(
+        search_key(keywords, company, location, max_pages),
+        lambda: lookup_or_scrape_jobs(keywords, company, location, max_pages),
+        lambda: iter_local_or_scraped_jobs(keywords, company, location, max_pages)
+    )
 
-    print("Starting Chrome WebDriver...")
-    with webdriver.Remote(config["SELENIUM_URL"] + "/wd/hub", options=options) as driver:
-
-        print("Chrome WebDriver started.")
-
-        driver.get(
-            f"https://www.careerbuilder.com/jobs?&company_name={company}&keywords={keywords}&location={location.replace(' ', '+')}"
-        )
-        # wait = WebDriverWait(driver, 3)
-        # job_listings = wait.until(
-        #     EC.presence_of_all_elements_located(
-        #         (By.CSS_SELECTOR, "li.data-results-content-parent")
-        #     )
-        # )
-        job_listings = driver.find_elements(By.CSS_SELECTOR, "li.data-results-content-parent")
-
-        for job in job_listings:
-            title = job.find_element(By.CSS_SELECTOR, "div.data-results-title").text
-            details = job.find_element(By.CSS_SELECTOR, "div.data-details")
-            company = details.find_element(By.CSS_SELECTOR, "span:nth-child(1)").text
-            location = details.find_element(By.CSS_SELECTOR, "span:nth-child(2)").text
-            job_type = details.find_element(By.CSS_SELECTOR, "span:nth-child(3)").text
-            link = job.find_element(
-                By.CSS_SELECTOR, "a.data-results-content"
-            ).get_attribute("href")
-            results.append({
-                "title": title,
-                "company": company,
-                "location": location,
-                "type": job_type,
-                "link": link,
-                "externalId": link.split("/")[-1],
-            })
-
-        return results
+
+def format_stream_event(data, event_stream, event=None):
+    """Encodes one streamed object as an NDJSON line or a server-sent event"""
+    payload = json.dumps(data)
+    if not event_stream:
+        return payload + "\n"
+    return (f"event: {event}\n" if event else "") + f"data: {payload}\n\n"
 
 
 @jobs_bp.route("/search", methods=["GET"])
@@ -83,7 +158,7 @@ def search():
         if not any([keywords, company, location]):
             return jsonify({"error": "At least one search parameter (keywords, company, or location) is required"}), 400
 
-        results = scrape_careerbuilder_jobs(keywords, company, location)
+        results = search_jobs(keywords, company, location)
         return jsonify(results), 200
 
     except TimeoutError as err:
@@ -91,26 +166,110 @@ def search():
         return jsonify({"error": "Internal server error"}), 500
 
 
+def recommendations_response(postings, partial):
+    """Builds a recommendations response flagging whether the results are partial"""
+    response = jsonify(postings)
+    response.headers["X-Partial-Results"] = "true" if partial else "false"
+    response.headers["Access-Control-Expose-Headers"] = "X-Partial-Results"
+    return response, 200
+
+
+def stored_recommendations(userid, profile_idx, profile):
+    """
+    Returns the stored feed of a profile, recomputing it by fan-out if it has expired
+
+    :param userid: id of the user
+    :param profile_idx: index of the profile
+    :param profile: ProfileView of the profile
+    :return: tuple of (postings, partial), or None if no feed matches the profile
+    """
+    feed = get_feed(userid, profile_idx, profile)
+    if feed is None:
+        return None
+    if not feed_expired(feed):
+        return feed.postings, feed.partial
+    postings, partial = recommend(profile, search_jobs_first_page)
+    store_feed(userid, profile_idx, profile, postings, partial)
+    return postings, partial
+
+
+@jobs_bp.route("/search/stream", methods=["GET"])
+def search_stream():
+    """
+    Streams the job postings for the given search filters as they are found
+
+    Responds with newline-delimited JSON, one posting per line, or with
+    server-sent events (a "done" or "search-error" event at the end) if the client
+    accepts text/event-stream.
+
+    :return: streamed response of job results
+    """
+    keywords = request.args.get("keywords", "")
+    company = request.args.get("company", "")
+    location = request.args.get("location", "")
+
+    if not any([keywords, company, location]):
+        return jsonify({"error": "At least one search parameter (keywords, company, or location) is required"}), 400
+
+    event_stream = request.accept_mimetypes.best == "text/event-stream"
+
+    def generate():
+        count = 0
+        try:
+            for posting in stream_search_jobs(keywords, company, location):
+                count += 1
+                yield format_stream_event(posting, event_stream)
+        except Exception as err:
+            print(f"Search stream error: {err}")
+            # Not "error", which EventSource reserves for connection failures
+            yield format_stream_event({"error": "Internal server error"}, event_stream, "search-error")
+            return
+        if event_stream:
+            yield format_stream_event({"count": count}, event_stream, "done")
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream" if event_stream else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @jobs_bp.route("/getRecommendations", methods=["GET"])
 def getRecommendations():
     """
     Scrapes jobs based on user's skills, job levels, and locations from the selected profile
 
+    The profile comes from the per-user profile cache, with its skills, job
+    levels and locations in canonical vocabulary form.
+
+    A precomputed feed matching the profile's current fields is returned
+    as is unless refresh=true is passed. A feed older than
+    RECOMMENDATION_FEED_MAX_AGE is recomputed by fan-out and stored first,
+    so feeds stay current even without the scheduler.
+
+    With mode=fanout (or RECOMMENDATION_MODE=fanout) every skill and location
+    combination is searched in parallel and the merged results are ranked
+    against the profile; X-Partial-Results is set if the time budget cut
+    some searches off. Otherwise one random combination is searched. Either
+    way postings are ranked against the profile and carry their "score".
+
     :return: JSON object with job results
     """
     try:
         userid = get_userid_from_header()
-        user = Users.objects(id=userid).first()
+        profiles = get_user_profiles(userid)
+        if profiles is None:
+            return jsonify({"error": "User not found"}), 404
 
         # Get the selected profile index from query parameter, default to user's default_profile
-        selected_profile_idx = request.args.get("selected_profile", type=int, default=user.default_profile)
+        selected_profile_idx = request.args.get("selected_profile", type=int, default=profiles.default_profile)
 
         # Validate the selected profile index
-        if not user.profiles or selected_profile_idx < 0 or selected_profile_idx >= len(user.profiles):
+        if not profiles.views or selected_profile_idx < 0 or selected_profile_idx >= len(profiles.views):
             return jsonify({"error": "Invalid or no profile selected"}), 400
 
-        # Get the selected profile
-        selected_profile = user.profiles[selected_profile_idx]
+        # Get the selected profile, with its terms in canonical form
+        selected_profile = profiles.views[selected_profile_idx]
 
         skill_sets = selected_profile.skills
         job_levels_sets = selected_profile.job_levels
@@ -119,10 +278,19 @@ def getRecommendations():
         if not skill_sets or not locations_set:
             return jsonify({"error": "No skills and/or locations found in selected profile"}), 400
 
-        keywords = random.choice(skill_sets) + ' ' + (random.choice(job_levels_sets) if job_levels_sets else '')
-        location = random.choice(locations_set)
+        if request.args.get("refresh") != "true":
+            stored = stored_recommendations(int(userid), selected_profile_idx, selected_profile)
+            if stored is not None:
+                return recommendations_response(*stored)
+
+        if request.args.get("mode", config["RECOMMENDATION_MODE"]) == "fanout":
+            postings, partial = recommend(selected_profile, search_jobs_first_page)
+        else:
+            keywords = random.choice(skill_sets) + ' ' + (random.choice(job_levels_sets) if job_levels_sets else '')
+            location = random.choice(locations_set)
+            postings, partial = score_postings(search_jobs(keywords, '', location), selected_profile), False
 
-        return scrape_careerbuilder_jobs(keywords, '', location)
+        return recommendations_response(postings, partial)
 
     except ValueError as err:
         print(err)
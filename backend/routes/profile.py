@@ -2,9 +2,12 @@
 This module contains the routes for managing user profiles.
 """
 
-import json
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify
+from pymongo import ReturnDocument
+from db import get_collection
 from models import Users, Profile
+from profiles import invalidate_user_profiles, record_terms
+from schemas import ProfileFields, ProfileUpdateRequest, validate_body
 from utils import get_userid_from_header
 
 profile_bp = Blueprint("profile", __name__)
@@ -43,82 +46,119 @@ def get_profile_data(profileid=None):
         print(err)
         return jsonify({"error": "Internal server error"}), 500
 
+# User fields that /updateProfile may change along with the profile
+USER_FIELDS = ("fullName", "email")
+
+
+def field_updates(body, profile_path=None, user_fields=()):
+    """
+    Maps the posted fields of a validated profile body to the paths they are stored at
+
+    :param body: ProfileFields holding the posted fields
+    :param profile_path: dotted path of the profile being updated, e.g. "profiles.1";
+        None to return the fields of a new profile
+    :param user_fields: names of Users fields the body may set as well
+    :return: dict of field path to stored value
+    """
+    return {
+        key if key in user_fields or not profile_path else f"{profile_path}.{key}": value
+        for key, value in body.model_dump(exclude_unset=True).items()
+    }
+
+
+def profile_from_updates(updates):
+    """Builds a Profile from the profile fields of validated updates, e.g. to record its terms"""
+    return Profile(**{path.rsplit(".", 1)[-1]: value for path, value in updates.items()
+                      if path.startswith("profiles.") or path in Profile._fields})
+
+
 @profile_bp.route("/updateProfile", methods=["POST"])
 @profile_bp.route("/updateProfile/<int:profileid>", methods=["POST"])
-def update_profile(profileid=None):
-    """""Updates profile data"""
+@validate_body(ProfileUpdateRequest)
+def update_profile(body, profileid=None):
+    """
+    Updates profile data
+
+    Only the posted fields are written, with one $set on
+    profiles.<idx>.<field> (and on user fields such as email), so edits
+    never rewrite the rest of the user document. Updating the default
+    profile of a user without profiles creates it.
+    """
     try:
         userid = get_userid_from_header()
-        user = Users.objects(id=userid).first()
+        user = Users.objects(id=userid).only("fullName", "username", "default_profile").first()
         if not user:
             return jsonify({"error": "User not found"}), 404
-        data = json.loads(request.data)
-        if profileid is not None:
-            if profileid < 0 or profileid >= len(user.profiles):
+        idx = user.default_profile if profileid is None else profileid
+        updates = field_updates(body, f"profiles.{idx}", USER_FIELDS)
+
+        collection = get_collection(Users)
+        # Matches only if the profile exists, so a concurrent delete cannot create a sparse entry
+        result = collection.update_one(
+            {"_id": user.id, f"profiles.{idx}": {"$exists": True}}, {"$set": updates}
+        ) if updates else None
+        if result is not None and not result.matched_count:
+            if profileid is not None:
                 return jsonify({"error": "Invalid profile ID"}), 400
-            selected_profile = user.profiles[profileid]
-        else:
-            if not user.profiles:
-                selected_profile = Profile()
-                user.profiles.append(selected_profile)
-            else:
-                selected_profile = user.profiles[user.default_profile]
-        for key in data.keys():
-            if hasattr(selected_profile, key):
-                setattr(selected_profile, key, data[key])
-            elif hasattr(user, key):
-                setattr(user, key, data[key])
-            else:
-                return jsonify({"error": f"Invalid field: {key}"}), 400
-        user.save()
+            # No profiles yet: create the default one, unless another request just did
+            new_fields = {path: value for path, value in updates.items() if path.startswith("profiles.")}
+            user_updates = {path: value for path, value in updates.items() if path in USER_FIELDS}
+            operation = {"$push": {"profiles": profile_from_updates(new_fields).to_mongo()}}
+            if user_updates:
+                operation["$set"] = user_updates
+            if not collection.update_one({"_id": user.id, "profiles.0": {"$exists": False}}, operation).matched_count:
+                return jsonify({"error": "Invalid profile ID"}), 400
+
+        record_terms([profile_from_updates(updates)])
+        invalidate_user_profiles(userid)
+        if "fullName" in updates:
+            user.fullName = updates["fullName"]
         return jsonify(user.to_json()), 200
-    except json.JSONDecodeError as err:
+    except KeyError as err:
         print(err)
         return jsonify({"error": "Internal server error"}), 500
 
 @profile_bp.route("/createProfile", methods=["POST"])
-def create_profile():
-    """Creates a new profile for the user"""
+@validate_body(ProfileFields)
+def create_profile(body):
+    """Creates a new profile for the user with a single $push"""
     try:
         userid = get_userid_from_header()
-        user = Users.objects(id=userid).first()
+        new_profile = Profile(**field_updates(body))
+        # Only the profile names come back, to learn the new profile's index
+        user = get_collection(Users).find_one_and_update(
+            {"_id": int(userid)},
+            {"$push": {"profiles": new_profile.to_mongo()}},
+            projection={"profiles.profileName": 1},
+            return_document=ReturnDocument.AFTER
+        )
         if not user:
             return jsonify({"error": "User not found"}), 404
-
-        data = json.loads(request.data)
-        new_profile = Profile()
-
-        for key in data.keys():
-            if hasattr(new_profile, key):
-                setattr(new_profile, key, data[key])
-            else:
-                return jsonify({"error": f"Invalid field: {key}"}), 400
-
-        user.profiles.append(new_profile)
-        user.save()
+        record_terms([new_profile])
+        invalidate_user_profiles(userid)
 
         return jsonify({
             "message": "Profile created successfully",
-            "profileid": len(user.profiles) - 1
+            "profileid": len(user["profiles"]) - 1
         }), 201
-    except json.JSONDecodeError as err:
+    except KeyError as err:
         print(err)
         return jsonify({"error": "Internal server error"}), 500
 
 @profile_bp.route("/setDefaultProfile/<int:profileid>", methods=["POST"])
 def set_default_profile(profileid):
-    """Sets the default profile for the user"""
+    """Sets the default profile for the user with a single $set"""
     try:
         userid = get_userid_from_header()
-        user = Users.objects(id=userid).first()
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-
-        if profileid < 0 or profileid >= len(user.profiles):
+        result = get_collection(Users).update_one(
+            {"_id": int(userid), f"profiles.{profileid}": {"$exists": True}},
+            {"$set": {"default_profile": profileid}}
+        )
+        if not result.matched_count:
+            if not Users.objects(id=userid).count():
+                return jsonify({"error": "User not found"}), 404
             return jsonify({"error": "Invalid profile ID"}), 400
-
-        user.default_profile = profileid
-        user.save()
+        invalidate_user_profiles(userid)
 
         return jsonify({
             "message": "Default profile updated successfully",
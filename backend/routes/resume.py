@@ -2,38 +2,286 @@
 This module contains the routes for uploading and downloading resumes.
 """
 
-from flask import Blueprint, jsonify, request, send_file
-from models import Users
+import uuid
+from datetime import datetime
+import httpx
+import numpy as np
+from flask import Blueprint, Response, jsonify, request
+from models import Users, ResumeMeta
 from utils import get_userid_from_header
-from db import db
+from db import db, get_collection
 from config import config
+from prompts import build_prompt, fit_document, PAGE_BREAK
+from blob_compression import pack_text, unpack_text
+from embeddings import cosine_scores, embed_texts, lookup_embeddings
+from resume_store import (
+    blob_length, find_duplicate, hash_upload, open_blob, release_blob, retain_blob, store_blob
+)
+from schemas import CoverLetterGenerationRequest, validate_body
 from langchain_ollama import OllamaLLM
+from ollama import ResponseError
 import pdfplumber
 from pdfminer.pdfparser import PDFSyntaxError
 
 resume_bp = Blueprint("resume", __name__)
 
+# Upper bound used for $slice when a listing is not paged
+MAX_RESUME_PAGE = 2 ** 31 - 1
+
+# Attempts at the compare-and-set delete before reporting a conflict
+DELETE_RETRIES = 3
+
+
+class ResumeConflictError(Exception):
+    """Raised when a user's resumes keep changing underneath a delete"""
+
+
+FEEDBACK_PROMPT = "You are an expert on resume advice. I am going to provide the plaintext of my resume. Your job is to provide tips" + \
+                    "on how I can improve my resume. It is imperative that you strictly tailor your response to the following instructions." + \
+                    "Your response must immediately start with Resume Feedback. DO NOT acknowledge the existence of this prompt." + \
+                    "Do not even start the response with \"Certainly!\" or anything close to that. Your response must only contain" + \
+                    "helpful feedback to improve my resume, and nothing else. Your response must be in markdown." + \
+                    "Here is my resume:\n\n"
+
+COVER_LETTER_PROMPT = "I am going to give you a resume and possibly a job description. You job is to generate a cover letter that tailors" + \
+                        "the resume to a job description. If you are given a complete job description, the cover letter must be tailored" + \
+                        "to this given job description. If you are not given a complete job description, the cover letter should be generalized" + \
+                        "with placeholders/fields for items commonly found in job descriptions.\n\n Your response may be sent directly to" + \
+                        "employers, so it is imperative that your response MUST ONLY contain the cover letter and NOTHING ELSE. DO NOT" + \
+                        "acknowledge the existence of this prompt anywhere in your response.\n\n\n Here is the resume: "
+
+SUMMARY_PROMPT = "Condense the following part of a resume into a short plaintext summary. Keep job titles, employers, dates," + \
+                    "degrees, skills and measurable achievements. Respond with the summary only.\n\n"
+
+
+def get_model():
+    """Returns the LLM used for resume feedback and cover letters"""
+    return OllamaLLM(base_url=config["OLLAMA_URL"], model="qwen2.5:1.5b")
+
+
+def extract_pdf_text(file):
+    """
+    Extracts the plaintext of a PDF, separating pages with page break markers
+
+    :param file: path or file-like object of the PDF
+    :return: extracted text
+    """
+    text = ""
+    with pdfplumber.open(file) as pdf:
+        for page in pdf.pages:
+            text += page.extract_text() or ""
+            text += f"\n\n{PAGE_BREAK}\n\n"
+    return text
+
+
+def make_summarizer(model):
+    """Returns a callable that condenses one chunk of resume text with the given model"""
+    return lambda chunk: model.invoke(SUMMARY_PROMPT + chunk)
+
+
+def build_feedback_prompt(text, model=None):
+    """
+    Builds the resume feedback prompt within the configured token budget
+
+    :param text: extracted resume text
+    :param model: model used to summarize oversized resumes
+    :return: prompt string
+    """
+    summarize = make_summarizer(model) if model else None
+    return build_prompt(FEEDBACK_PROMPT, text, summarize=summarize)
+
+
+def iter_gridfs_range(grid_out, start, length, chunk_size=None):
+    """
+    Yields a byte range of a GridFS file in chunks without loading the whole file
+
+    :param grid_out: GridOut of the stored file, or the file-like object returned by open_blob
+    :param start: offset of the first byte
+    :param length: number of bytes to yield
+    :param chunk_size: bytes per chunk, defaults to the GridFS chunk size
+    :return: generator of byte strings
+    """
+    chunk_size = chunk_size or grid_out.chunk_size
+    grid_out.seek(start)
+    remaining = length
+    while remaining > 0:
+        chunk = grid_out.read(min(chunk_size, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
+
+def send_gridfs_file(grid_out, filename):
+    """
+    Streams a stored resume honoring conditional and single range requests
+
+    GridFS files are immutable, so the stored MD5 (or the file id when no MD5
+    was recorded) is used as a strong ETag: revalidations are answered with
+    304 and If-Range/Range requests with 206 partial content.
+
+    :param grid_out: GridOut of the stored file
+    :param filename: download filename
+    :return: streaming response
+    """
+    # _id is GridOut's documented accessor for the file id
+    etag = grid_out.md5 or str(grid_out._id)  # pylint: disable=protected-access
+    length = blob_length(grid_out)
+
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    start, stop, status = 0, length, 200
+    byte_range = request.range
+    if_range = request.if_range
+    range_applies = byte_range is not None and len(byte_range.ranges) == 1 and \
+        (if_range.etag is None or if_range.etag == etag) and if_range.date is None
+    if range_applies:
+        bounds = byte_range.range_for_length(length)
+        if bounds is None:
+            response = Response(status=416)
+            response.headers["Content-Range"] = f"bytes */{length}"
+            return response
+        start, stop = bounds
+        status = 206
+
+    response = Response(
+        iter_gridfs_range(open_blob(grid_out), start, stop - start, grid_out.chunk_size),
+        status=status,
+        mimetype="application/pdf",
+        direct_passthrough=True
+    )
+    response.content_length = stop - start
+    if status == 206:
+        response.headers["Content-Range"] = f"bytes {start}-{stop - 1}/{length}"
+    response.headers["Accept-Ranges"] = "bytes"
+    response.headers.set("Content-Disposition", "attachment", filename=filename)
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.headers["x-filename"] = filename
+    response.headers["Access-Control-Expose-Headers"] = \
+        "x-filename, Content-Length, Content-Range, Accept-Ranges, ETag"
+    return response
+
+
+def ensure_resume_meta(user):
+    """
+    Backfills metadata for resumes uploaded before it was recorded
+
+    :param user: user whose resumeMeta should line up with resumes
+    :return: True if the metadata had to be rebuilt
+    """
+    if len(user.resumeMeta) == len(user.resumes):
+        return False
+    user.resumeMeta = [
+        ResumeMeta(
+            resume_id=uuid.uuid4().hex,
+            file_id=resume.grid_id,
+            filename=resume.filename,
+            size=resume.length,
+            uploaded_at=resume.upload_date
+        )
+        for resume in user.resumes
+    ]
+    return True
+
+
+def persist_resume_meta(user):
+    """
+    Backfills a user's resume metadata and saves it if it was missing
+
+    :param user: user whose resumeMeta should line up with resumes
+    """
+    if ensure_resume_meta(user):
+        Users.objects(id=user.id).update_one(set__resumeMeta=user.resumeMeta)
+
+
+def append_resume(userid, meta, feedback):
+    """
+    Atomically appends a resume, its metadata and its feedback to a user's index-aligned lists
+
+    One $push covers all three lists, so the user document is never
+    rewritten and entries removed by a concurrent delete cannot come back.
+
+    :param userid: id of the user
+    :param meta: ResumeMeta of the new resume, whose file_id is the stored GridFS file
+    :param feedback: stored feedback for the resume
+    """
+    get_collection(Users).update_one(
+        {"_id": userid},
+        {"$push": {"resumes": meta.file_id, "resumeMeta": meta.to_mongo(), "resumeFeedbacks": feedback}}
+    )
+
+
+def list_resume_meta(userid, offset=0, limit=None):
+    """
+    Reads one page of a user's resume metadata in a single projected query
+
+    :param userid: id of the user
+    :param offset: index of the first resume to return
+    :param limit: maximum number of resumes to return, all when None
+    :return: tuple of (total number of resumes, list of raw metadata dicts)
+    """
+    pipeline = [{
+        "$project": {
+            "total": {"$size": {"$ifNull": ["$resumes", []]}},
+            "indexed": {"$size": {"$ifNull": ["$resumeMeta", []]}},
+            "resumeMeta": {"$slice": [{"$ifNull": ["$resumeMeta", []]}, offset, limit or MAX_RESUME_PAGE]},
+        }
+    }]
+    doc = next(iter(Users.objects(id=userid).aggregate(pipeline)), None)
+    if doc is None:
+        raise FileNotFoundError
+
+    if doc["indexed"] != doc["total"]:
+        # One-time backfill for resumes stored before metadata existed
+        user = Users.objects(id=userid).first()
+        persist_resume_meta(user)
+        return doc["total"], [meta.to_mongo().to_dict() for meta in user.resumeMeta[offset:offset + (limit or MAX_RESUME_PAGE)]]
+
+    return doc["total"], doc["resumeMeta"]
+
 
 @resume_bp.route("/resume", methods=["GET"])
 def get_resume():
     """
-    Retrieves the list of resume filenames for the user
+    Retrieves the list of resume filenames and metadata for the user
+
+    Accepts optional offset and limit query parameters for paging.
 
-    :return: list of filenames
+    :return: list of filenames and metadata
     """
     userid = get_userid_from_header()
+    offset = request.args.get("offset", type=int, default=0)
+    limit = request.args.get("limit", type=int)
+    if offset < 0 or (limit is not None and limit < 1):
+        return jsonify({"error": "invalid offset or limit"}), 400
+
     try:
-        user = Users.objects(id=userid).first()
-        if not user.resumes:
+        total, metas = list_resume_meta(userid, offset, limit)
+        if total == 0:
             raise FileNotFoundError
 
     except:
         return jsonify({"error": "resume could not be found"}), 400
 
-    filenames = [
-        resume.filename or f"resume_{index}.pdf" for index, resume in enumerate(user.resumes)
-    ]
-    return jsonify({"filenames": filenames})
+    resumes = []
+    for index, meta in enumerate(metas, start=offset):
+        resume = ResumeMeta(**meta).to_json()
+        resume["index"] = index
+        resume["filename"] = resume["filename"] or f"resume_{index}.pdf"
+        resumes.append(resume)
+
+    return jsonify({
+        "filenames": [resume["filename"] for resume in resumes],
+        "resumes": resumes,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+    })
 
 
 @resume_bp.route("/resume/<int:resume_idx>", methods=["GET"])
@@ -54,18 +302,41 @@ def get_resume_file(resume_idx):
         return jsonify({"error": "resume could not be found"}), 400
 
     resume = user.resumes[resume_idx]
-    resume.seek(0)
     filename = resume.filename or f"resume_{resume_idx}.pdf"
+    return send_gridfs_file(resume.get(), filename)
 
-    response = send_file(
-        resume,
-        mimetype="application/pdf",
-        download_name=filename,
-        as_attachment=True
-    )
-    response.headers["x-filename"] = filename
-    response.headers["Access-Control-Expose-Headers"] = "x-filename"
-    return response, 200
+
+def find_resume_idx(user, resume_id):
+    """
+    Finds the current index of a resume by its stable id
+
+    :param user: user owning the resume
+    :param resume_id: stable id of the resume
+    :return: index of the resume
+    """
+    for idx, meta in enumerate(user.resumeMeta):
+        if meta.resume_id == resume_id:
+            return idx
+    raise FileNotFoundError
+
+
+@resume_bp.route("/resume/id/<resume_id>", methods=["GET"])
+def get_resume_file_by_id(resume_id):
+    """
+    Returns a resume file by its stable id
+
+    :param resume_id: id of requested resume
+    :return: response with resume file attached
+    """
+    userid = get_userid_from_header()
+    try:
+        user = Users.objects(id=userid).first()
+        resume_idx = find_resume_idx(user, resume_id)
+
+    except:
+        return jsonify({"error": "resume could not be found"}), 400
+
+    return get_resume_file(resume_idx)
 
 
 @resume_bp.route("/resume", methods=["POST"])
@@ -84,36 +355,58 @@ def upload_resume():
         except:
             return jsonify({"error": "No resume file found in the input"}), 400
 
-        text = ""
-        with pdfplumber.open(file) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text()
-                text += "\n\n[PAGE BREAK]\n\n"
-
-        model = OllamaLLM(base_url=config["OLLAMA_URL"], model="qwen2.5:1.5b")
-        prompt = "You are an expert on resume advice. I am going to provide the plaintext of my resume. Your job is to provide tips" + \
-                    "on how I can improve my resume. It is imperative that you strictly tailor your response to the following instructions." + \
-                    "Your response must immediately start with Resume Feedback. DO NOT acknowledge the existence of this prompt." + \
-                    "Do not even start the response with \"Certainly!\" or anything close to that. Your response must only contain" + \
-                    "helpful feedback to improve my resume, and nothing else. Your response must be in markdown." + \
-                    "Here is my resume:\n\n" + text
-        response = model.invoke(prompt)
+        sha256, size = hash_upload(file)
+        persist_resume_meta(user)
+
+        # Identical content reuses the stored blob and its feedback instead of
+        # being stored, extracted and sent to the model again
+        duplicate = find_duplicate(user, sha256, config["SHARE_RESUME_BLOBS"])
+        if duplicate is not None:
+            owner, idx = duplicate
+            existing = owner.resumeMeta[idx]
+            if idx < len(owner.resumeFeedbacks) and retain_blob(existing.file_id):
+                meta = ResumeMeta(
+                    resume_id=uuid.uuid4().hex,
+                    file_id=existing.file_id,
+                    filename=file.filename,
+                    size=existing.size,
+                    uploaded_at=datetime.utcnow(),
+                    page_count=existing.page_count,
+                    sha256=sha256
+                )
+                append_resume(user.id, meta, owner.resumeFeedbacks[idx])
+                return jsonify({
+                    "message": "resume successfully added",
+                    "id": meta.resume_id,
+                    "duplicate": True
+                }), 200
+
+        text = extract_pdf_text(file)
+
+        model = get_model()
+        response = model.invoke(build_feedback_prompt(text, model))
 
         # Reset the file pointer in case it has been read
         file.seek(0)
 
         # Create a new GridFSProxy instance and use put() to store the file
         new_file = db.GridFSProxy()
-        new_file.put(
-            file,
+        store_blob(new_file, file, file.filename, sha256, size)
+        meta = ResumeMeta(
+            resume_id=uuid.uuid4().hex,
+            file_id=new_file.grid_id,
             filename=file.filename,
-            content_type="application/pdf"
+            size=size,
+            uploaded_at=datetime.utcnow(),
+            page_count=text.count(PAGE_BREAK),
+            sha256=sha256
         )
-        user.resumes.append(new_file)
-
-        user.resumeFeedbacks.append(response)
-        user.save()
-        return jsonify({"message": "resume successfully added"}), 200
+        append_resume(user.id, meta, pack_text(response))
+        return jsonify({
+            "message": "resume successfully added",
+            "id": meta.resume_id,
+            "duplicate": False
+        }), 200
 
     except PDFSyntaxError as e:
         print(e)
@@ -129,7 +422,7 @@ def get_resume_feedback():
     """
     userid = get_userid_from_header()
     user = Users.objects(id=userid).first()
-    return jsonify({"response": user.resumeFeedbacks}), 200
+    return jsonify({"response": [unpack_text(feedback) for feedback in user.resumeFeedbacks]}), 200
 
 
 @resume_bp.route("/resume-feedback/<int:feedback_idx>", methods=["GET"])
@@ -149,10 +442,66 @@ def get_resume_feedback_by_idx(feedback_idx):
     except:
         return jsonify({"error": "resume feedback could not be found"}), 400
 
-    response = user.resumeFeedbacks[feedback_idx]
+    response = unpack_text(user.resumeFeedbacks[feedback_idx])
     return jsonify({"feedback": response}), 200
 
 
+@resume_bp.route("/resume-feedback/id/<resume_id>", methods=["GET"])
+def get_resume_feedback_by_id(resume_id):
+    """
+    Retrieves the feedback of a resume by its stable id
+
+    :param resume_id: id of the resume
+    :return: response with feedback
+    """
+    userid = get_userid_from_header()
+    try:
+        user = Users.objects(id=userid).first()
+        feedback_idx = find_resume_idx(user, resume_id)
+        if feedback_idx >= len(user.resumeFeedbacks):
+            raise FileNotFoundError
+
+    except:
+        return jsonify({"error": "resume feedback could not be found"}), 400
+
+    return jsonify({"feedback": unpack_text(user.resumeFeedbacks[feedback_idx])}), 200
+
+
+def delete_resume(userid, resume_id):
+    """
+    Atomically removes a resume, its feedback and metadata, then releases its GridFS file
+
+    The three index-aligned lists are rewritten in one update that only
+    applies if the user's resumes are unchanged since they were read, so
+    concurrent uploads or deletes can never shift an entry out from under us.
+
+    :param userid: id of the user
+    :param resume_id: stable id of the resume to delete
+    """
+    collection = get_collection(Users)
+    for _ in range(DELETE_RETRIES):
+        user = Users.objects(id=userid).only("resumes", "resumeFeedbacks", "resumeMeta").first()
+        idx = find_resume_idx(user, resume_id)
+
+        file_ids = [resume.grid_id for resume in user.resumes]
+        feedbacks = list(user.resumeFeedbacks)
+        metas = [meta.to_mongo() for meta in user.resumeMeta]
+        file_id = file_ids.pop(idx)
+        metas.pop(idx)
+        if idx < len(feedbacks):
+            feedbacks.pop(idx)
+
+        result = collection.update_one(
+            {"_id": user.id, "resumes": [resume.grid_id for resume in user.resumes]},
+            {"$set": {"resumes": file_ids, "resumeFeedbacks": feedbacks, "resumeMeta": metas}}
+        )
+        if result.modified_count:
+            release_blob(file_id)
+            return
+
+    raise ResumeConflictError
+
+
 @resume_bp.route("/resume/<int:resume_idx>", methods=["DELETE"])
 def delete_resume_feedback(resume_idx):
     """
@@ -170,14 +519,33 @@ def delete_resume_feedback(resume_idx):
     except:
         return jsonify({"error": "resume feedback could not be found"}), 400
 
-    del user.resumes[resume_idx]
-    del user.resumeFeedbacks[resume_idx]
-    user.save()
+    persist_resume_meta(user)
+    return delete_resume_feedback_by_id(user.resumeMeta[resume_idx].resume_id)
+
+
+@resume_bp.route("/resume/id/<resume_id>", methods=["DELETE"])
+def delete_resume_feedback_by_id(resume_id):
+    """
+    Deletes a resume, its feedback and its stored file by stable id
+
+    :param resume_id: id of resume to delete
+    :return: response
+    """
+    userid = get_userid_from_header()
+    try:
+        delete_resume(userid, resume_id)
+
+    except ResumeConflictError:
+        return jsonify({"error": "resumes changed during delete, please retry"}), 409
+    except:
+        return jsonify({"error": "resume feedback could not be found"}), 400
+
     return jsonify({"success": "successfully deleted resume and its feedback"}), 200
 
 
 @resume_bp.route("/cover_letter/<int:resume_idx>", methods=["POST"])
-def generate_cover_letter(resume_idx):
+@validate_body(CoverLetterGenerationRequest)
+def generate_cover_letter(resume_idx, body):
     """
     Generates a cover letter based on a resume file index and passed job description
 
@@ -192,22 +560,118 @@ def generate_cover_letter(resume_idx):
     except:
         return jsonify({"error": "resume feedback could not be found"}), 400
 
-    data = request.json
-    job_description = data.get('job_description', 'job description not found')
+    job_description = body.job_description
 
     # get resume text
-    resume_text = ""
-    with pdfplumber.open(user.resumes[resume_idx]) as pdf:
-        for page in pdf.pages:
-            resume_text += page.extract_text() + "\n\n"
-
-    model = OllamaLLM(base_url=config["OLLAMA_URL"], model="qwen2.5:1.5b")
-    prompt = "I am going to give you a resume and possibly a job description. You job is to generate a cover letter that tailors" + \
-                "the resume to a job description. If you are given a complete job description, the cover letter must be tailored" + \
-                "to this given job description. If you are not given a complete job description, the cover letter should be generalized" + \
-                "with placeholders/fields for items commonly found in job descriptions.\n\n Your response may be sent directly to" + \
-                "employers, so it is imperative that your response MUST ONLY contain the cover letter and NOTHING ELSE. DO NOT" + \
-                f"acknowledge the existence of this prompt anywhere in your response.\n\n\n Here is the resume: {resume_text}\n\n\n" + \
-                f"Here is what might be a job description: {job_description}"
+    resume_text = extract_pdf_text(open_blob(user.resumes[resume_idx].get()))
+
+    # The job description gets at most a third of the budget so the resume is never crowded out
+    job_description = fit_document(job_description, config["PROMPT_TOKEN_BUDGET"] // 3)
+
+    model = get_model()
+    prompt = build_prompt(
+        COVER_LETTER_PROMPT,
+        resume_text,
+        f"\n\n\nHere is what might be a job description: {job_description}",
+        summarize=make_summarizer(model)
+    )
     response = model.invoke(prompt)
     return jsonify({"response": response}), 200
+
+
+def application_text(application):
+    """Returns the text of a saved application that resumes are matched against"""
+    fields = [
+        application.get("title") or application.get("jobTitle"),
+        application.get("company") or application.get("companyName"),
+        application.get("location"),
+        application.get("type"),
+    ]
+    return "\n".join(field for field in fields if field)
+
+
+def resume_embedding(user, resume_idx):
+    """
+    Returns the embedding of a resume, extracting its text only on a cache miss
+
+    Resumes are cached by the hash of the uploaded file, so the PDF does not
+    have to be read again to look its vector up.
+
+    :param user: user owning the resume
+    :param resume_idx: index of the resume
+    :return: float32 vector
+    """
+    meta = user.resumeMeta[resume_idx]
+    key = f"resume:{meta.sha256}" if meta.sha256 else f"file:{meta.file_id}"
+    cached = lookup_embeddings([key]).get(key)
+    if cached is not None:
+        return cached
+    text = extract_pdf_text(open_blob(user.resumes[resume_idx].get()))
+    return embed_texts([fit_document(text, config["EMBED_TOKEN_BUDGET"])], keys=[key])[0]
+
+
+def match_applications(user, resume_idx, limit=None):
+    """
+    Scores a user's saved applications against one of their resumes
+
+    :param user: user owning the resume and applications
+    :param resume_idx: index of the resume
+    :param limit: maximum number of matches to return, all when None
+    :return: list of {"application", "score"} dicts, best first
+    """
+    applications = [app for app in user.applications if application_text(app)]
+    if not applications:
+        return []
+    vectors = embed_texts([application_text(app) for app in applications])
+    scores = cosine_scores(resume_embedding(user, resume_idx), vectors)
+    order = np.argsort(-scores, kind="stable")[:limit]
+    return [{"application": applications[i], "score": round(float(scores[i]), 4)} for i in order]
+
+
+@resume_bp.route("/resume/<int:resume_idx>/matches", methods=["GET"])
+def get_resume_matches(resume_idx):
+    """
+    Ranks the user's saved applications by how well they fit a resume
+
+    :param resume_idx: index of the resume
+    :return: JSON object with the resume and its scored applications
+    """
+    userid = get_userid_from_header()
+    try:
+        user = Users.objects(id=userid).first()
+        if not user.resumes or resume_idx >= len(user.resumes):
+            raise FileNotFoundError
+
+    except:
+        return jsonify({"error": "resume could not be found"}), 400
+
+    limit = request.args.get("limit", type=int)
+    if limit is not None and limit < 1:
+        return jsonify({"error": "invalid limit"}), 400
+    persist_resume_meta(user)
+    try:
+        matches = match_applications(user, resume_idx, limit)
+    except (ConnectionError, ValueError, ResponseError, httpx.HTTPError) as err:
+        print(f"Match scoring failed: {err}")
+        return jsonify({"error": "Match scoring is unavailable"}), 503
+
+    return jsonify({"resume": user.resumeMeta[resume_idx].to_json(), "matches": matches}), 200
+
+
+@resume_bp.route("/resume/id/<resume_id>/matches", methods=["GET"])
+def get_resume_matches_by_id(resume_id):
+    """
+    Ranks the user's saved applications by how well they fit a resume, by its stable id
+
+    :param resume_id: id of the resume
+    :return: JSON object with the resume and its scored applications
+    """
+    userid = get_userid_from_header()
+    try:
+        user = Users.objects(id=userid).first()
+        resume_idx = find_resume_idx(user, resume_id)
+
+    except:
+        return jsonify({"error": "resume could not be found"}), 400
+
+    return get_resume_matches(resume_idx)
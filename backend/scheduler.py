@@ -0,0 +1,127 @@
+"""
+This module runs periodic background jobs inside the app process.
+
+Each job holds a lease in the scheduler_leases collection while it runs, so
+when several app processes are started only one of them does the work. The
+lease is renewed while a run is in progress, so a run that outlasts the
+lease is never overlapped by another process.
+"""
+
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from mongoengine.connection import get_db
+from config import config
+from recommendations import refresh_feeds
+from routes.jobs import search_jobs_first_page
+
+LEASE_COLLECTION = "scheduler_leases"
+
+_owner = f"{socket.gethostname()}:{os.getpid()}"
+_threads = {}
+
+
+def acquire_lease(name, ttl, owner=None):
+    """
+    Takes or renews the lease for a job
+
+    :param name: job name
+    :param ttl: seconds the lease is held unless renewed
+    :param owner: lease holder, defaults to this process
+    :return: True if the caller now holds the lease
+    """
+    owner = owner or _owner
+    now = datetime.utcnow()
+    try:
+        get_db()[LEASE_COLLECTION].update_one(
+            {"_id": name, "$or": [{"expiresAt": {"$lt": now}}, {"owner": owner}]},
+            {"$set": {"owner": owner, "expiresAt": now + timedelta(seconds=ttl)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Another process holds an unexpired lease
+        return False
+    return True
+
+
+@contextmanager
+def hold_lease(name, ttl, owner=None):
+    """
+    Keeps renewing a held lease every third of its ttl until the block exits
+
+    The block receives a threading.Event that is set if the lease is lost to
+    another process; the work in the block should stop once it is set.
+
+    :param name: job name
+    :param ttl: seconds the lease is held after each renewal
+    :param owner: lease holder, defaults to this process
+    """
+    done = threading.Event()
+    lost = threading.Event()
+
+    def renew():
+        while not done.wait(ttl / 3):
+            try:
+                if not acquire_lease(name, ttl, owner):
+                    print(f"Scheduled job {name} lost its lease, stopping it")
+                    lost.set()
+                    return
+            except PyMongoError as err:
+                print(f"Scheduled job {name} could not renew its lease: {err}")
+
+    thread = threading.Thread(target=renew, name=f"lease-{name}", daemon=True)
+    thread.start()
+    try:
+        yield lost
+    finally:
+        done.set()
+        thread.join()
+
+
+def _run_periodically(name, interval, job, stop):
+    """Runs job every interval seconds while this process holds its lease"""
+    while not stop.wait(interval):
+        try:
+            if acquire_lease(name, interval * 2):
+                with hold_lease(name, interval * 2) as lost:
+                    job(lost)
+        except PyMongoError as err:
+            print(f"Scheduled job {name} could not reach the database: {err}")
+        except Exception as err:
+            print(f"Scheduled job {name} failed: {err}")
+
+
+def schedule(name, interval, job):
+    """
+    Starts running a job in a daemon thread every interval seconds
+
+    Scheduling a job that is already running in this process does nothing.
+
+    :param name: job name, also used as the lease name
+    :param interval: seconds between runs
+    :param job: callable taking a threading.Event that is set when the job loses its lease and should stop
+    :return: threading.Event that stops the job when set
+    """
+    if name in _threads:
+        return _threads[name][1]
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=_run_periodically, args=(name, interval, job, stop), name=f"scheduler-{name}", daemon=True
+    )
+    _threads[name] = (thread, stop)
+    thread.start()
+    return stop
+
+
+def start_scheduler():
+    """Starts the background jobs enabled in the config"""
+    interval = config["RECOMMENDATION_FEED_INTERVAL"]
+    if interval > 0:
+        def refresh_recommendation_feeds(stop):
+            refreshed, skipped = refresh_feeds(search_jobs_first_page, stop=stop)
+            print(f"Recommendation feeds: {refreshed} refreshed, {skipped} unchanged")
+
+        schedule("recommendation-feeds", interval, refresh_recommendation_feeds)
@@ -0,0 +1,195 @@
+"""
+This module declares the JSON bodies accepted by the routes and validates
+requests against them.
+
+Each schema is a pydantic model, so its validator is built once at import
+time. Routes wrapped with validate_body receive the validated model as
+``body``; malformed or invalid payloads are answered with a 400 before the
+route touches the database.
+"""
+
+import functools
+from typing import ClassVar, Dict, List, Optional, Union
+
+import orjson
+from flask import jsonify, request
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+class RequestBody(BaseModel):
+    """Base of request schemas; unknown keys are ignored"""
+
+    # JSON values are not coerced: "1" is not an int and 1 is not a str
+    model_config = ConfigDict(strict=True)
+    # Error returned when a required field is missing
+    missing_message: ClassVar[str] = "Missing fields in input"
+
+
+class SignupRequest(RequestBody):
+    """Body of /users/signup"""
+
+    username: str
+    password: str
+    fullName: str
+
+
+class LoginRequest(RequestBody):
+    """Body of /users/login"""
+
+    missing_message: ClassVar[str] = "Username or password missing"
+
+    username: str
+    password: str
+
+
+class NewApplication(RequestBody):
+    """An application saved by the user"""
+
+    title: str
+    company: str
+    link: Optional[str] = None
+    location: Optional[str] = None
+    type: Optional[str] = None
+    status: Union[str, int] = "1"
+    externalId: Optional[str] = None
+
+
+class ApplicationRequest(RequestBody):
+    """Body of POST /applications"""
+
+    application: NewApplication
+
+
+class ApplicationChanges(RequestBody):
+    """
+    Changed fields of a saved application
+
+    Other keys the board keeps on an application (jobTitle, companyName,
+    date, ...) are stored as given, provided they are plain JSON values. The
+    id comes from the URL; an "id" key in the body is ignored.
+    """
+
+    model_config = ConfigDict(strict=True, extra="allow")
+
+    title: Optional[str] = None
+    company: Optional[str] = None
+    link: Optional[str] = None
+    location: Optional[str] = None
+    type: Optional[str] = None
+    status: Union[str, int, None] = None
+    externalId: Optional[str] = None
+    __pydantic_extra__: Dict[str, Union[str, int, float, bool, None]]
+
+
+class ApplicationUpdateRequest(RequestBody):
+    """Body of PUT /applications/<id>"""
+
+    application: ApplicationChanges
+
+
+class CoverLetterRequest(RequestBody):
+    """Body of POST and PUT /coverletters"""
+
+    missing_message: ClassVar[str] = "Cover letter content is required"
+
+    content: str
+    title: Optional[str] = None
+
+
+class CoverLetterGenerationRequest(RequestBody):
+    """Body of POST /cover_letter/<resume_idx>"""
+
+    job_description: str = "job description not found"
+
+
+class ProfileFields(RequestBody):
+    """Fields of a profile; only the posted ones are written"""
+
+    model_config = ConfigDict(strict=True, extra="forbid")
+
+    profileName: Optional[str] = None
+    skills: List[str] = []
+    job_levels: List[str] = []
+    locations: List[str] = []
+    institution: Optional[str] = None
+    phone_number: Optional[str] = None
+    address: Optional[str] = None
+
+
+class ProfileUpdateRequest(ProfileFields):
+    """Body of /updateProfile, which may also change user fields"""
+
+    fullName: Optional[str] = None
+    email: Optional[str] = None
+
+
+def _error_field(schema, loc):
+    """
+    Returns the name of the field a pydantic error is about, or None for the body itself
+
+    The location is followed through nested schemas only, so list indexes and
+    union members (e.g. ("skills", 0) or ("status", "str")) name their field.
+    """
+    field, model = None, schema
+    for part in loc:
+        if model is None or not isinstance(part, str):
+            break
+        field = part
+        info = model.model_fields.get(part)
+        nested = info.annotation if info else None
+        model = nested if isinstance(nested, type) and issubclass(nested, BaseModel) else None
+    return field
+
+
+def error_message(schema, error):
+    """
+    Converts the first validation error of a request to the message returned to the client
+
+    :param schema: RequestBody subclass the request was validated against
+    :param error: pydantic error dict
+    :return: error message string
+    """
+    field = _error_field(schema, error["loc"])
+    if field is None:
+        return "Expected a JSON object"
+    if error["type"] == "missing":
+        return schema.missing_message
+    if error["type"] == "extra_forbidden":
+        return f"Invalid field: {field}"
+    return f"Invalid value for field: {field}"
+
+
+def parse_body(schema, data):
+    """
+    Decodes and validates a JSON request body
+
+    :param schema: RequestBody subclass to validate against
+    :param data: raw request body bytes
+    :return: tuple of (validated model or None, error message or None)
+    """
+    try:
+        payload = orjson.loads(data)
+    except orjson.JSONDecodeError as err:
+        print(err)
+        return None, "Malformed JSON"
+    try:
+        return schema.model_validate(payload), None
+    except ValidationError as err:
+        return None, error_message(schema, err.errors(include_url=False, include_input=False)[0])
+
+
+def validate_body(schema):
+    """
+    Decorates a route to receive its JSON body validated against schema as ``body``
+
+    :param schema: RequestBody subclass
+    :return: decorator
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            body, error = parse_body(schema, request.get_data())
+            if error:
+                return jsonify({"error": error}), 400
+            return view(*args, body=body, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,160 @@
+"""
+This module scores job postings against profiles with hashed TF-IDF vectors.
+
+Postings and profiles are turned into sparse word unigram + bigram vectors,
+hashed into a fixed number of features so no vocabulary has to be stored,
+and a whole batch is scored with one sparse matrix multiply.
+"""
+
+import re
+import zlib
+from collections import Counter
+
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+
+N_FEATURES = 2 ** 18
+
+# Keeps tokens such as "c++", "c#" and "node.js" whole
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+# The title says most about a posting, so it is counted this many times
+TITLE_WEIGHT = 2
+
+
+def tokenize(text):
+    """
+    Splits text into lower-case word unigrams and bigrams
+
+    Bigrams never span lines, so separate fields or skills can be joined
+    with newlines without inventing phrases.
+
+    :param text: text to split
+    :return: list of tokens
+    """
+    tokens = []
+    for line in (text or "").casefold().splitlines():
+        words = [word.rstrip(".") for word in TOKEN_RE.findall(line)]
+        words = [word for word in words if word]
+        tokens += words
+        tokens += [f"{first} {second}" for first, second in zip(words, words[1:])]
+    return tokens
+
+
+def _feature(token):
+    """Hashes a token to a feature index; crc32 is stable across processes, unlike hash()"""
+    return zlib.crc32(token.encode("utf-8")) & (N_FEATURES - 1)
+
+
+def hashed_counts(texts):
+    """
+    Builds the term count matrix of a batch of texts
+
+    :param texts: iterable of strings
+    :return: csr_matrix of shape (len(texts), N_FEATURES)
+    """
+    indptr = [0]
+    indices = []
+    data = []
+    for text in texts:
+        counts = Counter(_feature(token) for token in tokenize(text))
+        indices.extend(counts.keys())
+        data.extend(counts.values())
+        indptr.append(len(indices))
+    return csr_matrix(
+        (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+        shape=(len(indptr) - 1, N_FEATURES)
+    )
+
+
+def fit_idf(counts):
+    """
+    Computes smoothed inverse document frequencies from a count matrix
+
+    :param counts: csr_matrix from hashed_counts
+    :return: float32 array of N_FEATURES weights
+    """
+    df = np.bincount(counts.indices, minlength=N_FEATURES)
+    n = counts.shape[0]
+    return (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+
+
+def tfidf(counts, idf):
+    """
+    Weights a count matrix by sublinear TF and IDF and L2 normalizes its rows
+
+    :param counts: csr_matrix from hashed_counts
+    :param idf: weights from fit_idf
+    :return: csr_matrix with unit length rows (empty rows stay zero)
+    """
+    matrix = counts.copy()
+    matrix.data = (1 + np.log(matrix.data)) * idf[matrix.indices]
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return diags(1 / norms) @ matrix
+
+
+def score_matrix(posting_texts, profile_texts):
+    """
+    Scores every posting against every profile
+
+    IDF weights are fitted on the postings, so terms common to the whole
+    batch (e.g. "engineer" in an engineering search) count for little.
+
+    :param posting_texts: list of posting texts
+    :param profile_texts: list of profile texts
+    :return: sparse matrix of cosine similarities, shape (postings, profiles)
+    """
+    posting_counts = hashed_counts(posting_texts)
+    idf = fit_idf(posting_counts)
+    postings = tfidf(posting_counts, idf)
+    profiles = tfidf(hashed_counts(profile_texts), idf)
+    return (postings @ profiles.T).tocsr()
+
+
+def top_k(scores, k):
+    """
+    Picks the k best postings for each profile
+
+    :param scores: sparse matrix from score_matrix
+    :param k: number of postings per profile
+    :return: list (one per profile) of (posting indices, scores), best first
+    """
+    columns = scores.tocsc()
+    best = []
+    for col in range(columns.shape[1]):
+        start, end = columns.indptr[col], columns.indptr[col + 1]
+        rows, values = columns.indices[start:end], columns.data[start:end]
+        if len(values) > k:
+            keep = np.argpartition(-values, k)[:k]
+            rows, values = rows[keep], values[keep]
+        order = np.argsort(-values, kind="stable")
+        best.append((rows[order], values[order]))
+    return best
+
+
+def posting_text(posting):
+    """Returns the text of a posting that is matched against profiles"""
+    title = posting.get("title") or ""
+    parts = [title] * TITLE_WEIGHT + [posting.get("company") or "", posting.get("location") or ""]
+    return "\n".join(parts)
+
+
+def profile_text(profile):
+    """Returns the text of a profile that postings are matched against"""
+    return "\n".join(list(profile.skills) + list(profile.job_levels) + list(profile.locations))
+
+
+def rank_postings(postings, profile):
+    """
+    Ranks postings by relevance to a profile
+
+    :param postings: list of posting dicts
+    :param profile: Profile to rank for
+    :return: list of (posting, score) tuples, best first; ties keep their order
+    """
+    if not postings:
+        return []
+    scores = score_matrix([posting_text(p) for p in postings], [profile_text(profile)]).toarray().ravel()
+    order = np.argsort(-scores, kind="stable")
+    return [(postings[i], float(scores[i])) for i in order]
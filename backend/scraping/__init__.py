@@ -0,0 +1 @@
+# Initialize the scraping package
@@ -0,0 +1,229 @@
+"""
+This module caches job search results so repeated queries skip the scrape.
+
+Results live in an in-process LRU and, optionally, a shared Mongo collection
+whose TTL index expires old entries. Entries past their TTL are still served
+for a grace period while a background refresh replaces them.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import PyMongoError
+from mongoengine.connection import get_db
+from config import config
+from shared import Shared
+from scraping.singleflight import SingleFlight
+
+CACHE_COLLECTION = "search_cache"
+
+
+def search_key(keywords, company, location, max_pages=None):
+    """
+    Builds the cache key for a search
+
+    Parameters are case-folded and whitespace collapsed, so queries that
+    only differ in spelling of spaces or case share an entry. Searches
+    reading a different number of result pages are cached apart.
+
+    :param max_pages: result pages read per source, defaults to SCRAPER_MAX_PAGES
+    :return: cache key string
+    """
+    parts = [" ".join((value or "").split()).casefold() for value in (keywords, company, location)]
+    parts.append(str(max_pages or config["SCRAPER_MAX_PAGES"]))
+    return "\x1f".join(parts)
+
+
+# Settings, the LRU, the Mongo tier and the refresh machinery are one unit sharing one lock
+class SearchCache:  # pylint: disable=too-many-instance-attributes
+    """
+    LRU cache of search results with TTL and stale-while-revalidate
+
+    :param max_entries: maximum entries kept in process
+    :param ttl: seconds an entry is served as fresh
+    :param stale_ttl: extra seconds an expired entry is served while it is refreshed
+    :param use_mongo: whether to share entries through the search_cache collection
+    """
+
+    def __init__(self, max_entries, ttl, stale_ttl, use_mongo=False):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.use_mongo = use_mongo
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._flights = SingleFlight()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-cache")
+        self._indexed = False
+
+    def _collection(self):
+        """Returns the shared cache collection, creating its TTL index on first use"""
+        collection = get_db()[CACHE_COLLECTION]
+        if not self._indexed:
+            collection.create_index("expiresAt", expireAfterSeconds=0)
+            self._indexed = True
+        return collection
+
+    def _remember(self, key, value, stored_at):
+        """Stores an entry in process, evicting the least recently used"""
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """
+        Looks up a cached search
+
+        :param key: key from search_key
+        :return: tuple of (results, fresh), or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None and self.use_mongo:
+            try:
+                doc = self._collection().find_one({"_id": key})
+            except PyMongoError as err:
+                print(f"Search cache read failed: {err}")
+                doc = None
+            if doc is not None:
+                entry = (doc["results"], doc["storedAt"].replace(tzinfo=timezone.utc).timestamp())
+                self._remember(key, *entry)
+
+        if entry is None:
+            return None
+        value, stored_at = entry
+        age = now - stored_at
+        if age >= self.ttl + self.stale_ttl:
+            return None
+        return value, age < self.ttl
+
+    def set(self, key, value):
+        """
+        Caches the results of a search
+
+        Empty results are not cached: they are as likely to come from a
+        blocked or failed scrape as from a search with no matches, and
+        caching them would hide postings for the whole TTL and stale window.
+
+        :param key: key from search_key
+        :param value: list of postings
+        """
+        if not value:
+            return
+        stored_at = time.time()
+        self._remember(key, value, stored_at)
+        if self.use_mongo:
+            stored = datetime.utcfromtimestamp(stored_at)
+            try:
+                self._collection().replace_one(
+                    {"_id": key},
+                    {
+                        "results": value,
+                        "storedAt": stored,
+                        "expiresAt": stored + timedelta(seconds=self.ttl + self.stale_ttl),
+                    },
+                    upsert=True
+                )
+            except PyMongoError as err:
+                print(f"Search cache write failed: {err}")
+
+    def _fetch_and_set(self, key, fetch):
+        """Fetches results and caches them"""
+        value = fetch()
+        self.set(key, value)
+        return value
+
+    def _refresh(self, key, fetch):
+        """Fetches and stores fresh results; runs on the refresher pool"""
+        try:
+            self._flights.do(key, lambda: self._fetch_and_set(key, fetch))
+        except Exception as err:
+            print(f"Background refresh of search failed: {err}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Returns cached results, fetching them on a miss
+
+        Concurrent misses for the same key share a single fetch. A stale hit
+        is returned immediately and refreshed in the background, with at most
+        one refresh per key in flight.
+
+        :param key: key from search_key
+        :param fetch: callable returning fresh results
+        :return: list of postings
+        """
+        cached = self.get(key)
+        if cached is None:
+            return self._flights.do(key, lambda: self._fetch_and_set(key, fetch))
+
+        value, fresh = cached
+        if not fresh:
+            with self._lock:
+                start = key not in self._refreshing
+                self._refreshing.add(key)
+            if start:
+                self._refresher.submit(self._refresh, key, fetch)
+        return value
+
+    def stream_or_fetch(self, key, fetch, stream):
+        """
+        Yields the results of a search as they become available
+
+        Cache hits and searches already in flight, from get_or_fetch or
+        another stream, are answered like get_or_fetch. Otherwise this call
+        leads the flight for the key: postings are yielded as stream produces
+        them, and the list it returns is cached and handed to the callers that
+        joined meanwhile. If the generator is closed early, nothing is cached
+        and those callers fetch again themselves.
+
+        :param key: key from search_key
+        :param fetch: callable returning fresh results
+        :param stream: callable returning a generator of postings that returns the results to cache
+        :return: generator of postings
+        """
+        call = self._flights.lead(key) if self.get(key) is None else None
+        if call is None:
+            yield from self.get_or_fetch(key, fetch)
+            return
+
+        try:
+            value = yield from stream()
+        except Exception as err:
+            self._flights.finish(key, call, error=err)
+            raise
+        except BaseException:
+            # Closed early, e.g. because the client went away
+            self._flights.finish(key, call, abandoned=True)
+            raise
+        self.set(key, value)
+        self._flights.finish(key, call, value)
+
+    def clear(self):
+        """Drops every in-process entry"""
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = Shared(lambda: SearchCache(
+    config["SEARCH_CACHE_SIZE"],
+    config["SEARCH_CACHE_TTL"],
+    config["SEARCH_CACHE_STALE_TTL"],
+    config["SEARCH_CACHE_MONGO"]
+))
+
+
+def get_search_cache():
+    """Returns the process-wide search cache, creating it on first use"""
+    return _cache.get()
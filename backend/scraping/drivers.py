@@ -0,0 +1,326 @@
+"""
+This module manages the remote Selenium WebDriver sessions used for scraping.
+"""
+
+import atexit
+import functools
+import itertools
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from config import config
+from shared import Shared
+from fake_useragent import UserAgent
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from scraping.http import DEFAULT_HEADERS
+from scraping.ratelimit import get_rate_limiter
+
+
+class DriverPoolTimeout(TimeoutError):
+    """Raised when no WebDriver session becomes available in time"""
+
+
+class PooledDriver:
+    """A WebDriver session together with its bookkeeping"""
+
+    __slots__ = ("driver", "uses", "created_at")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.monotonic()
+
+
+class WebDriverPool:
+    """
+    Bounded pool of warm, reusable remote WebDriver sessions
+
+    At most ``size`` sessions exist at once. Idle sessions are health checked
+    before being handed out, recycled after ``max_uses`` checkouts, and
+    callers wait at most ``checkout_timeout`` seconds for a free session.
+    """
+
+    def __init__(self, factory, size, max_uses, checkout_timeout):
+        self._factory = factory
+        self._max_uses = max_uses
+        self._checkout_timeout = checkout_timeout
+        # LIFO so the most recently used (warmest) session is reused first
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    @staticmethod
+    def _healthy(entry):
+        """Checks that the remote session still responds"""
+        try:
+            _ = entry.driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    @staticmethod
+    def _quit(entry):
+        """Ends a session, ignoring errors from sessions that already died"""
+        try:
+            entry.driver.quit()
+        except WebDriverException:
+            pass
+
+    def checkout(self, timeout=None):
+        """
+        Takes a healthy session from the pool, starting one if none are idle
+
+        :param timeout: seconds to wait for a free slot, defaults to the pool's checkout timeout
+        :return: PooledDriver
+        """
+        timeout = self._checkout_timeout if timeout is None else timeout
+        if self._closed:
+            raise RuntimeError("WebDriver pool is closed")
+        # The slot is held by the checked out driver and released by checkin
+        if not self._slots.acquire(timeout=timeout):  # pylint: disable=consider-using-with
+            raise DriverPoolTimeout(f"No WebDriver session available after {timeout}s")
+
+        try:
+            while True:
+                try:
+                    entry = self._idle.get_nowait()
+                except queue.Empty:
+                    return PooledDriver(self._factory())
+                if self._healthy(entry):
+                    return entry
+                self._quit(entry)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def checkin(self, entry, healthy=True):
+        """
+        Returns a session to the pool, recycling it if it is worn out or broken
+
+        :param entry: PooledDriver obtained from checkout
+        :param healthy: False if the session failed while in use
+        """
+        entry.uses += 1
+        try:
+            if healthy and not self._closed and entry.uses < self._max_uses:
+                try:
+                    entry.driver.delete_all_cookies()
+                    self._idle.put(entry)
+                    return
+                except WebDriverException:
+                    pass
+            self._quit(entry)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def session(self, timeout=None):
+        """
+        Context manager that checks a driver out and back in
+
+        :param timeout: seconds to wait for a free slot
+        :return: WebDriver
+        """
+        entry = self.checkout(timeout)
+        healthy = True
+        try:
+            yield entry.driver
+        except WebDriverException:
+            # Element lookups also raise WebDriverException, so only drop the session if it is really gone
+            healthy = self._healthy(entry)
+            raise
+        finally:
+            self.checkin(entry, healthy)
+
+    def idle_count(self):
+        """Returns the number of idle sessions"""
+        return self._idle.qsize()
+
+    def close(self):
+        """Quits all idle sessions; sessions in use are quit when checked in"""
+        self._closed = True
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+CHROME_ARGUMENTS = ("--headless", "--disable-gpu", "--no-sandbox")
+
+# Resources the parsers never read, as (Chrome prefs, Chrome switches) that stop the browser loading them;
+# a content setting of 2 means "block"
+BLOCKABLE_RESOURCES = {
+    "images": ({"profile.managed_default_content_settings.images": 2}, ("--blink-settings=imagesEnabled=false",)),
+    "fonts": ({}, ("--disable-remote-fonts",)),
+    "notifications": ({"profile.managed_default_content_settings.notifications": 2}, ()),
+    "popups": ({"profile.managed_default_content_settings.popups": 2}, ()),
+    "plugins": ({"profile.managed_default_content_settings.plugins": 2}, ()),
+}
+
+_timings = {"user_agent_pool_seconds": None, "sessions": 0, "setup_seconds": 0.0, "start_seconds": 0.0}
+_timings_lock = threading.Lock()
+
+
+def load_user_agents():
+    """
+    Builds the rotation pool of User-Agent strings
+
+    fake_useragent loads and parses its browser dataset when UserAgent() is
+    created, so this runs once per process (see get_user_agents) and
+    SELENIUM_USER_AGENT_POOL_SIZE random agents are drawn from it up front.
+
+    :return: itertools.cycle over the pool
+    """
+    start = time.perf_counter()
+    try:
+        ua = UserAgent()
+        agents = list(dict.fromkeys(ua.random for _ in range(config["SELENIUM_USER_AGENT_POOL_SIZE"])))
+    except Exception as err:
+        print(f"Loading fake User-Agents failed, using the default one: {err}")
+        agents = [DEFAULT_HEADERS["User-Agent"]]
+    with _timings_lock:
+        _timings["user_agent_pool_seconds"] = time.perf_counter() - start
+    return itertools.cycle(agents)
+
+
+_user_agents = Shared(load_user_agents)
+_rotation_lock = threading.Lock()
+
+
+def get_user_agents():
+    """Returns the rotation pool of User-Agent strings, building it on first use"""
+    return _user_agents.get()
+
+
+def next_user_agent():
+    """Returns the next User-Agent from the rotation pool"""
+    agents = get_user_agents()
+    with _rotation_lock:
+        return next(agents)
+
+
+@functools.lru_cache(maxsize=None)
+def chrome_options(user_agent, page_load_strategy="normal", block_resources=""):
+    """
+    Returns headless Chrome options for a User-Agent
+
+    The options are only read when a session starts, so one instance per
+    User-Agent in the rotation pool is built and reused.
+
+    :param user_agent: User-Agent string
+    :param page_load_strategy: "normal", "eager" (return once the DOM is ready) or "none"
+    :param block_resources: comma separated names from BLOCKABLE_RESOURCES
+    :return: Options
+    """
+    options = Options()
+    options.set_capability("pageLoadStrategy", page_load_strategy)
+    prefs = {}
+    arguments = list(CHROME_ARGUMENTS)
+    for name in filter(None, (name.strip() for name in block_resources.split(","))):
+        if name not in BLOCKABLE_RESOURCES:
+            print(f"Ignoring unknown resource type to block: {name}")
+            continue
+        resource_prefs, resource_arguments = BLOCKABLE_RESOURCES[name]
+        prefs.update(resource_prefs)
+        arguments += resource_arguments
+    if prefs:
+        options.add_experimental_option("prefs", prefs)
+    for argument in arguments:
+        options.add_argument(argument)
+    # Rotate User-Agents to evade bot detection
+    options.add_argument(f"user-agent={user_agent}")
+    return options
+
+
+def get_driver_timings():
+    """
+    Returns timings of WebDriver session creation
+
+    :return: dict with the one-off user_agent_pool_seconds (None until
+        loaded), the number of sessions started and the total seconds spent
+        on per-session setup (User-Agent and options) and on starting them
+    """
+    with _timings_lock:
+        return dict(_timings)
+
+
+def create_remote_driver():
+    """Starts a new headless Chrome session on the Selenium hub"""
+    get_user_agents()
+    start = time.perf_counter()
+    options = chrome_options(
+        next_user_agent(), config["SELENIUM_PAGE_LOAD_STRATEGY"], config["SELENIUM_BLOCK_RESOURCES"]
+    )
+    setup = time.perf_counter() - start
+
+    print("Starting Chrome WebDriver...")
+    driver = webdriver.Remote(config["SELENIUM_URL"] + "/wd/hub", options=options)
+    driver.set_page_load_timeout(config["SELENIUM_PAGE_LOAD_TIMEOUT"])
+    started = time.perf_counter() - start - setup
+    with _timings_lock:
+        _timings["sessions"] += 1
+        _timings["setup_seconds"] += setup
+        _timings["start_seconds"] += started
+    print(f"Chrome WebDriver started in {started:.2f}s (setup {setup * 1000:.2f}ms).")
+    return driver
+
+
+_pool = Shared(lambda: WebDriverPool(
+    create_remote_driver,
+    size=config["SELENIUM_POOL_SIZE"],
+    max_uses=config["SELENIUM_MAX_USES"],
+    checkout_timeout=config["SELENIUM_CHECKOUT_TIMEOUT"]
+))
+
+
+def get_driver_pool():
+    """Returns the process-wide WebDriver pool, creating it on first use"""
+    return _pool.get()
+
+
+def close_driver_pool():
+    """Quits the pooled sessions and drops the pool; the next search starts a fresh one"""
+    pool = _pool.reset()
+    if pool is not None:
+        pool.close()
+
+
+def fetch_with_browser(url, wait_for=None):
+    """
+    Loads a page in a pooled browser session
+
+    Page loads are cut off after SELENIUM_PAGE_LOAD_TIMEOUT seconds. With the
+    "eager" or "none" page load strategy the results may still be rendering
+    when the load returns, so the page source is read once ``wait_for``
+    matches, or after SELENIUM_WAIT_TIMEOUT seconds.
+
+    :param url: URL to load, paced by the host's rate limiter
+    :param wait_for: CSS selector of the element to wait for
+    :return: rendered page source
+    """
+    get_rate_limiter(url).acquire()
+    with get_driver_pool().session() as driver:
+        try:
+            driver.get(url)
+        except TimeoutException:
+            # Stop whatever is still loading (ads, trackers) and use what has rendered
+            driver.execute_script("window.stop();")
+        if wait_for:
+            try:
+                WebDriverWait(driver, config["SELENIUM_WAIT_TIMEOUT"]).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, wait_for))
+                )
+            except TimeoutException:
+                print(f"Timed out waiting for {wait_for} on {url}")
+        return driver.page_source
+
+
+atexit.register(close_driver_pool)
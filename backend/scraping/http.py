@@ -0,0 +1,83 @@
+"""
+This module fetches result pages over plain HTTP with a pooled session.
+"""
+
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from config import config
+from shared import Shared
+from scraping.ratelimit import backoff_delay, get_rate_limiter
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+def create_http_session():
+    """Builds an HTTP session with a connection pool sized by SCRAPER_HTTP_POOL_SIZE"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=config["SCRAPER_HTTP_POOL_SIZE"],
+        pool_maxsize=config["SCRAPER_HTTP_POOL_SIZE"],
+        # fetch_page retries itself, so every attempt goes through the rate limiter
+        max_retries=0
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+_session = Shared(create_http_session)
+
+
+def get_http_session():
+    """Returns the process-wide HTTP session, creating it on first use"""
+    return _session.get()
+
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def retry_after(response):
+    """Returns the delay a response asks for in its Retry-After header, or 0"""
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", 0)))
+    except ValueError:
+        # HTTP dates are rare enough here to fall back to our own backoff
+        return 0.0
+
+
+def fetch_page(url, timeout=None, retries=None):
+    """
+    Fetches a page over HTTP
+
+    Every attempt waits for the host's rate limiter. Connection errors,
+    timeouts and 429/5xx responses are retried after a jittered backoff
+    (or the server's Retry-After, if longer).
+
+    :param url: URL to fetch
+    :param timeout: request timeout in seconds, defaults to SCRAPER_HTTP_TIMEOUT
+    :param retries: number of retries, defaults to SCRAPER_RETRIES
+    :return: response body as text
+    """
+    timeout = config["SCRAPER_HTTP_TIMEOUT"] if timeout is None else timeout
+    retries = config["SCRAPER_RETRIES"] if retries is None else retries
+    limiter = get_rate_limiter(url)
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        try:
+            response = get_http_session().get(url, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            break
+        time.sleep(max(backoff_delay(attempt), retry_after(response)))
+    response.raise_for_status()
+    return response.text
@@ -0,0 +1,129 @@
+"""
+This module contains the parsers that turn job search result pages into postings.
+
+Parsers are pluggable: subclass ListingParser and register it under a name
+with register_parser to support a new site or page layout.
+"""
+
+import abc
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # pylint: disable=unused-import
+    HTML_FEATURES = "lxml"
+except ImportError:
+    HTML_FEATURES = "html.parser"
+
+
+class ListingParseError(Exception):
+    """Raised when a page does not contain the listings a parser expects"""
+
+
+class ListingParser(abc.ABC):
+    """Interface for parsers turning a results page into a list of postings"""
+
+    name = None
+    # CSS selector of one listing; browsers wait for it before the page is parsed
+    listing_selector = None
+
+    @abc.abstractmethod
+    def iter_parse(self, html, base_url=None):
+        """
+        Parses a results page, yielding postings as they are parsed
+
+        Implementations raise ListingParseError before yielding anything if
+        the page has no listings at all.
+
+        :param html: page source
+        :param base_url: URL the page was fetched from, used to resolve links
+        :return: generator of posting dicts
+        """
+
+    def parse(self, html, base_url=None):
+        """
+        Parses a results page
+
+        :param html: page source
+        :param base_url: URL the page was fetched from, used to resolve links
+        :return: list of posting dicts
+        """
+        return list(self.iter_parse(html, base_url))
+
+
+def clean_text(element):
+    """Returns the visible text of an element with whitespace collapsed"""
+    if element is None:
+        return ""
+    return " ".join(element.get_text(" ").split())
+
+
+def posting_key(posting):
+    """Returns the identity used to deduplicate a posting across pages, sources and searches"""
+    return posting.get("externalId") or posting.get("link") or (
+        posting.get("title"), posting.get("company"), posting.get("location")
+    )
+
+
+class CareerBuilderParser(ListingParser):
+    """Parses careerbuilder.com search result pages"""
+
+    name = "careerbuilder"
+    base_url = "https://www.careerbuilder.com"
+    listing_selector = "li.data-results-content-parent"
+
+    def parse_listing(self, job, base_url):
+        """Parses a single listing element into a posting dict"""
+        anchor = job.select_one("a.data-results-content")
+        if anchor is None or not anchor.get("href"):
+            raise ListingParseError("listing without a link")
+        details = job.select_one("div.data-details")
+        link = urljoin(base_url, anchor["href"])
+        return {
+            "title": clean_text(job.select_one("div.data-results-title")),
+            "company": clean_text(details.select_one("span:nth-child(1)")) if details else "",
+            "location": clean_text(details.select_one("span:nth-child(2)")) if details else "",
+            "type": clean_text(details.select_one("span:nth-child(3)")) if details else "",
+            "link": link,
+            "externalId": link.rstrip("/").split("/")[-1],
+        }
+
+    def iter_parse(self, html, base_url=None):
+        soup = BeautifulSoup(html, HTML_FEATURES)
+        listings = soup.select(self.listing_selector)
+        if not listings:
+            # Bot walls and client-rendered shells come back without listings;
+            # let the caller fall back to a real browser
+            raise ListingParseError("no listings found in page")
+        for job in listings:
+            try:
+                yield self.parse_listing(job, base_url or self.base_url)
+            except ListingParseError as err:
+                print(f"Skipping listing: {err}")
+
+
+PARSERS = {}
+
+
+def register_parser(parser_class):
+    """
+    Registers a parser class under its name
+
+    :param parser_class: ListingParser subclass
+    :return: the parser class, so this can be used as a decorator
+    """
+    PARSERS[parser_class.name] = parser_class
+    return parser_class
+
+
+def get_parser(name):
+    """
+    Returns a parser instance by name
+
+    :param name: registered parser name
+    :return: ListingParser
+    """
+    return PARSERS[name]()
+
+
+register_parser(CareerBuilderParser)
@@ -0,0 +1,235 @@
+"""
+This module runs job searches against one or more job sites and merges the
+results into a single stream of normalized postings.
+
+Sources are pluggable: subclass JobSource and register it under a name with
+register_source to search another site. Each source is paged through in
+order on a bounded worker pool shared by all searches, so several sources
+are scraped at once while every host is still paced by its rate limiter.
+"""
+
+import abc
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import requests
+from config import config
+from shared import Shared
+from scraping.drivers import fetch_with_browser
+from scraping.http import fetch_page
+from scraping.parsers import ListingParseError, get_parser, posting_key
+
+POSTING_FIELDS = ("title", "company", "location", "type", "link", "externalId")
+
+
+class JobSource(abc.ABC):
+    """Interface for job sites that can be searched page by page"""
+
+    name = None
+    # Name of the registered ListingParser for the site's result pages
+    parser = None
+
+    @abc.abstractmethod
+    def page_url(self, keywords, company, location, page):
+        """
+        Builds the URL of one page of search results
+
+        :param keywords: search keywords
+        :param company: company filter
+        :param location: location filter
+        :param page: page number, starting at 1
+        :return: URL string
+        """
+
+    def normalize(self, posting):
+        """
+        Converts a parsed posting to the shape every source produces
+
+        :param posting: dict from the source's parser
+        :return: dict with POSTING_FIELDS as whitespace-collapsed strings
+        """
+        return {field: " ".join(str(posting.get(field) or "").split()) for field in POSTING_FIELDS}
+
+
+class CareerBuilderSource(JobSource):
+    """Searches careerbuilder.com"""
+
+    name = "careerbuilder"
+    parser = "careerbuilder"
+    base_url = "https://www.careerbuilder.com"
+
+    def page_url(self, keywords, company, location, page):
+        params = {"company_name": company, "keywords": keywords, "location": location}
+        if page > 1:
+            params["page_number"] = page
+        return f"{self.base_url}/jobs?{urlencode(params)}"
+
+
+SOURCES = {}
+
+
+def register_source(source_class):
+    """
+    Registers a source class under its name
+
+    :param source_class: JobSource subclass
+    :return: the source class, so this can be used as a decorator
+    """
+    SOURCES[source_class.name] = source_class
+    return source_class
+
+
+def get_sources(names=None):
+    """
+    Returns source instances by name
+
+    :param names: comma separated source names, defaults to SCRAPER_SOURCES
+    :return: list of JobSource
+    """
+    names = config["SCRAPER_SOURCES"] if names is None else names
+    return [SOURCES[name.strip()]() for name in names.split(",") if name.strip()]
+
+
+register_source(CareerBuilderSource)
+
+
+def iter_page(source, url, page, browser):
+    """
+    Yields the postings of one results page
+
+    The page is fetched over HTTP unless ``browser`` is set, falling back to
+    the browser when it cannot be fetched or holds no listings. Past the first
+    page, an HTTP page without listings is taken as the end of the results
+    instead. The fallback happens before any posting is yielded.
+
+    :param source: JobSource being scraped
+    :param url: page URL
+    :param page: page number
+    :param browser: True to skip straight to the browser
+    :return: generator of parsed postings, returning whether the browser was used
+    """
+    parser = get_parser(source.parser)
+    if not browser:
+        try:
+            yield from parser.iter_parse(fetch_page(url), url)
+            return False
+        except ListingParseError as err:
+            if page > 1:
+                return False
+            print(f"HTTP scrape of {url} failed, falling back to the browser: {err}")
+        except requests.RequestException as err:
+            print(f"HTTP scrape of {url} failed, falling back to the browser: {err}")
+    try:
+        yield from parser.iter_parse(fetch_with_browser(url, parser.listing_selector), url)
+    except ListingParseError as err:
+        print(f"No listings found in browser page: {err}")
+    return True
+
+
+class ScrapePipeline:
+    """
+    Scrapes several sources at once into one deduplicated posting stream
+
+    :param sources: list of JobSource
+    :param executor: pool the sources are scraped on
+    :param max_pages: maximum number of result pages read per source
+    """
+
+    def __init__(self, sources, executor, max_pages):
+        self.sources = sources
+        self.executor = executor
+        self.max_pages = max_pages
+
+    def _scrape_source(self, source, query, out, stopped):
+        """Pages through one source for a (keywords, company, location) query, putting normalized postings on the out queue"""
+        browser = not config["SCRAPER_HTTP_FIRST"]
+        seen = set()
+        for page in range(1, self.max_pages + 1):
+            url = source.page_url(*query, page)
+            new = 0
+            pages = iter_page(source, url, page, browser)
+            while True:
+                if stopped.is_set():
+                    pages.close()
+                    return
+                try:
+                    posting = source.normalize(next(pages))
+                except StopIteration as done:
+                    # Once HTTP was blocked, later pages go straight to the browser
+                    browser = done.value
+                    break
+                if posting_key(posting) not in seen:
+                    seen.add(posting_key(posting))
+                    new += 1
+                    out.put(("posting", posting))
+            # Sites repeat their last page past the end of the results
+            if not new:
+                return
+
+    def _run_source(self, source, query, out, stopped):
+        """Runs _scrape_source, reporting on the out queue when it ends"""
+        try:
+            self._scrape_source(source, query, out, stopped)
+            out.put(("done", None))
+        except Exception as err:
+            print(f"Scraping {source.name} failed: {err}")
+            out.put(("error", err))
+
+    def iter_postings(self, keywords, company, location):
+        """
+        Yields postings from all sources as soon as each is parsed
+
+        Postings found by more than one source are yielded once. Closing the
+        generator stops the scrape. If every source fails, the first error is
+        raised once the postings that were found have been yielded.
+
+        :param keywords: search keywords
+        :param company: company filter
+        :param location: location filter
+        :return: generator of posting dicts
+        """
+        out = queue.Queue()
+        stopped = threading.Event()
+        futures = [
+            self.executor.submit(self._run_source, source, (keywords, company, location), out, stopped)
+            for source in self.sources
+        ]
+        errors = []
+        seen = set()
+        try:
+            running = len(futures)
+            while running:
+                kind, value = out.get()
+                if kind == "posting":
+                    if posting_key(value) not in seen:
+                        seen.add(posting_key(value))
+                        yield value
+                    continue
+                running -= 1
+                if kind == "error":
+                    errors.append(value)
+        finally:
+            stopped.set()
+            for future in futures:
+                future.cancel()
+        if errors and len(errors) == len(futures):
+            raise errors[0]
+
+
+_executor = Shared(lambda: ThreadPoolExecutor(max_workers=config["SCRAPER_WORKERS"], thread_name_prefix="scraper"))
+
+
+def get_scrape_executor():
+    """Returns the shared pool that scrapes sources"""
+    return _executor.get()
+
+
+def get_scrape_pipeline(max_pages=None):
+    """
+    Returns a pipeline over the configured sources
+
+    :param max_pages: result pages read per source, defaults to SCRAPER_MAX_PAGES
+    """
+    return ScrapePipeline(get_sources(), get_scrape_executor(), max_pages or config["SCRAPER_MAX_PAGES"])
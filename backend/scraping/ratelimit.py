@@ -0,0 +1,93 @@
+"""
+This module paces requests to job sites with per-host token buckets and
+spaces out retries with jittered exponential backoff.
+"""
+
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+from config import config
+
+
+class RateLimitTimeout(TimeoutError):
+    """Raised when a request could not get a token within its wait limit"""
+
+
+class TokenBucket:
+    """
+    Token bucket allowing ``rate`` requests per second with bursts of ``burst``
+
+    :param rate: tokens added per second
+    :param burst: maximum number of tokens held
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        """Adds the tokens earned since the last update"""
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        """
+        Takes a token, waiting until one is available
+
+        Tokens are reserved in arrival order, so waiting callers are served
+        first come, first served.
+
+        :param timeout: maximum seconds to wait, unbounded when None
+        :return: seconds waited
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if timeout is not None and wait > timeout:
+                raise RateLimitTimeout(f"No request token available within {timeout}s")
+            # Take the token now (possibly going negative) so later callers queue behind us
+            self._tokens -= 1
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_rate_limiter(url):
+    """
+    Returns the token bucket shared by all requests to a URL's host
+
+    :param url: URL about to be requested
+    :return: TokenBucket
+    """
+    host = urlparse(url).hostname or ""
+    with _buckets_lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket(config["SCRAPER_RATE_PER_SECOND"], config["SCRAPER_RATE_BURST"])
+        return _buckets[host]
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """
+    Returns a "full jitter" backoff delay for a retry
+
+    The delay is uniformly random between 0 and min(cap, base * 2^attempt),
+    which spreads out retries from concurrent searches.
+
+    :param attempt: number of attempts made so far, starting at 0
+    :param base: base delay in seconds, defaults to SCRAPER_BACKOFF_BASE
+    :param cap: maximum delay in seconds, defaults to SCRAPER_BACKOFF_CAP
+    :return: seconds to wait
+    """
+    base = config["SCRAPER_BACKOFF_BASE"] if base is None else base
+    cap = config["SCRAPER_BACKOFF_CAP"] if cap is None else cap
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -0,0 +1,101 @@
+"""
+This module coalesces concurrent identical calls into a single execution.
+"""
+
+import threading
+
+
+class _Call:
+    """An in-flight call and the outcome its waiters receive"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.abandoned = False
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time
+
+    Callers arriving while a call for the same key is running wait for it and
+    share its result (or exception) instead of starting their own.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """
+        Runs fn for key, or waits for the call already in flight
+
+        If the call being waited for is abandoned, the waiters start over and
+        one of them runs fn.
+
+        :param key: hashable key identifying equivalent calls
+        :param fn: callable taking no arguments
+        :return: the result of the shared call
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+            if leader:
+                break
+            call.done.wait()
+            if call.abandoned:
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            result = fn()
+        except Exception as err:
+            self.finish(key, call, error=err)
+            raise
+        except BaseException:
+            self.finish(key, call, abandoned=True)
+            raise
+        self.finish(key, call, result)
+        return result
+
+    def lead(self, key):
+        """
+        Claims the call for key without running anything, for callers that produce the result themselves
+
+        The caller must end the call with finish, handing its waiters a
+        result or an error, or abandoning it.
+
+        :param key: hashable key identifying equivalent calls
+        :return: the claimed call, or None if a call for key is already in flight
+        """
+        with self._lock:
+            if key in self._calls:
+                return None
+            call = self._calls[key] = _Call()
+            return call
+
+    def finish(self, key, call, result=None, error=None, abandoned=False):
+        """
+        Ends a call, waking its waiters
+
+        :param key: key the call was claimed for
+        :param call: the call from lead
+        :param result: result handed to the waiters
+        :param error: exception raised in the waiters instead
+        :param abandoned: True to have the waiters start over instead
+        """
+        call.result, call.error, call.abandoned = result, error, abandoned
+        with self._lock:
+            del self._calls[key]
+        call.done.set()
+
+    def in_flight(self, key):
+        """Returns True if a call for key is currently running"""
+        with self._lock:
+            return key in self._calls
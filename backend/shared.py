@@ -0,0 +1,41 @@
+"""
+This module holds process-wide objects (worker pools, sessions, caches) that
+are expensive to build and so are created on first use.
+"""
+
+import threading
+
+
+class Shared:
+    """
+    A process-wide object built by factory on first use
+
+    Concurrent first calls to get build the object only once.
+
+    :param factory: callable taking no arguments that builds the object
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Returns the object, building it if there is none yet"""
+        value = self._value
+        if value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self._factory()
+                value = self._value
+        return value
+
+    def reset(self):
+        """
+        Drops the object, so the next get builds a new one
+
+        :return: the dropped object, or None if there was none
+        """
+        with self._lock:
+            value, self._value = self._value, None
+        return value
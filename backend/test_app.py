@@ -8,7 +8,10 @@ import json
 import datetime
 import pytest
 from app import create_app
+from config import config
 from models import Users
+from scraping.cache import get_search_cache
+from scraping.drivers import close_driver_pool
 
 
 @pytest.fixture()
@@ -20,6 +23,7 @@ def app():
         Flask: The configured Flask application instance.
     """
     app = create_app()
+    get_search_cache().clear()
     return app
 
 
@@ -97,29 +101,26 @@ def test_search(client, mocker):
         client: The Flask test client.
         mocker: Pytest-mock fixture for mocking objects.
     """
-    # Mock the Selenium WebDriver
-    mock_driver = mocker.patch("selenium.webdriver.Remote")
-
-    # Create a mock for div.data-details to handle nested span elements
-    mock_details = mocker.Mock()
-    mock_details.find_element.side_effect = lambda by, value: mocker.Mock(
-        text={
-            "span:nth-child(1)": "Tech Corp",
-            "span:nth-child(2)": "New York, NY",
-            "span:nth-child(3)": "Full-time",
-        }[value]
-    )
+    # Go straight to Selenium instead of trying the HTTP scraper first
+    mocker.patch.dict(config, {"SCRAPER_HTTP_FIRST": False})
 
-    # Mock a single job listing
-    mock_job = mocker.Mock()
-    mock_job.find_element.side_effect = lambda by, value: {
-        "div.data-results-title": mocker.Mock(text="Software Engineer"),
-        "div.data-details": mock_details,
-        "a.data-results-content": mocker.Mock(get_attribute=lambda *args: "https://www.careerbuilder.com/job/123"),
-    }[value]
+    # Mock the Selenium WebDriver and make sure no pooled session from another test is reused
+    close_driver_pool()
+    mock_driver = mocker.patch("selenium.webdriver.Remote")
 
-    # Configure find_elements to return the mock job
-    mock_driver.return_value.__enter__.return_value.find_elements.return_value = [mock_job]
+    # Serve a rendered page with a single job listing
+    mock_driver.return_value.page_source = """
+        <ul>
+          <li class="data-results-content-parent">
+            <a class="data-results-content" href="/job/123">
+              <div class="data-results-title">Software Engineer</div>
+              <div class="data-details">
+                <span>Tech Corp</span><span>New York, NY</span><span>Full-time</span>
+              </div>
+            </a>
+          </li>
+        </ul>
+    """
 
     # Send request with query parameters
     rv = client.get("/search?keywords=engineer&company=Tech&location=New+York")
@@ -142,6 +143,9 @@ def test_search(client, mocker):
         "externalId": "123",
     }
 
+    # Listings are parsed from the page source, not queried element by element
+    mock_driver.return_value.find_elements.assert_not_called()
+
 
 # Test 3: Application Data Retrieval
 def test_get_data(client, user):
@@ -233,6 +237,14 @@ def test_update_application(client, user):
     jdata = json.loads(rv.data.decode("utf-8"))["jobTitle"]
     assert jdata == "fakeJob12345"
 
+    # The id comes from the URL, not the body
+    rv = client.put(
+        "/applications/3", json={"application": {"id": 4, "jobTitle": "renumbered"}}, headers=header
+    )
+    assert rv.status_code == 200
+    assert json.loads(rv.data.decode("utf-8"))["id"] == 3
+    assert [app["id"] for app in Users.objects(id=user.id).first().applications] == [3]
+
 
 # Test 6: Application Deletion
 def test_delete_application(client, user):
@@ -282,3 +294,52 @@ def test_logout(client, user):
     user, header = user
     rv = client.post("/users/logout", headers=header)
     assert rv.status_code == 200
+
+
+# Test 96: Malformed Request Bodies Are Rejected Before Any Database Access
+def test_request_validation(client, mocker, user):
+    """
+    Test that auth and application routes reject malformed or mistyped JSON with a 400 before reading users.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+    """
+    user, header = user
+    objects = mocker.spy(Users, "objects")
+
+    rv = client.post("/users/signup", data="{not json", content_type="application/json")
+    assert rv.status_code == 400
+    assert json.loads(rv.data) == {"error": "Malformed JSON"}
+    rv = client.post("/users/signup", json={"username": "newUser", "password": "pw"})
+    assert json.loads(rv.data) == {"error": "Missing fields in input"}
+    rv = client.post("/users/login", json={"username": "testUser"})
+    assert json.loads(rv.data) == {"error": "Username or password missing"}
+    rv = client.post("/users/login", json={"username": "testUser", "password": 1234})
+    assert json.loads(rv.data) == {"error": "Invalid value for field: password"}
+    rv = client.post("/users/login", json=["testUser", "test"])
+    assert json.loads(rv.data) == {"error": "Expected a JSON object"}
+    assert objects.call_count == 0
+
+    rv = client.post("/applications", headers=header, json={"application": {"title": "Engineer"}})
+    assert json.loads(rv.data) == {"error": "Missing fields in input"}
+    rv = client.post("/applications", headers=header, json={"application": "Engineer"})
+    assert json.loads(rv.data) == {"error": "Invalid value for field: application"}
+    rv = client.put("/applications/3", headers=header, json={"application": {"jobTitle": {"$set": 1}}})
+    assert rv.status_code == 400
+    assert json.loads(rv.data) == {"error": "Invalid value for field: jobTitle"}
+    assert Users.objects(id=user.id).first().applications == []
+
+    rv = client.post(
+        "/applications", headers=header,
+        json={"application": {"title": "Engineer", "company": "Acme", "status": 2, "ignored": "x"}}
+    )
+    assert rv.status_code == 200
+    saved = Users.objects(id=user.id).first().applications
+    assert [(a["title"], a["company"], a["status"]) for a in saved] == [("Engineer", "Acme", 2)]
+    assert "ignored" not in saved[0]
+    rv = client.put("/applications/1", headers=header, json={"application": {"status": "3", "date": "10/19/2026"}})
+    assert rv.status_code == 200
+    saved = Users.objects(id=user.id).first().applications[0]
+    assert (saved["title"], saved["status"], saved["date"]) == ("Engineer", "3", "10/19/2026")
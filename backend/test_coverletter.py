@@ -320,3 +320,35 @@ def test_script_injection_content(client, user):
     content = "<script>alert('XSS')</script>"
     response = client.post("/coverletters", json={"content": content}, headers=headers)
     assert response.status_code == 201
+
+
+def test_long_coverletter_stored_compressed(client, user):
+    """
+    Test that a long cover letter is stored compressed and read back unchanged.
+    """
+    test_user, headers = user
+    content = "Dear Hiring Manager,\n\nI am excited to apply for this role. " * 100
+    response = client.post("/coverletters", json={"content": content, "title": "Long"}, headers=headers)
+    assert response.status_code == 201
+
+    stored = Users.objects(id=test_user.id).first().coverletters[0]["content"]
+    assert isinstance(stored, bytes)
+    assert len(stored) < len(content)
+
+    response = client.get("/coverletters/0", headers=headers)
+    assert response.status_code == 200
+    assert response.json["coverletter"]["content"] == content
+
+
+def test_coverletter_invalid_payload(client, user):
+    """
+    Test that malformed or mistyped cover letter payloads are rejected and nothing is saved.
+    """
+    test_user, headers = user
+    response = client.post("/coverletters", data="{\"content\": ", content_type="application/json", headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Malformed JSON"
+    response = client.post("/coverletters", json={"content": ["Dear"]}, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Invalid value for field: content"
+    assert Users.objects(id=test_user.id).first().coverletters == []
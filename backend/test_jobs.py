@@ -1,13 +1,21 @@
 """
-Test module for search and recommendation endpoints (Tests 30-41)
+Test module for the job search and recommendation endpoints, the local postings store and streamed searches
 """
 
 import hashlib
-
 import json
+import threading
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import pytest
 from app import create_app
-from models import Users, Profile
+from config import config
+from models import Users, Profile, JobPosting
+from postings_store import record_postings
+from profiles import clear_profile_cache
+from routes.jobs import search_jobs, stream_search_jobs
+from scraping.cache import get_search_cache, search_key
 
 
 @pytest.fixture()
@@ -19,6 +27,8 @@ def app():
         Flask: The configured Flask application instance.
     """
     app = create_app()
+    get_search_cache().clear()
+    clear_profile_cache()
     return app
 
 
@@ -84,7 +94,7 @@ def test_search_route(client, mocker):
         mocker: Pytest-mock fixture for mocking objects.
     """
     mocker.patch(
-        "routes.jobs.scrape_careerbuilder_jobs",
+        "routes.jobs.scrape_jobs",
         return_value=[
             {
                 "company": "Scale AI",
@@ -112,7 +122,7 @@ def test_search_route_no_results(client, mocker):
         mocker: Pytest-mock fixture for mocking objects.
     """
     mocker.patch(
-        "routes.jobs.scrape_careerbuilder_jobs",
+        "routes.jobs.scrape_jobs",
         return_value=[]
     )
     rv = client.get("/search?keywords=nonexistent&company=Nonexistent&location=Nowhere")
@@ -132,7 +142,7 @@ def test_get_recommendations_route(client, mocker, user):
         user: The test user and authentication header.
     """
     mocker.patch(
-        "routes.jobs.scrape_careerbuilder_jobs",
+        "routes.jobs.scrape_jobs",
         return_value=[
             {
                 "company": "Scale AI",
@@ -153,6 +163,32 @@ def test_get_recommendations_route(client, mocker, user):
     assert len(data) > 0
 
 
+# Test 102: Default Recommendations Are Ranked and Scored
+def test_get_recommendations_random_mode_ranked(client, mocker, user):
+    """
+    Test that the default random recommendation mode ranks postings against the profile and scores them.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+    """
+    mocker.patch.dict(config, {"RECOMMENDATION_MODE": "random"})
+    mocker.patch("routes.jobs.scrape_jobs", return_value=[
+        {"title": "Pastry Chef", "company": "Bakery", "location": "Paris", "externalId": "chef"},
+        {"title": "Python Developer", "company": "Acme", "location": "New York, NY", "externalId": "py"},
+    ])
+    user, header = user
+    user.profiles = [Profile(skills=["Python"], locations=["New York"])]
+    user.save()
+    rv = client.get("/getRecommendations", headers=header)
+    assert rv.status_code == 200
+    assert rv.headers["X-Partial-Results"] == "false"
+    data = json.loads(rv.data)
+    assert [posting["externalId"] for posting in data] == ["py", "chef"]
+    assert data[0]["score"] > data[1]["score"]
+
+
 # Test 34: Recommendations with No Skills
 def test_get_recommendations_route_no_skills(client, user):
     """
@@ -196,7 +232,7 @@ def test_get_recommendations_route_multiple_job_levels(client, mocker, user):
         user: The test user and authentication header.
     """
     mocker.patch(
-        "routes.jobs.scrape_careerbuilder_jobs",
+        "routes.jobs.scrape_jobs",
         return_value=[
             {
                 "company": "Scale AI",
@@ -227,7 +263,7 @@ def test_search_route_special_characters(client, mocker):
         mocker: Pytest-mock fixture for mocking objects.
     """
     mocker.patch(
-        "routes.jobs.scrape_careerbuilder_jobs",
+        "routes.jobs.scrape_jobs",
         return_value=[
             {
                 "company": "Scale AI",
@@ -256,7 +292,7 @@ def test_get_recommendations_route_multiple_skills(client, mocker, user):
         user: The test user and authentication header.
     """
     mocker.patch(
-        "routes.jobs.scrape_careerbuilder_jobs",
+        "routes.jobs.scrape_jobs",
         return_value=[
             {
                 "company": "Scale AI",
@@ -288,7 +324,7 @@ def test_get_recommendations_route_multiple_locations(client, mocker, user):
         user: The test user and authentication header.
     """
     mocker.patch(
-        "routes.jobs.scrape_careerbuilder_jobs",
+        "routes.jobs.scrape_jobs",
         return_value=[
             {
                 "company": "Scale AI",
@@ -319,7 +355,7 @@ def test_search_route_long_keywords(client, mocker):
         mocker: Pytest-mock fixture for mocking objects.
     """
     mocker.patch(
-        "routes.jobs.scrape_careerbuilder_jobs",
+        "routes.jobs.scrape_jobs",
         return_value=[
             {
                 "company": "Scale AI",
@@ -348,7 +384,7 @@ def test_get_recommendations_route_no_user_data(client, mocker):
         mocker: Pytest-mock fixture for mocking objects.
     """
     mocker.patch(
-        "routes.jobs.scrape_careerbuilder_jobs",
+        "routes.jobs.scrape_jobs",
         return_value=[
             {
                 "company": "Scale AI",
@@ -363,3 +399,166 @@ def test_get_recommendations_route_no_user_data(client, mocker):
     header = {"Authorization": "Bearer invalid"}
     rv = client.get("/getRecommendations", headers=header)
     assert rv.status_code == 500
+
+
+# Test 74: Search Cache Normalizes Queries
+def test_search_route_cached(client, mocker):
+    """
+    Test that equivalent searches are answered from the cache without scraping again.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+    """
+    scrape = mocker.patch(
+        "routes.jobs.scrape_jobs",
+        return_value=[{"title": "Engineer", "link": "https://www.careerbuilder.com/job/1", "externalId": "1"}]
+    )
+    rv = client.get("/search?keywords=Software Engineer&location=New York")
+    assert rv.status_code == 200
+    rv = client.get("/search?keywords=software   engineer&location=NEW YORK")
+    assert rv.status_code == 200
+    assert json.loads(rv.data)[0]["externalId"] == "1"
+    scrape.assert_called_once_with("Software Engineer", "", "New York", config["SCRAPER_MAX_PAGES"])
+    assert search_key("Software Engineer", "", "New York") == search_key(" software engineer", None, "new  york")
+
+
+# Test 82: Local Postings Store Answers Overlapping Searches
+def test_search_from_local_postings(client, mocker):
+    """
+    Test that searches are answered from fresh stored postings and scraped when those run short.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+    """
+    mocker.patch.dict(config, {"POSTINGS_MIN_LOCAL_RESULTS": 2})
+    scrape = mocker.patch("routes.jobs.scrape_jobs", return_value=[
+        {"title": "Senior Python Engineer", "company": "Acme", "location": "Raleigh, NC",
+         "type": "Full-Time", "link": "https://www.careerbuilder.com/job/P1", "externalId": "P1"},
+        {"title": "Python Engineer II", "company": "Acme Labs", "location": "Raleigh, NC",
+         "type": "Full-Time", "link": "https://www.careerbuilder.com/job/P2", "externalId": "P2"},
+        {"title": "Java Engineer", "company": "Acme", "location": "Durham, NC",
+         "type": "Contract", "link": "https://www.careerbuilder.com/job/J1", "externalId": "J1"},
+    ])
+    rv = client.get("/search?keywords=engineer&company=acme")
+    assert rv.status_code == 200
+    assert scrape.call_count == 1
+    assert JobPosting.objects(externalId="P1").first().first_seen is not None
+
+    # An overlapping search is answered from the store
+    rv = client.get("/search?keywords=python engineer&location=raleigh")
+    assert rv.status_code == 200
+    assert sorted(posting["externalId"] for posting in json.loads(rv.data)) == ["P1", "P2"]
+    assert scrape.call_count == 1
+
+    # Postings not seen recently do not count
+    record_postings(scrape.return_value, seen_at=datetime.utcnow() - timedelta(days=2))
+    rv = client.get("/search?keywords=python&company=Acme")
+    assert rv.status_code == 200
+    assert scrape.call_count == 2
+    JobPosting.objects.delete()
+
+
+# Test 85: Streaming Search Results
+def test_search_stream(client, mocker):
+    """
+    Test that search results stream as NDJSON or server-sent events and are cached once complete.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+    """
+    mocker.patch.dict(config, {"POSTINGS_LOCAL_FIRST": False})
+    with open("data/careerbuilder/results.html", encoding="utf-8") as f:
+        fetch = mocker.patch("scraping.pipeline.fetch_page", return_value=f.read())
+
+    rv = client.get("/search/stream?keywords=engineer&location=New York")
+    assert rv.status_code == 200
+    assert rv.mimetype == "application/x-ndjson"
+    lines = rv.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["externalId"] for line in lines][0] == "J3R5G06ZWMK43M198Z2"
+    assert len(lines) == 3
+    fetches = fetch.call_count
+
+    rv = client.get(
+        "/search/stream?keywords=engineer&location=New York", headers={"Accept": "text/event-stream"}
+    )
+    assert rv.mimetype == "text/event-stream"
+    body = rv.get_data(as_text=True)
+    assert body.count("data: ") == 4
+    assert body.endswith('event: done\ndata: {"count": 3}\n\n')
+    assert fetch.call_count == fetches
+
+    rv = client.get("/search/stream")
+    assert rv.status_code == 400
+
+
+# Test 86: Streaming Search Stops When the Client Goes Away
+@pytest.mark.usefixtures("client")
+def test_search_stream_disconnect(mocker):
+    """
+    Test that closing the stream stops the scrape and caches nothing.
+
+    Args:
+        mocker: Pytest-mock fixture for mocking objects.
+    """
+    mocker.patch.dict(config, {"POSTINGS_LOCAL_FIRST": False})
+    parsed = []
+
+    def fake_iter(*_query, **_options):
+        for i in range(100):
+            parsed.append(i)
+            yield {"title": f"Job {i}", "externalId": str(i)}
+
+    mocker.patch("routes.jobs.iter_scraped_jobs", side_effect=fake_iter)
+    stream = stream_search_jobs("streaming", "", "")
+    assert next(stream)["externalId"] == "0"
+    assert next(stream)["externalId"] == "1"
+    stream.close()
+    assert len(parsed) == 2
+    assert get_search_cache().get(search_key("streaming", "", "")) is None
+
+
+# Test 103: Streaming and Plain Searches Share One Scrape
+@pytest.mark.usefixtures("client")
+def test_search_stream_single_flight(mocker):
+    """
+    Test that a search arriving while a streamed search is scraping waits for it instead of scraping again.
+
+    Args:
+        mocker: Pytest-mock fixture for mocking objects.
+    """
+    mocker.patch.dict(config, {"POSTINGS_LOCAL_FIRST": False})
+    release = threading.Event()
+    scrapes = []
+
+    def fake_iter(keywords, *_query, **_options):
+        scrapes.append(keywords)
+        yield {"title": "Job 0", "externalId": "0"}
+        release.wait(5)
+        yield {"title": "Job 1", "externalId": "1"}
+
+    mocker.patch("routes.jobs.iter_scraped_jobs", side_effect=fake_iter)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        stream = stream_search_jobs("coalesced", "", "")
+        assert next(stream)["externalId"] == "0"
+        waiting = pool.submit(search_jobs, "coalesced", "", "")
+        time.sleep(0.1)
+        assert not waiting.done()
+        release.set()
+        assert [posting["externalId"] for posting in stream] == ["1"]
+        assert [posting["externalId"] for posting in waiting.result(5)] == ["0", "1"]
+    assert scrapes == ["coalesced"]
+
+    # A stream closed early hands the search over to the callers waiting on it
+    release.clear()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        stream = stream_search_jobs("abandoned", "", "")
+        next(stream)
+        waiting = pool.submit(search_jobs, "abandoned", "", "")
+        time.sleep(0.1)
+        stream.close()
+        release.set()
+        assert [posting["externalId"] for posting in waiting.result(5)] == ["0", "1"]
+    assert scrapes == ["coalesced", "abandoned", "abandoned"]
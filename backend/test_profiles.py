@@ -6,8 +6,14 @@ import hashlib
 
 import json
 import pytest
+import routes.profile
 from app import create_app
-from models import Users, Profile
+from models import JobPosting, Users, Profile, VocabularyTerm
+from postings_store import record_postings
+from profiles import (
+    ProfileView, clear_profile_cache, get_user_profiles, invalidate_vocabulary, normalize_term, seed_aliases
+)
+from recommendations import profile_fingerprint
 
 
 @pytest.fixture()
@@ -19,6 +25,7 @@ def app():
         Flask: The configured Flask application instance.
     """
     app = create_app()
+    clear_profile_cache()
     return app
 
 
@@ -413,3 +420,170 @@ def test_create_multiple_profiles(client, user):
     assert len(updated_user.profiles) == 2
     assert updated_user.profiles[0].profileName == "Profile 1"
     assert updated_user.profiles[1].profileName == "Profile 2"
+
+
+# Test 93: Profile Terms Are Normalized Into a Shared Vocabulary
+def test_profile_vocabulary(client, user):
+    """
+    Test that profile and posting terms are recorded once in the vocabulary and resolved through it.
+
+    Args:
+        client: The Flask test client.
+        user: The test user and authentication header.
+    """
+    user, header = user
+    JobPosting.objects.delete()
+    VocabularyTerm.objects.delete()
+    invalidate_vocabulary()
+    assert normalize_term("skill", "  Golang ") == "go"
+    assert normalize_term("location", "Raleigh ,NC") == "raleigh, nc"
+    assert normalize_term("job_level", "Sr.") == "senior"
+
+    view = ProfileView(0, Profile(skills=["Python", "python3", " "], locations=["NYC", "New York, NY"]))
+    assert view.skills == ("python",)
+    assert view.location_ids == frozenset({"location:new york, ny"})
+    other = ProfileView(1, Profile(skills=["PYTHON", "Go"], locations=["Remote"]))
+    assert view.skill_ids & other.skill_ids == {"skill:python"}
+
+    # Saving profiles and postings writes only the terms not yet in the vocabulary
+    rv = client.post("/createProfile", headers=header, json={"profileName": "A", "skills": ["Python", "SQL"]})
+    assert rv.status_code == 201
+    rv = client.post("/updateProfile/0", headers=header, json={"skills": ["python3", "Go"], "locations": ["NYC"]})
+    assert rv.status_code == 200
+    record_postings([
+        {"externalId": "1", "title": "Dev", "company": "A", "location": "Raleigh, NC (Onsite)"},
+        {"externalId": "2", "title": "Dev", "company": "B", "location": "new york,  NY"},
+    ])
+    terms = {term.id: term.label for term in VocabularyTerm.objects}
+    assert terms == {
+        "skill:python": "Python", "skill:sql": "SQL", "skill:go": "Go",
+        "location:new york, ny": "NYC", "location:raleigh, nc": "Raleigh, NC"
+    }
+
+    # Aliases stored in the collection resolve once the snapshot is reloaded
+    before = profile_fingerprint(Profile(skills=["Postgres"]))
+    seed_aliases({"skill": {"postgres": "PostgreSQL", "psql": "PostgreSQL"}})
+    assert normalize_term("skill", "PSQL") == "postgresql"
+    term = VocabularyTerm.objects(id="skill:postgresql").first()
+    assert (term.label, sorted(term.aliases)) == ("PostgreSQL", ["postgres", "psql"])
+    assert profile_fingerprint(Profile(skills=["Postgres"])) != before
+    assert profile_fingerprint(Profile(skills=["Postgres"])) == profile_fingerprint(Profile(skills=["postgresql"]))
+
+    VocabularyTerm.objects.delete()
+    invalidate_vocabulary()
+    result = client.application.test_cli_runner().invoke(args=["build-vocabulary"])
+    assert "Recorded the terms of 1 profiles and 2 postings" in result.output
+    assert VocabularyTerm.objects(id="skill:go").first().aliases == ["golang"]
+    assert VocabularyTerm.objects(id="location:raleigh, nc").count() == 1
+    VocabularyTerm.objects.delete()
+    invalidate_vocabulary()
+
+
+# Test 94: Cached Profile Views Are Invalidated by Profile Edits
+def test_profile_cache_invalidation(client, user):
+    """
+    Test that cached profile views are reused until a profile route changes the profiles.
+
+    Args:
+        client: The Flask test client.
+        user: The test user and authentication header.
+    """
+    user, header = user
+    user.profiles.append(Profile(profileName="A", skills=["Java"]))
+    user.save()
+    cached = get_user_profiles(user.id)
+    assert cached.views[0].skills == ("java",)
+    assert get_user_profiles(str(user.id)) is cached
+
+    # Writes that bypass the profile routes are not seen until the entry expires
+    Users.objects(id=user.id).update(set__default_profile=0)
+    assert get_user_profiles(user.id) is cached
+
+    client.post("/updateProfile", headers=header, json={"skills": ["Rust"]})
+    assert get_user_profiles(user.id).views[0].skills == ("rust",)
+
+    client.post("/createProfile", headers=header, json={"profileName": "B"})
+    assert len(get_user_profiles(user.id).views) == 2
+
+    client.post("/setDefaultProfile/1", headers=header)
+    assert get_user_profiles(user.id).default_profile == 1
+    assert get_user_profiles(12345) is None
+
+
+# Test 95: Profile Edits Are Atomic Field Updates
+def test_update_profile_atomic(client, mocker, user):
+    """
+    Test that profile edits only write the posted fields, keep concurrent writes and validate values.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+    """
+    user, header = user
+    user.profiles = [Profile(profileName="A", skills=["Java"], phone_number="555")]
+    user.save()
+    field_updates = routes.profile.field_updates
+
+    def concurrent_write(*args, **kwargs):
+        # An application saved while the profile edit is in flight
+        Users.objects(id=user.id).update(push__applications={"id": 1, "jobTitle": "Engineer"})
+        return field_updates(*args, **kwargs)
+
+    mocker.patch("routes.profile.field_updates", side_effect=concurrent_write)
+    rv = client.post("/updateProfile/0", headers=header, json={"skills": ["Go"], "phone_number": None})
+    assert rv.status_code == 200
+    updated = Users.objects(id=user.id).first()
+    assert updated.applications == [{"id": 1, "jobTitle": "Engineer"}]
+    assert updated.profiles[0].skills == ["Go"]
+    assert updated.profiles[0].profileName == "A"
+    assert updated.profiles[0].phone_number is None
+
+    rv = client.post("/updateProfile/0", headers=header, json={"skills": "Go"})
+    assert rv.status_code == 400
+    assert json.loads(rv.data) == {"error": "Invalid value for field: skills"}
+    rv = client.post("/updateProfile", headers=header, json={"password": "hunter2"})
+    assert rv.status_code == 400
+    assert json.loads(rv.data) == {"error": "Invalid field: password"}
+    rv = client.post("/createProfile", headers=header, json={"skills": [1, 2]})
+    assert rv.status_code == 400
+    rv = client.post("/createProfile", headers=header, json=["profileName"])
+    assert rv.status_code == 400
+    assert Users.objects(id=user.id).first().profiles[0].skills == ["Go"]
+    assert len(Users.objects(id=user.id).first().profiles) == 1
+
+
+# Test 97: Profile Bodies Are Validated Before the User Is Loaded
+def test_profile_request_validation(client, mocker, user):
+    """
+    Test that malformed or mistyped profile bodies are rejected without touching the database.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+    """
+    user, header = user
+    user.profiles = [Profile(profileName="A", skills=["Java"])]
+    user.save()
+    objects = mocker.spy(Users, "objects")
+    field_updates = mocker.spy(routes.profile, "field_updates")
+
+    rv = client.post("/updateProfile", headers=header, data="{\"skills\": [", content_type="application/json")
+    assert rv.status_code == 400
+    assert json.loads(rv.data) == {"error": "Malformed JSON"}
+    rv = client.post("/updateProfile", headers=header, json={"skills": None})
+    assert json.loads(rv.data) == {"error": "Invalid value for field: skills"}
+    rv = client.post("/updateProfile", headers=header, json={"fullName": ["A", "B"]})
+    assert json.loads(rv.data) == {"error": "Invalid value for field: fullName"}
+    rv = client.post("/createProfile", headers=header, json={"profileName": "B", "fullName": "Someone"})
+    assert json.loads(rv.data) == {"error": "Invalid field: fullName"}
+    assert objects.call_count == 0
+    assert field_updates.call_count == 0
+
+    rv = client.post("/updateProfile", headers=header, json={"fullName": "New Name", "locations": ["Raleigh"]})
+    assert rv.status_code == 200
+    assert json.loads(rv.data)["fullName"] == "New Name"
+    updated = Users.objects(id=user.id).first()
+    assert updated.profiles[0].locations == ["Raleigh"]
+    assert updated.profiles[0].skills == ["Java"]
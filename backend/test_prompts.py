@@ -0,0 +1,243 @@
+"""
+Test module for prompt building within the token budget and batched feedback regeneration
+"""
+
+import hashlib
+from io import BytesIO
+import json
+import pytest
+from bson import ObjectId
+from app import create_app
+from config import config
+from db import get_collection
+from models import Users
+from prompts import build_prompt, estimate_tokens, normalize_text, truncate_by_priority
+
+
+@pytest.fixture()
+def app():
+    """
+    Fixture to create a test instance of the Flask application.
+
+    Returns:
+        Flask: The configured Flask application instance.
+    """
+    app = create_app()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    """
+    Fixture to provide a test client for the Flask application.
+
+    Args:
+        app: The Flask application instance provided by the app fixture.
+
+    Yields:
+        FlaskClient: The test client for making HTTP requests.
+    """
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture
+def user(client):
+    """
+    Fixture to create a test user and authenticate them.
+
+    Args:
+        client: The Flask test client provided by the client fixture.
+
+    Yields:
+        tuple: A tuple containing the user object and authentication header.
+    """
+    data = {"username": "testUser", "password": "test", "fullName": "fullName"}
+    user = Users(
+        id=1,
+        fullName=data["fullName"],
+        username=data["username"],
+        password=hashlib.md5(data["password"].encode()).hexdigest(),
+        authTokens=[],
+        email="",
+        applications=[],
+        resumes=[],
+        coverletters=[],
+        resumeFeedbacks=[],
+        profiles=[],
+        default_profile=0
+    )
+    user.save()
+    rv = client.post("/users/login", json=data)
+    jdata = json.loads(rv.data.decode("utf-8"))
+    header = {"Authorization": "Bearer " + jdata["token"]}
+    yield user, header
+    user.delete()
+
+
+# Test 59: Prompt Normalization
+def test_prompt_normalize_text():
+    """
+    Test that page break markers, repeated headers and extra whitespace are removed.
+    """
+    text = "Jane Doe\n\nEXPERIENCE\nEngineer   at   ACME\n\n[PAGE BREAK]\n\nJane Doe\nEDUCATION\n"
+    normalized = normalize_text(text)
+    assert "[PAGE BREAK]" not in normalized
+    assert normalized.count("Jane Doe") == 1
+    assert "Engineer at ACME" in normalized
+
+
+# Test 98: Prompt Normalization Keeps Repeated Body Lines
+def test_prompt_normalize_keeps_repeated_lines():
+    """
+    Test that only running headers are removed, not titles or bullets that repeat between jobs.
+    """
+    text = (
+        "Jane Doe\nEXPERIENCE\nSoftware Engineer\nACME\n- Built APIs\n[PAGE BREAK]"
+        "Jane Doe\nSoftware Engineer\nGlobex\n- Built APIs\nPage footer\n"
+    )
+    normalized = normalize_text(text).splitlines()
+    assert normalized.count("Jane Doe") == 1
+    assert normalized.count("Software Engineer") == 2
+    assert normalized.count("- Built APIs") == 2
+    assert normalized.index("Globex") > normalized.index("ACME")
+
+
+# Test 60: Prompt Truncation by Section Priority
+def test_prompt_truncate_by_priority():
+    """
+    Test that an oversized resume is fit into the budget, keeping high priority sections.
+    """
+    experience = "\n".join(f"Shipped feature {i} and improved latency by {i}%" for i in range(200))
+    text = f"Jane Doe\njane@example.com\nEXPERIENCE\n{experience}\nINTERESTS\nChess\nEDUCATION\nBS Computer Science"
+    fitted = truncate_by_priority(normalize_text(text), 200)
+    assert estimate_tokens(fitted) <= 200
+    assert "Jane Doe" in fitted
+    assert "BS Computer Science" in fitted
+    assert "Shipped feature 0" in fitted
+
+
+# Test 61: Prompt Map-Reduce Summarization
+def test_prompt_summarize_strategy(mocker):
+    """
+    Test that the summarize strategy condenses chunks through the summarizer and stays within budget.
+
+    Args:
+        mocker: Pytest-mock fixture for mocking objects.
+    """
+    mocker.patch.dict(config, {"PROMPT_STRATEGY": "summarize"})
+    text = "\n\n".join(f"Project {i}: built a distributed system serving many users" for i in range(300))
+    calls = []
+
+    def summarize(chunk):
+        calls.append(chunk)
+        return chunk.splitlines()[0]
+
+    prompt = build_prompt("Head:\n", text, "\nTail", budget=300, summarize=summarize)
+    assert len(calls) > 1
+    assert prompt.startswith("Head:\n") and prompt.endswith("\nTail")
+    assert estimate_tokens(prompt) <= 300 + 2
+
+
+# Test 62: Resume Upload Prompt Stays Within Budget
+def test_resume_upload_prompt_budget(client, mocker, user):
+    """
+    Test that the feedback prompt sent to the model respects the configured token budget.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+    """
+    invoke = mocker.patch(
+        "langchain_ollama.OllamaLLM.invoke",
+        return_value="Resume Feedback\n\n- Add more quantifiable achievements."
+    )
+    mocker.patch("routes.resume.extract_pdf_text", return_value="Jane Doe\n" + "word " * 20000)
+    _, header = user
+    with open("data/sample-resume.pdf", "rb") as f:
+        data = dict(file=(BytesIO(f.read()), "sample-resume.pdf"))
+    rv = client.post(
+        "/resume", headers=header, content_type="multipart/form-data", data=data
+    )
+    assert rv.status_code == 200
+    prompt = invoke.call_args[0][0]
+    assert "[PAGE BREAK]" not in prompt
+    assert estimate_tokens(prompt) <= config["PROMPT_TOKEN_BUDGET"] + 2
+
+
+# Test 63: Batched Feedback Regeneration
+def test_regenerate_feedback_command(app, client, mocker, user, tmp_path):
+    """
+    Test that the regenerate-feedback command rewrites stored feedback and clears its checkpoint.
+
+    Args:
+        app: The Flask application instance.
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+        tmp_path: Pytest temporary directory.
+    """
+    invoke = mocker.patch("langchain_ollama.OllamaLLM.invoke", return_value="Old feedback")
+    user, header = user
+    with open("data/sample-resume.pdf", "rb") as f:
+        data = dict(file=(BytesIO(f.read()), "sample-resume.pdf"))
+    rv = client.post(
+        "/resume", headers=header, content_type="multipart/form-data", data=data
+    )
+    assert rv.status_code == 200
+
+    invoke.return_value = "New feedback"
+    checkpoint = tmp_path / "checkpoint.json"
+    result = app.test_cli_runner().invoke(
+        args=["regenerate-feedback", "--workers", "0", "--checkpoint", str(checkpoint)]
+    )
+    assert result.exit_code == 0, result.output
+    assert "resumes/minute" in result.output
+    assert not checkpoint.exists()
+
+    rv = client.get("/resume-feedback/0", headers=header)
+    assert json.loads(rv.data.decode("utf-8"))["feedback"] == "New feedback"
+
+
+# Test 99: Regeneration Skips Users Whose Resumes Changed
+def test_regenerate_feedback_skips_changed_users(app, client, mocker, user, tmp_path):
+    """
+    Test that feedback is not counted or written for users whose resumes change while it is generated.
+
+    Args:
+        app: The Flask application instance.
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+        tmp_path: Pytest temporary directory.
+    """
+    invoke = mocker.patch("langchain_ollama.OllamaLLM.invoke", return_value="Old feedback")
+    user, header = user
+    with open("data/sample-resume.pdf", "rb") as f:
+        data = dict(file=(BytesIO(f.read()), "sample-resume.pdf"))
+    rv = client.post(
+        "/resume", headers=header, content_type="multipart/form-data", data=data
+    )
+    assert rv.status_code == 200
+
+    def upload_during_generation(_prompt):
+        # Another resume is uploaded while every generation is in flight
+        get_collection(Users).update_one({"_id": user.id}, {"$push": {"resumes": ObjectId()}})
+        return "New feedback"
+
+    invoke.reset_mock()
+    invoke.side_effect = upload_during_generation
+    result = app.test_cli_runner().invoke(
+        args=["regenerate-feedback", "--workers", "0", "--checkpoint", str(tmp_path / "checkpoint.json")]
+    )
+    assert result.exit_code == 0, result.output
+    assert invoke.call_count == 2
+    assert f"Skipped users whose resumes changed during the run: {user.id}" in result.output
+    assert "Done: 0 resumes" in result.output
+
+    rv = client.get("/resume-feedback/0", headers=header)
+    assert json.loads(rv.data.decode("utf-8"))["feedback"] == "Old feedback"
@@ -0,0 +1,262 @@
+"""
+Test module for fan-out recommendations, precomputed feeds, the scheduler and relevance scoring
+"""
+
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+import pytest
+from app import create_app
+from models import Users, Profile, RecommendationFeed
+from profiles import clear_profile_cache, invalidate_user_profiles
+from recommendations import build_queries, recommend
+from scoring import rank_postings, score_matrix, tokenize, top_k
+from scheduler import acquire_lease, hold_lease
+from scraping.cache import get_search_cache
+
+
+@pytest.fixture()
+def app():
+    """
+    Fixture to create a test instance of the Flask application.
+
+    Returns:
+        Flask: The configured Flask application instance.
+    """
+    app = create_app()
+    get_search_cache().clear()
+    clear_profile_cache()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    """
+    Fixture to provide a test client for the Flask application.
+
+    Args:
+        app: The Flask application instance provided by the app fixture.
+
+    Yields:
+        FlaskClient: The test client for making HTTP requests.
+    """
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture
+def user(client):
+    """
+    Fixture to create a test user and authenticate them.
+
+    Args:
+        client: The Flask test client provided by the client fixture.
+
+    Yields:
+        tuple: A tuple containing the user object and authentication header.
+    """
+    data = {"username": "testUser", "password": "test", "fullName": "fullName"}
+    user = Users(
+        id=1,
+        fullName=data["fullName"],
+        username=data["username"],
+        password=hashlib.md5(data["password"].encode()).hexdigest(),
+        authTokens=[],
+        email="",
+        applications=[],
+        resumes=[],
+        coverletters=[],
+        resumeFeedbacks=[],
+        profiles=[],
+        default_profile=0
+    )
+    user.save()
+    rv = client.post("/users/login", json=data)
+    jdata = json.loads(rv.data.decode("utf-8"))
+    header = {"Authorization": "Bearer " + jdata["token"]}
+    yield user, header
+    user.delete()
+
+
+# Test 78: Fan-out Recommendations Merge, Deduplicate and Rank
+def test_get_recommendations_fanout(client, mocker, user):
+    """
+    Test that fan-out recommendations search every combination and rank the merged postings.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+    """
+    postings = {
+        "python": {"title": "Python Developer", "location": "Raleigh, NC", "externalId": "py"},
+        "java": {"title": "Java Engineer", "location": "Austin, TX", "externalId": "java"},
+        "shared": {"title": "Engineer", "location": "Remote", "externalId": "shared"},
+    }
+
+    pages = set()
+
+    def fake_scrape(keywords, _company, _location, max_pages):
+        pages.add(max_pages)
+        skill = keywords.split()[0].lower()
+        return [postings["shared"], postings[skill]]
+
+    scrape = mocker.patch("routes.jobs.scrape_jobs", side_effect=fake_scrape)
+    user, header = user
+    user.profiles = [Profile(skills=["Python", "Java"], locations=["Raleigh, NC", "Austin, TX"])]
+    user.save()
+    rv = client.get("/getRecommendations?mode=fanout", headers=header)
+    assert rv.status_code == 200
+    assert rv.headers["X-Partial-Results"] == "false"
+    data = json.loads(rv.data)
+    assert scrape.call_count == 4
+    # Fan-out searches read only the first result page
+    assert pages == {1}
+    assert sorted(posting["externalId"] for posting in data) == ["java", "py", "shared"]
+    assert data[-1]["externalId"] == "shared"
+
+
+# Test 79: Fan-out Recommendations Respect the Time Budget
+def test_recommend_time_budget():
+    """
+    Test that searches still running when the budget runs out are dropped from the results.
+    """
+    release = threading.Event()
+    profile = Profile(skills=["Python", "Slow"], locations=["Raleigh"], job_levels=["Senior", "Junior"])
+    assert build_queries(profile, max_queries=3) == [
+        ("python senior", "raleigh"), ("python junior", "raleigh"), ("slow senior", "raleigh")
+    ]
+
+    def search(keywords, _company, _location):
+        if keywords.startswith("slow"):
+            release.wait(5)
+        return [{"title": keywords, "externalId": keywords}]
+
+    results, partial = recommend(profile, search, budget=0.2)
+    release.set()
+    assert partial
+    assert sorted(posting["externalId"] for posting in results) == ["python junior", "python senior"]
+
+
+# Test 80: Precomputed Recommendation Feeds
+def test_refresh_recommendation_feeds(app, client, mocker, user):
+    """
+    Test that feeds are only recomputed for changed profiles and served without scraping.
+
+    Args:
+        app: The Flask application instance.
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+    """
+    scrape = mocker.patch(
+        "routes.jobs.scrape_jobs",
+        side_effect=lambda keywords, company, location, max_pages: [
+            {"title": f"{keywords} role", "location": location, "externalId": keywords}
+        ]
+    )
+    user, header = user
+    user.profiles = [Profile(skills=["Python"], locations=["Raleigh"])]
+    user.save()
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=["refresh-recommendations"])
+    assert result.exit_code == 0, result.output
+    assert "Refreshed 1 feeds, 0 unchanged" in result.output
+    result = runner.invoke(args=["refresh-recommendations"])
+    assert "Refreshed 0 feeds, 1 unchanged" in result.output
+    assert scrape.call_count == 1
+
+    rv = client.get("/getRecommendations", headers=header)
+    assert rv.status_code == 200
+    data = json.loads(rv.data)
+    assert [posting["externalId"] for posting in data] == ["python"]
+    assert data[0]["score"] > 0
+    assert scrape.call_count == 1
+
+    # A changed profile no longer matches its feed until the next run
+    user.profiles[0].skills = ["Go"]
+    user.save()
+    invalidate_user_profiles(user.id)
+    get_search_cache().clear()
+    rv = client.get("/getRecommendations?mode=fanout", headers=header)
+    assert [posting["externalId"] for posting in json.loads(rv.data)] == ["go"]
+    result = runner.invoke(args=["refresh-recommendations"])
+    assert "Refreshed 1 feeds, 0 unchanged" in result.output
+
+    # A feed past RECOMMENDATION_FEED_MAX_AGE is recomputed when requested
+    RecommendationFeed.objects(user_id=user.id).update(set__updated_at=datetime.utcnow() - timedelta(days=2))
+    get_search_cache().clear()
+    calls = scrape.call_count
+    rv = client.get("/getRecommendations", headers=header)
+    assert [posting["externalId"] for posting in json.loads(rv.data)] == ["go"]
+    assert scrape.call_count == calls + 1
+    assert RecommendationFeed.objects(user_id=user.id).first().updated_at > datetime.utcnow() - timedelta(minutes=1)
+    RecommendationFeed.objects(user_id=user.id).delete()
+
+
+# Test 81: Scheduler Lease Held by One Process
+@pytest.mark.usefixtures("client")
+def test_scheduler_lease():
+    """
+    Test that only one process at a time holds a job's lease.
+    """
+    assert acquire_lease("test-job", 60, owner="worker-1")
+    assert acquire_lease("test-job", 60, owner="worker-1")
+    assert not acquire_lease("test-job", 60, owner="worker-2")
+    assert acquire_lease("test-job", -1, owner="worker-1")
+    assert acquire_lease("test-job", 60, owner="worker-2")
+
+
+# Test 101: Scheduler Lease Is Renewed During Long Runs
+@pytest.mark.usefixtures("client")
+def test_scheduler_lease_renewal():
+    """
+    Test that a lease held around a run that outlasts its ttl is not taken over by another process.
+    """
+    assert acquire_lease("long-job", 0.3, owner="worker-1")
+    with hold_lease("long-job", 0.3, owner="worker-1") as lost:
+        time.sleep(0.6)
+        assert not acquire_lease("long-job", 0.3, owner="worker-2")
+        assert not lost.is_set()
+    time.sleep(0.4)
+    assert acquire_lease("long-job", 0.3, owner="worker-2")
+
+    # A run whose lease was taken over is told to stop
+    with hold_lease("long-job", 0.3, owner="worker-1") as lost:
+        assert lost.wait(1)
+
+
+# Test 83: Vectorized Posting Relevance Scoring
+def test_score_postings():
+    """
+    Test that TF-IDF scoring ranks postings by their overlap with a profile's skills.
+    """
+    assert tokenize("Senior C++ Engineer\nNode.js") == [
+        "senior", "c++", "engineer", "senior c++", "c++ engineer", "node.js"
+    ]
+    postings = [
+        {"title": "Office Manager", "location": "Austin, TX"},
+        {"title": "Machine Learning Engineer", "location": "Raleigh, NC"},
+        {"title": "Python Developer", "location": "Raleigh, NC"},
+        {"title": "Senior Python Machine Learning Engineer", "location": "Raleigh, NC"},
+    ]
+    profile = Profile(skills=["Python", "Machine Learning"], locations=["Raleigh, NC"], job_levels=["Senior"])
+    ranked = rank_postings(postings, profile)
+    assert [posting["title"] for posting, _ in ranked][0] == "Senior Python Machine Learning Engineer"
+    assert ranked[-1][0]["title"] == "Office Manager"
+    assert ranked[-1][1] == 0
+
+    scores = score_matrix(["python developer", "java developer", "go developer"], ["python", "java go"])
+    assert scores.shape == (3, 2)
+    best = top_k(scores, 1)
+    assert len(best) == 2
+    rows, values = best[0]
+    rows2 = best[1][0]
+    assert list(rows) == [0] and values[0] > 0.5
+    assert list(rows2) in ([1], [2])
@@ -1,14 +1,15 @@
 """
-Test module for resume-related endpoints (Tests 9-29)
+Test module for resume-related endpoints (Tests 9-29), match scores and cover letter generation
 """
 
 import hashlib
 from io import BytesIO
-
 import json
+import httpx
 import pytest
 from app import create_app
 from models import Users
+from ollama import ResponseError
 
 
 @pytest.fixture()
@@ -834,3 +835,92 @@ def test_resume_delete_multiple_invalid(client, mocker, user):
     assert rv.status_code == 200
     rv = client.delete("/resume/3", headers=header)
     assert rv.status_code == 400
+
+
+# Test 84: Resume to Application Match Scores
+def test_resume_matches(client, mocker, user):
+    """
+    Test that applications are ranked against a resume with each text embedded only once.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+    """
+    vocabulary = ["healthcare", "training", "chef"]
+
+    def fake_embed(_self, texts):
+        return [[float(text.lower().count(word)) + 0.01 for word in vocabulary] for text in texts]
+
+    mocker.patch("langchain_ollama.OllamaLLM.invoke", return_value="Resume Feedback")
+    embed = mocker.patch("langchain_ollama.OllamaEmbeddings.embed_documents", autospec=True, side_effect=fake_embed)
+    user, header = user
+    with open("data/sample-resume.pdf", "rb") as f:
+        data = dict(file=(BytesIO(f.read()), "resume.pdf"))
+    rv = client.post("/resume", headers=header, content_type="multipart/form-data", data=data)
+    resume_id = json.loads(rv.data.decode("utf-8"))["id"]
+
+    user.reload()
+    user.applications = [
+        {"id": 1, "title": "Line Chef", "company": "Bistro"},
+        {"id": 2, "title": "Healthcare Training Specialist", "company": "General Hospital"},
+        {"id": 3, "jobTitle": "Software Sales Representative", "companyName": "Acme"},
+    ]
+    user.save()
+
+    rv = client.get(f"/resume/id/{resume_id}/matches", headers=header)
+    assert rv.status_code == 200
+    jdata = json.loads(rv.data.decode("utf-8"))
+    assert jdata["resume"]["id"] == resume_id
+    assert [match["application"]["id"] for match in jdata["matches"]] == [2, 3, 1]
+    assert jdata["matches"][0]["score"] > jdata["matches"][-1]["score"]
+    # One batch for the applications, one for the resume
+    assert embed.call_count == 2
+
+    # Cached vectors are reused; only the new application is embedded
+    user.applications = user.applications + [{"id": 4, "title": "Pastry Chef"}]
+    user.save()
+    rv = client.get("/resume/0/matches?limit=2", headers=header)
+    assert rv.status_code == 200
+    assert len(json.loads(rv.data.decode("utf-8"))["matches"]) == 2
+    assert embed.call_count == 3
+    assert embed.call_args[0][1] == ["Pastry Chef"]
+
+    rv = client.get("/resume/0/matches?limit=0", headers=header)
+    assert rv.status_code == 400
+
+    # Model errors and an unreachable Ollama are reported as unavailable
+    user.applications = user.applications + [{"id": 5, "title": "Sous Chef"}]
+    user.save()
+    for error in (ResponseError("model not found", 404), httpx.ConnectError("connection refused")):
+        embed.side_effect = error
+        rv = client.get("/resume/0/matches", headers=header)
+        assert rv.status_code == 503
+
+
+# Test 104: Cover Letter Generation Validates Its Body
+def test_generate_cover_letter(client, mocker, user):
+    """
+    Test that cover letters are generated from a resume and that malformed bodies are rejected.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+    """
+    invoke = mocker.patch("langchain_ollama.OllamaLLM.invoke", return_value="Dear Hiring Manager")
+    user, header = user
+    with open("data/sample-resume.pdf", "rb") as f:
+        data = dict(file=(BytesIO(f.read()), "resume.pdf"))
+    client.post("/resume", headers=header, content_type="multipart/form-data", data=data)
+
+    rv = client.post("/cover_letter/0", headers=header, json={"job_description": "Line chef at a bistro"})
+    assert rv.status_code == 200
+    assert json.loads(rv.data.decode("utf-8"))["response"] == "Dear Hiring Manager"
+    assert "Line chef at a bistro" in invoke.call_args[0][0]
+
+    rv = client.post("/cover_letter/0", headers=header, json={"job_description": ["chef"]})
+    assert rv.status_code == 400
+    assert json.loads(rv.data.decode("utf-8"))["error"] == "Invalid value for field: job_description"
+    rv = client.post("/cover_letter/0", headers=header, data="not json", content_type="application/json")
+    assert rv.status_code == 400
@@ -0,0 +1,358 @@
+"""
+Test module for resume storage: downloads, metadata listing, deletion, deduplicated and compressed blobs
+"""
+
+import hashlib
+from io import BytesIO
+import json
+import pytest
+from bson import ObjectId
+from mongoengine.connection import get_db
+from app import create_app
+from config import config
+from db import get_fs
+from models import Users
+from resume_store import release_blob, retain_blob
+from routes.resume import delete_resume
+
+
+@pytest.fixture()
+def app():
+    """
+    Fixture to create a test instance of the Flask application.
+
+    Returns:
+        Flask: The configured Flask application instance.
+    """
+    app = create_app()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    """
+    Fixture to provide a test client for the Flask application.
+
+    Args:
+        app: The Flask application instance provided by the app fixture.
+
+    Yields:
+        FlaskClient: The test client for making HTTP requests.
+    """
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+@pytest.fixture
+def user(client):
+    """
+    Fixture to create a test user and authenticate them.
+
+    Args:
+        client: The Flask test client provided by the client fixture.
+
+    Yields:
+        tuple: A tuple containing the user object and authentication header.
+    """
+    data = {"username": "testUser", "password": "test", "fullName": "fullName"}
+    user = Users(
+        id=1,
+        fullName=data["fullName"],
+        username=data["username"],
+        password=hashlib.md5(data["password"].encode()).hexdigest(),
+        authTokens=[],
+        email="",
+        applications=[],
+        resumes=[],
+        coverletters=[],
+        resumeFeedbacks=[],
+        profiles=[],
+        default_profile=0
+    )
+    user.save()
+    rv = client.post("/users/login", json=data)
+    jdata = json.loads(rv.data.decode("utf-8"))
+    header = {"Authorization": "Bearer " + jdata["token"]}
+    yield user, header
+    user.delete()
+
+
+# Test 64: Resume Download with Range and Conditional Requests
+def test_resume_download_ranges(client, mocker, user):
+    """
+    Test that resume downloads support byte ranges and ETag revalidation.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+    """
+    mocker.patch(
+        "langchain_ollama.OllamaLLM.invoke",
+        return_value="Resume Feedback\n\n- Add more quantifiable achievements."
+    )
+    _, header = user
+    with open("data/sample-resume.pdf", "rb") as f:
+        pdf = f.read()
+    data = dict(file=(BytesIO(pdf), "sample-resume.pdf"))
+    rv = client.post(
+        "/resume", headers=header, content_type="multipart/form-data", data=data
+    )
+    assert rv.status_code == 200
+
+    rv = client.get("/resume/0", headers=header)
+    assert rv.status_code == 200
+    assert rv.data == pdf
+    assert rv.headers["Accept-Ranges"] == "bytes"
+    assert int(rv.headers["Content-Length"]) == len(pdf)
+    etag = rv.headers["ETag"]
+
+    rv = client.get("/resume/0", headers={**header, "Range": "bytes=10-109"})
+    assert rv.status_code == 206
+    assert rv.data == pdf[10:110]
+    assert rv.headers["Content-Range"] == f"bytes 10-109/{len(pdf)}"
+
+    rv = client.get("/resume/0", headers={**header, "Range": f"bytes={len(pdf) + 10}-"})
+    assert rv.status_code == 416
+
+    rv = client.get("/resume/0", headers={**header, "If-None-Match": etag})
+    assert rv.status_code == 304
+
+
+# Test 65: Resume Metadata Listing with Paging
+def test_resume_metadata_listing(client, mocker, user):
+    """
+    Test that resume listings return stored metadata and support offset/limit paging.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+    """
+    mocker.patch(
+        "langchain_ollama.OllamaLLM.invoke",
+        return_value="Resume Feedback\n\n- Add more quantifiable achievements."
+    )
+    _, header = user
+    for pdf_path in ["data/sample-resume.pdf", "data/sample-resume-2.pdf"]:
+        with open(pdf_path, "rb") as f:
+            pdf = f.read()
+        data = dict(file=(BytesIO(pdf), pdf_path.rsplit("/", maxsplit=1)[-1]))
+        rv = client.post(
+            "/resume", headers=header, content_type="multipart/form-data", data=data
+        )
+        assert rv.status_code == 200
+
+    rv = client.get("/resume?offset=1&limit=1", headers=header)
+    assert rv.status_code == 200
+    jdata = json.loads(rv.data.decode("utf-8"))
+    assert jdata["total"] == 2
+    assert jdata["filenames"] == ["sample-resume-2.pdf"]
+    meta = jdata["resumes"][0]
+    assert meta["index"] == 1
+    assert meta["size"] == len(pdf)
+    assert meta["sha256"] == hashlib.sha256(pdf).hexdigest()
+    assert meta["page_count"] >= 1
+
+    rv = client.get("/resume?limit=0", headers=header)
+    assert rv.status_code == 400
+
+
+# Test 66: Resume Delete by Stable ID Removes GridFS File
+def test_resume_delete_by_id(client, mocker, user):
+    """
+    Test that deleting a resume by stable id removes its entries and its GridFS file.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+    """
+    mocker.patch(
+        "langchain_ollama.OllamaLLM.invoke",
+        return_value="Resume Feedback\n\n- Add more quantifiable achievements."
+    )
+    user, header = user
+    ids = []
+    for pdf_path in ["data/sample-resume.pdf", "data/sample-resume-2.pdf"]:
+        with open(pdf_path, "rb") as f:
+            data = dict(file=(BytesIO(f.read()), pdf_path.rsplit("/", maxsplit=1)[-1]))
+        rv = client.post(
+            "/resume", headers=header, content_type="multipart/form-data", data=data
+        )
+        assert rv.status_code == 200
+        ids.append(json.loads(rv.data.decode("utf-8"))["id"])
+
+    file_id = Users.objects(id=user.id).first().resumeMeta[0].file_id
+    rv = client.delete(f"/resume/id/{ids[0]}", headers=header)
+    assert rv.status_code == 200
+    assert not get_fs().exists(file_id)
+
+    rv = client.get("/resume", headers=header)
+    jdata = json.loads(rv.data.decode("utf-8"))
+    assert [resume["id"] for resume in jdata["resumes"]] == [ids[1]]
+    rv = client.get(f"/resume-feedback/id/{ids[1]}", headers=header)
+    assert rv.status_code == 200
+    rv = client.delete(f"/resume/id/{ids[0]}", headers=header)
+    assert rv.status_code == 400
+
+
+# Test 100: Upload Racing a Delete Does Not Restore the Deleted Resume
+def test_resume_upload_concurrent_delete(client, mocker, user):
+    """
+    Test that an upload appends its entries atomically, so a resume deleted while it is in flight stays deleted.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+    """
+    invoke = mocker.patch("langchain_ollama.OllamaLLM.invoke", return_value="First feedback")
+    user, header = user
+    with open("data/sample-resume.pdf", "rb") as f:
+        data = dict(file=(BytesIO(f.read()), "sample-resume.pdf"))
+    rv = client.post(
+        "/resume", headers=header, content_type="multipart/form-data", data=data
+    )
+    first_id = json.loads(rv.data.decode("utf-8"))["id"]
+    first_file = Users.objects(id=user.id).first().resumeMeta[0].file_id
+
+    def delete_during_generation(_prompt):
+        # The first resume is deleted after the upload has loaded the user
+        delete_resume(user.id, first_id)
+        return "Second feedback"
+
+    invoke.side_effect = delete_during_generation
+    with open("data/sample-resume-2.pdf", "rb") as f:
+        data = dict(file=(BytesIO(f.read()), "sample-resume-2.pdf"))
+    rv = client.post(
+        "/resume", headers=header, content_type="multipart/form-data", data=data
+    )
+    assert rv.status_code == 200
+    second_id = json.loads(rv.data.decode("utf-8"))["id"]
+
+    updated = Users.objects(id=user.id).first()
+    assert [meta.resume_id for meta in updated.resumeMeta] == [second_id]
+    assert [resume.grid_id for resume in updated.resumes] == [updated.resumeMeta[0].file_id]
+    assert not get_fs().exists(first_file)
+    rv = client.get("/resume-feedback/0", headers=header)
+    assert json.loads(rv.data.decode("utf-8"))["feedback"] == "Second feedback"
+
+
+# Test 67: Orphaned GridFS File Garbage Collection
+@pytest.mark.usefixtures("client")
+def test_gc_resumes_command(app):
+    """
+    Test that gc-resumes removes GridFS files no user references.
+
+    Args:
+        app: The Flask application instance.
+    """
+    orphan_id = get_fs().put(b"orphaned resume", filename="orphan.pdf")
+    # A negative grace period moves the cutoff past files uploaded this millisecond
+    result = app.test_cli_runner().invoke(args=["gc-resumes", "--grace-minutes", "-1"])
+    assert result.exit_code == 0, result.output
+    assert not get_fs().exists(orphan_id)
+
+
+# Test 68: Duplicate Resume Upload Reuses Blob and Feedback
+def test_resume_upload_duplicate(client, mocker, user):
+    """
+    Test that re-uploading identical content skips the model and shares one reference counted blob.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+    """
+    invoke = mocker.patch(
+        "langchain_ollama.OllamaLLM.invoke",
+        return_value="Resume Feedback\n\n- Add more quantifiable achievements."
+    )
+    user, header = user
+    with open("data/sample-resume.pdf", "rb") as f:
+        pdf = f.read()
+    responses = []
+    for filename in ["first.pdf", "second.pdf"]:
+        data = dict(file=(BytesIO(pdf), filename))
+        rv = client.post(
+            "/resume", headers=header, content_type="multipart/form-data", data=data
+        )
+        assert rv.status_code == 200
+        responses.append(json.loads(rv.data.decode("utf-8")))
+
+    assert [r["duplicate"] for r in responses] == [False, True]
+    assert invoke.call_count == 1
+
+    metas = Users.objects(id=user.id).first().resumeMeta
+    assert metas[0].file_id == metas[1].file_id
+    assert [meta.filename for meta in metas] == ["first.pdf", "second.pdf"]
+
+    rv = client.get("/resume-feedback", headers=header)
+    assert len(json.loads(rv.data.decode("utf-8"))["response"]) == 2
+
+    rv = client.delete(f"/resume/id/{responses[0]['id']}", headers=header)
+    assert rv.status_code == 200
+    assert get_fs().exists(metas[0].file_id)
+    rv = client.delete(f"/resume/id/{responses[1]['id']}", headers=header)
+    assert rv.status_code == 200
+    assert not get_fs().exists(metas[0].file_id)
+
+    # A blob retained again between the decrement and the delete is kept
+    file_id = get_fs().put(pdf, refs=1)
+    files = mocker.Mock(wraps=get_db()["fs.files"])
+
+    def decrement_then_retain(*args, **kwargs):
+        doc = get_db()["fs.files"].find_one_and_update(*args, **kwargs)
+        retain_blob(file_id)
+        return doc
+
+    files.find_one_and_update.side_effect = decrement_then_retain
+    mocker.patch("resume_store._files", return_value=files)
+    assert not release_blob(file_id)
+    assert get_fs().get(file_id).refs == 1
+    files.find_one_and_update.side_effect = None
+    assert release_blob(file_id)
+    assert not get_fs().exists(file_id)
+    # Blobs without a file document are never deleted
+    assert not release_blob(ObjectId())
+
+
+# Test 69: Compressed Resume Blob Round Trip
+def test_resume_compressed_blob(client, mocker, user):
+    """
+    Test that resumes stored compressed are served back byte for byte, including ranges.
+
+    Args:
+        client: The Flask test client.
+        mocker: Pytest-mock fixture for mocking objects.
+        user: The test user and authentication header.
+    """
+    mocker.patch.dict(config, {"COMPRESS_RESUME_BLOBS": True})
+    mocker.patch(
+        "langchain_ollama.OllamaLLM.invoke",
+        return_value="Resume Feedback\n\n" + "- Add more quantifiable achievements.\n" * 50
+    )
+    user, header = user
+    with open("data/sample-resume-2.pdf", "rb") as f:
+        pdf = f.read()
+    data = dict(file=(BytesIO(pdf), "sample-resume-2.pdf"))
+    rv = client.post(
+        "/resume", headers=header, content_type="multipart/form-data", data=data
+    )
+    assert rv.status_code == 200
+
+    stored = Users.objects(id=user.id).first()
+    assert get_fs().get(stored.resumeMeta[0].file_id).compression == "zstd"
+    assert isinstance(stored.resumeFeedbacks[0], bytes)
+
+    rv = client.get("/resume/0", headers=header)
+    assert rv.data == pdf
+    rv = client.get("/resume/0", headers={**header, "Range": "bytes=0-9"})
+    assert rv.status_code == 206
+    assert rv.data == pdf[:10]
+    rv = client.get("/resume-feedback/0", headers=header)
+    assert json.loads(rv.data.decode("utf-8"))["feedback"].startswith("Resume Feedback")
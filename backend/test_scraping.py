@@ -0,0 +1,456 @@
+"""
+Test module for the scraping package: parsers, HTTP and browser fetching, rate limiting,
+the scrape pipeline and the search cache
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import requests
+from mongoengine.connection import get_db
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
+from app import create_app
+from benchmarks.fixture_server import RecordedPageServer, load_recordings
+from config import config
+from profiles import clear_profile_cache
+from routes.jobs import scrape_jobs
+from scraping.cache import CACHE_COLLECTION, SearchCache, get_search_cache
+from scraping.drivers import (
+    DriverPoolTimeout, WebDriverPool, chrome_options, close_driver_pool, create_remote_driver, fetch_with_browser,
+    get_driver_timings, load_user_agents
+)
+from scraping.http import fetch_page, get_http_session
+from scraping.parsers import ListingParseError, get_parser
+from scraping.pipeline import CareerBuilderSource, JobSource, ScrapePipeline
+from scraping.ratelimit import RateLimitTimeout, TokenBucket, backoff_delay, get_rate_limiter
+from shared import Shared
+
+
+@pytest.fixture()
+def app():
+    """
+    Fixture to create a test instance of the Flask application.
+
+    Returns:
+        Flask: The configured Flask application instance.
+    """
+    app = create_app()
+    get_search_cache().clear()
+    clear_profile_cache()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    """
+    Fixture to provide a test client for the Flask application.
+
+    Args:
+        app: The Flask application instance provided by the app fixture.
+
+    Yields:
+        FlaskClient: The test client for making HTTP requests.
+    """
+    client = app.test_client()
+    ctx = app.app_context()
+    ctx.push()
+    yield client
+    ctx.pop()
+
+
+class FakeDriver:
+    """Stand-in for a remote WebDriver session."""
+
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+
+    @property
+    def current_url(self):
+        """Raises like a dead remote session would."""
+        if not self.alive:
+            raise WebDriverException("session deleted")
+        return "about:blank"
+
+    def delete_all_cookies(self):
+        """No-op cookie reset."""
+
+    def quit(self):
+        """Marks the session as ended."""
+        self.quit_called = True
+
+
+# Test 70: WebDriver Pool Reuse and Recycling
+def test_webdriver_pool_reuse_and_recycle():
+    """
+    Test that pooled sessions are reused, recycled after max uses and replaced when unhealthy.
+    """
+    created = []
+
+    def factory():
+        created.append(FakeDriver())
+        return created[-1]
+
+    pool = WebDriverPool(factory, size=1, max_uses=2, checkout_timeout=1)
+    with pool.session() as first:
+        pass
+    with pool.session() as second:
+        pass
+    assert first is second
+    assert first.quit_called
+    assert len(created) == 1
+
+    with pool.session() as third:
+        pass
+    assert third is not first
+    third.alive = False
+    with pool.session() as fourth:
+        pass
+    assert fourth is not third
+    assert len(created) == 3
+
+
+# Test 71: WebDriver Pool Checkout Timeout
+def test_webdriver_pool_checkout_timeout():
+    """
+    Test that checkout gives up with a timeout when every session is in use.
+    """
+    pool = WebDriverPool(FakeDriver, size=1, max_uses=10, checkout_timeout=0.05)
+    entry = pool.checkout()
+    with pytest.raises(DriverPoolTimeout):
+        pool.checkout()
+    pool.checkin(entry)
+    assert pool.idle_count() == 1
+    pool.close()
+    assert entry.driver.quit_called
+
+
+# Test 72: HTTP Parser on Recorded Results Page
+def test_careerbuilder_parser_recorded_page():
+    """
+    Test that the lightweight parser extracts every listing from a recorded results page.
+    """
+    with open("data/careerbuilder/results.html", encoding="utf-8") as f:
+        html = f.read()
+    results = get_parser("careerbuilder").parse(html)
+    assert len(results) == 3
+    assert results[0] == {
+        "title": "Mission Software Engineer, Federal",
+        "company": "Scale AI",
+        "location": "New York, NY (Onsite)",
+        "type": "Full-Time",
+        "link": "https://www.careerbuilder.com/job/J3R5G06ZWMK43M198Z2",
+        "externalId": "J3R5G06ZWMK43M198Z2",
+    }
+
+    with open("data/careerbuilder/blocked.html", encoding="utf-8") as f:
+        blocked = f.read()
+    with pytest.raises(ListingParseError):
+        get_parser("careerbuilder").parse(blocked)
+
+
+# Test 73: HTTP Scrape Falls Back to Selenium
+def test_scrape_falls_back_to_selenium(mocker):
+    """
+    Test that the Selenium scraper only runs when the HTTP scraper cannot parse the page.
+
+    Args:
+        mocker: Pytest-mock fixture for mocking objects.
+    """
+    with open("data/careerbuilder/results.html", encoding="utf-8") as f:
+        html = f.read()
+    fetch = mocker.patch("scraping.pipeline.fetch_page", return_value=html)
+    browser = mocker.patch("scraping.pipeline.fetch_with_browser", return_value="<html></html>")
+
+    assert len(scrape_jobs("engineer", "", "New York")) == 3
+    assert "keywords=engineer" in fetch.call_args_list[0][0][0]
+    browser.assert_not_called()
+
+    with open("data/careerbuilder/blocked.html", encoding="utf-8") as f:
+        fetch.return_value = f.read()
+    fetch.reset_mock()
+    assert not scrape_jobs("engineer", "", "New York")
+    browser.assert_called_once_with(fetch.call_args[0][0], "li.data-results-content-parent")
+
+
+# Test 75: Search Cache Expiry and Background Refresh
+def test_search_cache_stale_while_revalidate(mocker):
+    """
+    Test that stale entries are served while refreshed and expired entries are fetched again.
+
+    Args:
+        mocker: Pytest-mock fixture for mocking objects.
+    """
+    now = mocker.patch("scraping.cache.time.time", return_value=1000.0)
+    cache = SearchCache(max_entries=2, ttl=60, stale_ttl=60)
+    fetch = mocker.Mock(side_effect=[["first"], ["second"], ["third"]])
+
+    assert cache.get_or_fetch("a", fetch) == ["first"]
+    assert cache.get_or_fetch("a", fetch) == ["first"]
+    assert fetch.call_count == 1
+
+    # Stale: old results come back at once and a refresh replaces them
+    now.return_value = 1090.0
+    assert cache.get_or_fetch("a", fetch) == ["first"]
+    # Waits for the background refresh to finish
+    cache._refresher.shutdown(wait=True)  # pylint: disable=protected-access
+    assert cache.get("a") == (["second"], True)
+
+    # Past the stale window the entry is a miss
+    now.return_value = 1090.0 + 120
+    assert cache.get("a") is None
+
+    # Least recently used entries are evicted
+    cache.set("b", [1])
+    cache.set("c", [2])
+    cache.set("d", [3])
+    assert cache.get("b") is None
+    assert cache.get("d") == ([3], True)
+
+    # Searches that found nothing are not cached
+    empty = mocker.Mock(return_value=[])
+    assert cache.get_or_fetch("e", empty) == []
+    assert cache.get_or_fetch("e", empty) == []
+    assert empty.call_count == 2
+
+
+# Test 76: Search Cache Shared Through Mongo
+@pytest.mark.usefixtures("client")
+def test_search_cache_mongo_tier():
+    """
+    Test that results cached by one process are found by another through the Mongo tier.
+    """
+    writer = SearchCache(max_entries=4, ttl=60, stale_ttl=60, use_mongo=True)
+    writer.set("shared", [{"externalId": "9"}])
+
+    reader = SearchCache(max_entries=4, ttl=60, stale_ttl=60, use_mongo=True)
+    assert reader.get("shared") == ([{"externalId": "9"}], True)
+    get_db()[CACHE_COLLECTION].delete_many({})
+
+
+# Test 77: Concurrent Identical Searches Share One Scrape
+def test_search_cache_coalesces_misses(mocker):
+    """
+    Test that concurrent misses for the same query wait on a single in-flight fetch.
+
+    Args:
+        mocker: Pytest-mock fixture for mocking objects.
+    """
+    cache = SearchCache(max_entries=4, ttl=60, stale_ttl=60)
+    release = threading.Event()
+    fetch = mocker.Mock(side_effect=lambda: release.wait(5) and [{"externalId": "1"}])
+
+    started = threading.Barrier(5)
+
+    def search():
+        started.wait(5)
+        return cache.get_or_fetch("popular", fetch)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(search) for _ in range(4)]
+        started.wait(5)
+        time.sleep(0.1)
+        assert not any(future.done() for future in futures)
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert fetch.call_count == 1
+    assert results == [[{"externalId": "1"}]] * 4
+    assert not cache._flights.in_flight("popular")  # pylint: disable=protected-access
+
+
+# Test 87: Token Bucket Rate Limiting
+def test_token_bucket(mocker):
+    """
+    Test that the token bucket allows a burst and then paces requests at its rate.
+
+    Args:
+        mocker: Pytest-mock fixture for mocking objects.
+    """
+    now = mocker.patch("scraping.ratelimit.time.monotonic", return_value=100.0)
+    sleep = mocker.patch("scraping.ratelimit.time.sleep")
+    bucket = TokenBucket(rate=2, burst=2)
+
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.acquire() == pytest.approx(1.0)
+    sleep.assert_called_with(pytest.approx(1.0))
+    with pytest.raises(RateLimitTimeout):
+        bucket.acquire(timeout=1)
+
+    now.return_value = 110.0
+    assert bucket.acquire() == 0
+    assert get_rate_limiter("https://example.com/a") is get_rate_limiter("https://example.com/b?page=2")
+    assert get_rate_limiter("https://example.com/") is not get_rate_limiter("https://example.org/")
+    assert all(0 <= backoff_delay(attempt, base=1, cap=4) <= min(4, 2 ** attempt) for attempt in range(6))
+
+
+# Test 88: HTTP Fetches Retry With Backoff
+def test_fetch_page_retries(mocker):
+    """
+    Test that throttled and failed requests are retried with backoff, honoring Retry-After.
+
+    Args:
+        mocker: Pytest-mock fixture for mocking objects.
+    """
+    mocker.patch("scraping.http.get_rate_limiter")
+    sleep = mocker.patch("scraping.http.time.sleep")
+    throttled = mocker.Mock(status_code=429, headers={"Retry-After": "30"})
+    ok = mocker.Mock(status_code=200, headers={}, text="<html></html>")
+    get = mocker.patch.object(get_http_session(), "get", side_effect=[
+        requests.ConnectionError("reset"), throttled, ok
+    ])
+
+    assert fetch_page("https://example.com/jobs", retries=2) == "<html></html>"
+    assert get.call_count == 3
+    assert sleep.call_args_list[1][0][0] == 30
+
+    get.side_effect = [throttled, throttled]
+    throttled.raise_for_status.side_effect = requests.HTTPError("429")
+    with pytest.raises(requests.HTTPError):
+        fetch_page("https://example.com/jobs", retries=1)
+
+
+# Test 89: Scrape Pipeline Pages Through Sources
+def test_scrape_pipeline(mocker):
+    """
+    Test that the pipeline pages through every source, stops at the end of the results and deduplicates postings.
+
+    Args:
+        mocker: Pytest-mock fixture for mocking objects.
+    """
+    # Sources must say how their result pages are addressed
+    with pytest.raises(TypeError):
+        JobSource()  # pylint: disable=abstract-class-instantiated
+
+    class FakeSource(JobSource):
+        """A source whose result pages are numbered URLs on a fake host"""
+
+        parser = "careerbuilder"
+
+        def __init__(self, name, pages):
+            self.name = name
+            self.pages = pages
+
+        def page_url(self, keywords, company, location, page):
+            return f"https://{self.name}.test/jobs?q={keywords}&page={page}"
+
+    def listing(external_id):
+        return (
+            f'<li class="data-results-content-parent"><a class="data-results-content" href="/job/{external_id}">'
+            f'<div class="data-results-title"> Job  {external_id} </div></a></li>'
+        )
+
+    pages = {
+        "https://a.test/jobs?q=dev&page=1": listing("1") + listing("2"),
+        "https://a.test/jobs?q=dev&page=2": listing("3"),
+        "https://a.test/jobs?q=dev&page=3": listing("3"),
+        "https://b.test/jobs?q=dev&page=1": listing("2") + listing("4"),
+    }
+    fetch = mocker.patch("scraping.pipeline.fetch_page", side_effect=lambda url: pages.get(url, "<html></html>"))
+    browser = mocker.patch("scraping.pipeline.fetch_with_browser")
+    executor = ThreadPoolExecutor(max_workers=2)
+    pipeline = ScrapePipeline([FakeSource("a", 3), FakeSource("b", 1)], executor, max_pages=5)
+
+    postings = list(pipeline.iter_postings("dev", "", ""))
+    assert sorted(p["externalId"] for p in postings) == ["1", "2", "3", "4"]
+    assert postings[0]["title"].startswith("Job ") and "  " not in postings[0]["title"]
+    assert set(postings[0]) == {"title", "company", "location", "type", "link", "externalId"}
+    # a: pages 1-3 (3 repeats 2), b: pages 1-2 (2 is empty)
+    assert fetch.call_count == 5
+    browser.assert_not_called()
+
+    stream = pipeline.iter_postings("dev", "", "")
+    next(stream)
+    stream.close()
+
+    fetch.side_effect = requests.ConnectionError("down")
+    browser.side_effect = DriverPoolTimeout("busy")
+    with pytest.raises(DriverPoolTimeout):
+        list(pipeline.iter_postings("dev", "", ""))
+    executor.shutdown()
+
+
+# Test 90: Offline Scrape of Recorded Pages
+def test_scrape_recorded_pages(mocker):
+    """
+    Test that a search scrapes the recorded pages served by the local fixture server.
+
+    Args:
+        mocker: Pytest-mock fixture for mocking objects.
+    """
+    mocker.patch.dict(config, {"SCRAPER_HTTP_FIRST": True, "SCRAPER_SOURCES": "careerbuilder", "SCRAPER_MAX_PAGES": 3})
+    with RecordedPageServer(load_recordings()) as server:
+        mocker.patch.object(CareerBuilderSource, "base_url", server.url)
+        postings = scrape_jobs("engineer", "", "New York")
+        requested = server.requests
+
+    assert [p["externalId"] for p in postings] == [
+        "J3R5G06ZWMK43M198Z2", "J3T1KZ6Y8C3W5QX0B7M", "J3V8N2P4R6T8X0Z2B4D"
+    ]
+    assert postings[0]["link"] == f"{server.url}/job/J3R5G06ZWMK43M198Z2"
+    # Page 2 has no recording, which ends the results
+    assert len(requested) == 2
+    assert "page_number=2" in requested[1]
+
+
+# Test 91: Browser Setup Is Cached Across Sessions
+def test_driver_setup_cached(mocker):
+    """
+    Test that the User-Agent dataset is loaded once and options are reused across new sessions.
+
+    Args:
+        mocker: Pytest-mock fixture for mocking objects.
+    """
+    mocker.patch("scraping.drivers._user_agents", Shared(load_user_agents))
+    mocker.patch.dict(config, {"SELENIUM_USER_AGENT_POOL_SIZE": 3})
+    agents = iter(["agent-a", "agent-b", "agent-a", "agent-c"])
+    user_agent = mocker.patch("scraping.drivers.UserAgent")
+    type(user_agent.return_value).random = mocker.PropertyMock(side_effect=lambda: next(agents))
+    remote = mocker.patch("selenium.webdriver.Remote")
+    before = get_driver_timings()
+
+    for _ in range(4):
+        create_remote_driver()
+
+    user_agent.assert_called_once()
+    options = [call.kwargs["options"] for call in remote.call_args_list]
+    assert [o.arguments[-1] for o in options] == [
+        "user-agent=agent-a", "user-agent=agent-b", "user-agent=agent-a", "user-agent=agent-b"
+    ]
+    assert options[0] is options[2]
+    assert "--headless" in options[0].arguments
+    after = get_driver_timings()
+    assert after["sessions"] == before["sessions"] + 4
+    assert after["user_agent_pool_seconds"] is not None
+
+
+# Test 92: Browser Page Loads Are Bounded
+def test_browser_page_load_controls(mocker):
+    """
+    Test that browser sessions use the page load strategy and resource blocking, and that page loads and waits are bounded.
+
+    Args:
+        mocker: Pytest-mock fixture for mocking objects.
+    """
+    options = chrome_options("agent", "eager", "images, fonts, bogus").to_capabilities()
+    assert options["pageLoadStrategy"] == "eager"
+    assert options["goog:chromeOptions"]["prefs"] == {"profile.managed_default_content_settings.images": 2}
+    assert "--disable-remote-fonts" in options["goog:chromeOptions"]["args"]
+
+    mocker.patch.dict(config, {"SELENIUM_WAIT_TIMEOUT": 0.1, "SELENIUM_PAGE_LOAD_TIMEOUT": 5})
+    mocker.patch("scraping.drivers.get_rate_limiter")
+    close_driver_pool()
+    remote = mocker.patch("selenium.webdriver.Remote")
+    driver = remote.return_value
+    driver.page_source = "<html></html>"
+    driver.get.side_effect = TimeoutException("slow ads")
+    driver.find_element.side_effect = NoSuchElementException("not rendered")
+
+    assert fetch_with_browser("https://example.com/jobs", "li.listing") == "<html></html>"
+    driver.set_page_load_timeout.assert_called_once_with(5)
+    driver.execute_script.assert_called_once_with("window.stop();")
+    assert driver.find_element.call_args[0] == ("css selector", "li.listing")
+    close_driver_pool()
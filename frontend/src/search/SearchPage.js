@@ -28,11 +28,57 @@ export default class SearchPage extends Component {
 		}
   }
 
+  componentWillUnmount() {
+    // Closing the stream lets the server stop scraping
+    this.closeStream();
+  }
+
+  closeStream() {
+    if (this.source) {
+      this.source.close();
+      this.source = null;
+    }
+  }
+
   search() {
     if (!this.state.searchKeywords && !this.state.searchCompany && !this.state.searchLocation) {
       window.alert("Search queries cannot be empty!");
       return;
     }
+    if (typeof EventSource === "undefined") {
+      this.searchAll();
+      return;
+    }
+
+    this.closeStream();
+    this.setState({ loading: true, rows: [] });
+    const query = $.param({
+      keywords: this.state.searchKeywords,
+      company: this.state.searchCompany,
+      location: this.state.searchLocation,
+    });
+    const source = new EventSource(`http://localhost:5000/search/stream?${query}`);
+    this.source = source;
+
+    // Show each posting as soon as it arrives
+    source.onmessage = (event) => {
+      this.setState((state) => ({ loading: false, rows: [...state.rows, JSON.parse(event.data)] }));
+    };
+    source.addEventListener("done", () => {
+      this.closeStream();
+      this.setState({ loading: false });
+      this.saveSearch(this.state.rows);
+    });
+    const fail = () => {
+      this.closeStream();
+      window.alert("Error while fetching jobs. Please try again later");
+      this.setState({ loading: false });
+    };
+    source.addEventListener("search-error", fail);
+    source.onerror = fail;
+  }
+
+  searchAll() {
     this.setState({ loading: true });
     $.ajax({
       url: "http://localhost:5000/search",
@@ -48,12 +94,7 @@ export default class SearchPage extends Component {
           loading: false,
           rows: data,
         });
-        localStorage.setItem('lastSearchResults', JSON.stringify(data));
-        localStorage.setItem('lastSearchFilters', JSON.stringify({
-          keywords: this.state.searchKeywords,
-          company: this.state.searchCompany,
-          location: this.state.searchLocation
-        }));
+        this.saveSearch(data);
       },
       error: () => {
         window.alert("Error while fetching jobs. Please try again later");
@@ -64,6 +105,15 @@ export default class SearchPage extends Component {
     });
   }
 
+  saveSearch(rows) {
+    localStorage.setItem('lastSearchResults', JSON.stringify(rows));
+    localStorage.setItem('lastSearchFilters', JSON.stringify({
+      keywords: this.state.searchKeywords,
+      company: this.state.searchCompany,
+      location: this.state.searchLocation
+    }));
+  }
+
   handleChange(event) {
     this.setState({ [event.target.id]: event.target.value });
   }